@@ -1,19 +1,32 @@
-import sys
-import os
-# Fix import path to access utils and scripts
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
-import sqlite3
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import os
+import time
 
 # Import existing business logic (DO NOT MODIFY)
-from utils.db import get_connection
-from utils.validators import is_valid_email
-from utils.enrichment import extract_domain, check_website, extract_signals, is_public_email
-from utils.ai import score_lead
+from utils.db import get_connection, DB_PATH, IntegrityError
+from utils.validators import normalize_email
+from utils.enrichment import extract_domain, build_enrichment
+from utils.ai import score_lead, ScoringError, MODEL_NAME, usage_values
+from utils.prescore import prescore_lead, PRESCORER_NAME
+from utils.dedup import index_lead, find_duplicate, copy_enrichment, inherited_score, DUPLICATE_SCORER
+from utils.companies import CompanyResolver
+from utils.events import (INSERT_EVENT_SQL, INGESTED, ENRICHED, SCORED, EVENT_TYPES,
+                          EVENT_PAGE_SIZE, EVENT_POLL_SECONDS, event_values, read_events)
+from utils.writer import write_task, get_writer, WriterProcess
+from utils.scheduler import INTERACTIVE
+from utils.score_stats import score_distribution
+from utils.shadow import maybe_shadow
+from utils.live_metrics import LiveMetrics, lead_metrics, metrics_view
+from utils.hot_leads import (provisional_alert, follow_up_values, retract, notify,
+                             INSERT_ALERT_SQL, INSERT_UNSAVED_ALERT_SQL)
+from utils import metrics
 
 app = FastAPI(title="Lead Automation API", version="1.0.0")
 
@@ -26,6 +39,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Latency histogram, status counter and in-flight gauge per route"""
+    metrics.gauge_add("http_requests_in_flight", 1)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = route.path if route else "unmatched"
+        metrics.observe("http_request_seconds", time.perf_counter() - start,
+                        method=request.method, path=path)
+        metrics.inc("http_requests_total", method=request.method, path=path, status=status)
+        metrics.gauge_add("http_requests_in_flight", -1)
+
 # Request models
 class LeadSubmission(BaseModel):
     name: str
@@ -48,80 +79,206 @@ class MetricsResponse(BaseModel):
     cold_leads: int
     avg_score: float
 
+class HistogramBucket(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
+class ScoreGroup(BaseModel):
+    key: Optional[str]
+    count: int
+    mean: float
+    p50: float
+    p90: float
+
+class ScoreDistributionResponse(BaseModel):
+    total: int
+    mean: float
+    std: float
+    histogram: List[HistogramBucket]
+    quantiles: Dict[str, float]
+    by_category: List[ScoreGroup]
+    by_domain: List[ScoreGroup]
+
+class LeadEvent(BaseModel):
+    id: int
+    lead_id: Optional[int]
+    type: str
+    data: Dict[str, Any]
+    created_at: str
+
+class LeadEventsResponse(BaseModel):
+    events: List[LeadEvent]
+    next_cursor: int
+
+# SSE comment sent when a stream has been idle this long, so proxies keep it open
+EVENT_KEEPALIVE_SECONDS = 15
+
+# Dashboard metrics followed from the event log, shared by every /metrics/stream client
+live_metrics = LiveMetrics()
+
 @app.get("/")
 def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "message": "Lead Automation API is running"}
 
+INSERT_ENRICHMENT_SQL = """
+    INSERT INTO lead_enrichment
+    (lead_id, domain, website_exists, has_pricing, has_careers, mentions_ai, summary,
+     fetch_failure, fetch_retryable, fetch_attempts)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_SCORE_SQL = """
+    INSERT INTO lead_scores
+    (lead_id, score, category, action, reason, scorer, scorer_version,
+     prompt_tokens, completion_tokens, latency_ms, cost_usd)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+@write_task
+def save_submitted_lead(cursor, lead_row, email_key, enrichment_row, duplicate_of, score_row, alerts=()):
+    """Every write for one submitted lead, as a single unit; returns the new lead id"""
+    name, email, company, message = lead_row
+    cursor.execute("""
+    INSERT INTO leads (name, email, company, message, email_key)
+    VALUES (?, ?, ?, ?, ?)
+    """, (*lead_row, email_key))
+    lead_id = cursor.lastrowid
+
+    index_lead(cursor, lead_id, email, message)
+    company_id = CompanyResolver(cursor).link_lead(lead_id, company, email)
+    cursor.execute(INSERT_EVENT_SQL, event_values(
+        lead_id, INGESTED, email=email, company=company, company_id=company_id, source="api"
+    ))
+
+    if enrichment_row:
+        cursor.execute(INSERT_ENRICHMENT_SQL, (lead_id, *enrichment_row))
+        domain, website_exists, _, _, _, summary, fetch_failure, _, _ = enrichment_row
+        enriched = event_values(lead_id, ENRICHED, domain=domain, website_exists=bool(website_exists),
+                                summary=summary, fetch_failure=fetch_failure)
+    else:
+        copy_enrichment(cursor, lead_id, duplicate_of)
+        enriched = event_values(lead_id, ENRICHED, domain=extract_domain(email), copied_from=duplicate_of)
+    cursor.execute(INSERT_EVENT_SQL, enriched)
+
+    cursor.execute(INSERT_SCORE_SQL, (lead_id, *score_row))
+    score, category, action, _, scorer, scorer_version = score_row[:6]
+    cursor.execute(INSERT_EVENT_SQL, event_values(
+        lead_id, SCORED, score=score, category=category, action=action, scorer=scorer,
+        scorer_version=scorer_version, run_id=None
+    ))
+    for alert in alerts:
+        cursor.execute(INSERT_ALERT_SQL, (lead_id, *alert))
+    return lead_id
+
+@write_task
+def save_unsaved_alerts(cursor, email, alerts):
+    """Alerts sent for a submission that was never stored"""
+    for alert in alerts:
+        cursor.execute(INSERT_UNSAVED_ALERT_SQL, (email, *alert))
+
+def retract_provisional(email, provisional, failure):
+    """Retract a provisional alert whose lead failed before it was stored, and record both"""
+    if not provisional:
+        return
+    alerts = [provisional, retract(email, failure)]
+    try:
+        get_writer().submit("save_unsaved_alerts", email, alerts)
+    except Exception as e:
+        print(f"Could not record retracted alert for {email}: {e}")
+
 @app.post("/submit-lead", response_model=LeadResponse)
 def submit_lead(lead: LeadSubmission):
     """
     Submit a new lead and get AI scoring result.
     Wraps existing ingest -> enrich -> score pipeline.
+    Nothing is written until scoring is done, so no lock is held across the
+    website fetch and LLM call; the writes then go through the shared writer.
     """
-    # Validate email using existing logic
-    if not is_valid_email(lead.email):
+    # Validate email using existing logic; john+x@acme.com and john@acme.com are one lead
+    normalized = normalize_email(lead.email)
+    if normalized is None:
         raise HTTPException(status_code=400, detail="Invalid email format")
+    lead.email = lead.email.strip()
     
-    conn = get_connection()
-    cursor = conn.cursor()
-    
+    # Sent before scoring; retracted if the lead fails before it is stored
+    provisional = None
     try:
-        # Step 1: Insert lead (reusing ingest_leads.py logic)
-        cursor.execute("""
-        INSERT INTO leads (name, email, company, message)
-        VALUES (?, ?, ?, ?)
-        """, (lead.name, lead.email, lead.company, lead.message))
-        
-        lead_id = cursor.lastrowid
-        
-        # Step 2: Enrich lead (reusing enrich_leads.py logic)
-        domain = extract_domain(lead.email)
-        
-        if is_public_email(domain):
-            # Public email handling
-            website_exists = False
-            signals = {"has_pricing": 0, "has_careers": 0, "mentions_ai": 0}
-            enrichment_summary = "Public email domain detected (low business confidence)"
+        # Step 1: Check the lead against existing leads (reads only)
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM leads WHERE email_key = ?", (normalized.email,))
+            if cursor.fetchone():
+                raise IntegrityError("UNIQUE constraint failed: leads.email_key")
+
+            # Near-duplicates reuse the original lead's enrichment and score
+            duplicate = find_duplicate(cursor, lead.email, lead.message)
+            duplicate_of = duplicate[0] if duplicate else None
+            ai_result = inherited_score(cursor, duplicate_of) if duplicate else None
+            enrichment_summary = None
+            if ai_result:
+                cursor.execute("SELECT summary FROM lead_enrichment WHERE lead_id = ?", (duplicate_of,))
+                row = cursor.fetchone()
+                enrichment_summary = row[0] if row else None
+        finally:
+            conn.close()
+
+        enrichment_row = None
+        alerts = []
+        if ai_result and enrichment_summary is not None:
+            scorer = DUPLICATE_SCORER
+            metrics.inc("llm_calls_skipped_total", reason="duplicate")
         else:
-            # Business domain enrichment
-            website_exists, page_text = check_website(domain)
-            signals = extract_signals(page_text) if website_exists else {
-                "has_pricing": 0, "has_careers": 0, "mentions_ai": 0
-            }
-            enrichment_summary = (
-                f"Website exists: {website_exists}, "
-                f"Pricing: {signals['has_pricing']}, "
-                f"Careers: {signals['has_careers']}, "
-                f"Mentions AI: {signals['mentions_ai']}"
+            # Likely-Hot leads alert sales before the website fetch and LLM call
+            provisional = provisional_alert(lead.email, lead.message)
+            if provisional:
+                alerts.append(provisional)
+
+            # Step 2: Enrich lead (reusing enrich_leads.py logic)
+            domain = extract_domain(lead.email)
+            enrichment = build_enrichment(domain)
+            signals = enrichment["signals"]
+            enrichment_summary = enrichment["summary"]
+            enrichment_row = (
+                domain, int(enrichment["website_exists"]),
+                signals["has_pricing"], signals["has_careers"], signals["mentions_ai"],
+                enrichment_summary, enrichment["fetch_failure"], int(enrichment["fetch_retryable"]),
+                enrichment["fetch_attempts"]
             )
         
-        # Store enrichment
-        cursor.execute("""
-        INSERT INTO lead_enrichment
-        (lead_id, domain, website_exists, has_pricing, has_careers, mentions_ai, summary)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            lead_id, domain, int(website_exists),
-            signals["has_pricing"], signals["has_careers"], signals["mentions_ai"],
-            enrichment_summary
-        ))
-        
-        # Step 3: Score lead (reusing score_leads.py logic)
-        ai_result = score_lead(
-            lead.name, lead.email, lead.company, lead.message, enrichment_summary
-        )
-        
-        # Store score
-        cursor.execute("""
-        INSERT INTO lead_scores (lead_id, score, category, action, reason)
-        VALUES (?, ?, ?, ?, ?)
-        """, (
-            lead_id, ai_result["score"], ai_result["category"],
-            ai_result["action"], ai_result["reason"]
-        ))
+            # Step 3: Score lead (reusing score_leads.py logic)
+            ai_result = prescore_lead(
+                lead.email, lead.message, enrichment["website_exists"], signals,
+                enrichment["fetch_retryable"]
+            )
+            scorer = PRESCORER_NAME
+            if ai_result:
+                metrics.inc("llm_calls_skipped_total", reason="prescore")
+            else:
+                ai_result = score_lead(
+                    lead.name, lead.email, lead.company, lead.message, enrichment_summary,
+                    priority=INTERACTIVE
+                )
+                scorer = MODEL_NAME
+            if alerts:
+                # Sent once the lead is stored
+                alerts.append(follow_up_values(ai_result))
         
-        conn.commit()
+        # Step 4: Store lead, enrichment and score together
+        lead_row = (lead.name, lead.email, lead.company, lead.message)
+        lead_id = get_writer().submit("save_submitted_lead", lead_row, normalized.email, enrichment_row, duplicate_of, (
+            ai_result["score"], ai_result["category"],
+            ai_result["action"], ai_result["reason"], scorer, ai_result.get("scorer_version"),
+            *usage_values(ai_result.get("usage"))
+        ), alerts)
+        provisional = None
+        for kind, _, _, reason in alerts[1:]:
+            notify(kind, lead.email, reason)
+        if scorer == MODEL_NAME:
+            # Sampled leads are re-scored by the candidate after this response is sent
+            maybe_shadow(lead_id, (*lead_row, enrichment_summary), ai_result)
         
         # Return combined result
         return LeadResponse(
@@ -132,14 +289,15 @@ def submit_lead(lead: LeadSubmission):
             enrichment_summary=enrichment_summary
         )
         
-    except sqlite3.IntegrityError:
-        conn.rollback()
+    except IntegrityError:
+        retract_provisional(lead.email, provisional, "email already exists")
         raise HTTPException(status_code=400, detail="Email already exists")
+    except ScoringError as e:
+        retract_provisional(lead.email, provisional, f"scoring failed: {e}")
+        raise HTTPException(status_code=502, detail=f"Scoring failed: {str(e)}")
     except Exception as e:
-        conn.rollback()
+        retract_provisional(lead.email, provisional, f"processing error: {e}")
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
-    finally:
-        conn.close()
 
 @app.get("/metrics", response_model=MetricsResponse)
 def get_metrics():
@@ -147,35 +305,113 @@ def get_metrics():
     Get current lead metrics.
     Always calculates real-time metrics for the internal ops UI.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    
+    _, totals = lead_metrics()
+    return MetricsResponse(**metrics_view(totals))
+
+@app.get("/metrics/stream")
+async def stream_metrics(request: Request):
+    """
+    Server-sent events with the /metrics fields: the current values on connect, then
+    every change. All connected dashboards share one event-log follower per process.
+    """
+    async def stream():
+        updates = live_metrics.updates(timeout=EVENT_KEEPALIVE_SECONDS)
+        try:
+            async for current in updates:
+                if await request.is_disconnected():
+                    break
+                if current is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"event: metrics\ndata: {json.dumps(current)}\n\n"
+        finally:
+            await updates.aclose()
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/metrics/score-distribution", response_model=ScoreDistributionResponse)
+def get_score_distribution(bins: int = Query(10, ge=1, le=100),
+                           top_domains: int = Query(20, ge=0, le=500)):
+    """Histogram, quantiles and per-category / per-domain breakdown of the latest lead scores"""
+    return ScoreDistributionResponse(**score_distribution(bins, top_domains))
+
+def parse_event_types(types):
+    """Comma-separated event types from a query parameter; None means every type"""
+    if not types:
+        return None
+    event_types = [t.strip() for t in types.split(",") if t.strip()]
+    unknown = set(event_types) - set(EVENT_TYPES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown event types: {', '.join(sorted(unknown))}")
+    return event_types
+
+@app.get("/events", response_model=LeadEventsResponse)
+def get_events(after: int = Query(0, ge=0), limit: int = Query(EVENT_PAGE_SIZE, ge=1, le=5000),
+               types: Optional[str] = None):
+    """
+    Lead events (ingested, enriched, scored, actioned) with id > after, oldest first.
+    Pass next_cursor back as after to continue from where this page ended.
+    """
+    events = read_events(after, limit, parse_event_types(types))
+    return LeadEventsResponse(events=events, next_cursor=events[-1]["id"] if events else after)
+
+@app.get("/events/stream")
+async def stream_events(request: Request, after: int = Query(0, ge=0), types: Optional[str] = None):
+    """Server-sent events: lead events after the cursor (or Last-Event-ID on reconnect), then new ones as they land"""
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        after = int(last_event_id)
+    event_types = parse_event_types(types)
+
+    async def stream():
+        cursor = after
+        idle_since = time.monotonic()
+        while not await request.is_disconnected():
+            events = await run_in_threadpool(read_events, cursor, EVENT_PAGE_SIZE, event_types)
+            for event in events:
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            if events:
+                cursor = events[-1]["id"]
+                idle_since = time.monotonic()
+                continue
+            if time.monotonic() - idle_since >= EVENT_KEEPALIVE_SECONDS:
+                yield ": keep-alive\n\n"
+                idle_since = time.monotonic()
+            await asyncio.sleep(EVENT_POLL_SECONDS)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/metrics-internal", response_class=PlainTextResponse, include_in_schema=False)
+def get_internal_metrics():
+    """Prometheus scrape endpoint for internal latency and counter metrics"""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+def main():
+    import uvicorn
+    host = os.getenv("API_HOST", "0.0.0.0")
+    port = int(os.getenv("API_PORT", "8000"))
+    workers = int(os.getenv("API_WORKERS", "1"))
+
+    if workers == 1:
+        uvicorn.run(app, host=host, port=port)
+        return
+
+    # Workers read on their own connections and send every write to one writer process
+    import secrets
+
+    os.environ.setdefault("WRITER_ADDRESS", os.path.join(os.path.dirname(DB_PATH), "writer.sock"))
+    os.environ["WRITER_AUTHKEY"] = secrets.token_hex(16)
+    writer = WriterProcess(os.environ["WRITER_ADDRESS"], os.environ["WRITER_AUTHKEY"].encode())
+    writer.start()
+    # Restarted if it dies or stops answering; workers reconnect on their next write
+    writer.watch()
+
     try:
-        # Always calculate real-time metrics for internal ops UI
-        cursor.execute("SELECT COUNT(*) FROM leads")
-        total_leads = cursor.fetchone()[0]
-        
-        cursor.execute("""
-        SELECT category, COUNT(*)
-        FROM lead_scores
-        GROUP BY category
-        """)
-        category_counts = dict(cursor.fetchall())
-        
-        cursor.execute("SELECT AVG(score) FROM lead_scores")
-        avg_score = cursor.fetchone()[0] or 0
-        
-        return MetricsResponse(
-            total_leads=total_leads,
-            hot_leads=category_counts.get("Hot", 0),
-            warm_leads=category_counts.get("Warm", 0),
-            cold_leads=category_counts.get("Cold", 0),
-            avg_score=round(avg_score, 2)
-        )
-        
+        uvicorn.run("api:app", host=host, port=port, workers=workers)
     finally:
-        conn.close()
+        writer.stop()
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    main()
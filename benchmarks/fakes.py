@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Offline stand-ins for the benchmark suite:
+- a company website server (configurable latency and failure rate)
+- an OpenAI-compatible chat completions endpoint
+
+Point the pipeline at them with ENRICH_URL_TEMPLATE and OPENAI_BASE_URL.
+"""
+
+import argparse
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def _bucket(text):
+    """Stable 0..1 value per string so runs are reproducible"""
+    return (zlib.crc32(text.encode()) % 10_000) / 10_000
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type="text/html"):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class FakeServer:
+    """Runs a handler class on 127.0.0.1 in a daemon thread"""
+
+    def __init__(self, handler, port=0, **settings):
+        handler = type(handler.__name__, (handler,), settings)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+class SiteHandler(_QuietHandler):
+    """GET /<domain> returns a company homepage, an error, or nothing useful"""
+
+    latency_ms = 20
+    failure_rate = 0.1
+
+    def do_GET(self):
+        domain = self.path.strip("/").split("/")[0]
+        time.sleep(self.latency_ms / 1000)
+
+        roll = _bucket(domain)
+        if roll < self.failure_rate / 2:
+            return self.send_body(404, "not found")
+        if roll < self.failure_rate:
+            return self.send_body(503, "unavailable")
+
+        parts = [f"<h1>{domain}</h1>", "<p>We build software.</p>"]
+        if roll > 0.4:
+            parts.append('<a href="/pricing">Pricing</a>')
+        if roll > 0.6:
+            parts.append('<a href="/careers">Careers</a>')
+        if roll > 0.5:
+            parts.append("<p>Powered by artificial intelligence.</p>")
+        self.send_body(200, "<html><body>" + "".join(parts) + "</body></html>")
+
+class OpenAIHandler(_QuietHandler):
+    """Minimal POST /v1/chat/completions compatible with the openai client"""
+
+    latency_ms = 300
+    malformed_rate = 0.02
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        prompt = "".join(m.get("content", "") for m in request.get("messages", []))
+        time.sleep(self.latency_ms / 1000)
+
+        roll = _bucket(prompt)
+        if roll < self.malformed_rate:
+            content = "Sure! This lead looks promising."
+        else:
+            score = round(roll, 2)
+            category = "Hot" if score > 0.7 else "Warm" if score > 0.4 else "Cold"
+            action = {"Hot": "notify_sales", "Warm": "review", "Cold": "ignore"}[category]
+            content = json.dumps({
+                "score": score, "category": category, "action": action,
+                "reason": "Synthetic benchmark score"
+            })
+
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        body = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+        self.send_body(200, json.dumps(body), "application/json")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark fakes in the foreground")
+    parser.add_argument("--site-port", type=int, default=8081)
+    parser.add_argument("--llm-port", type=int, default=8082)
+    parser.add_argument("--site-latency-ms", type=float, default=20)
+    parser.add_argument("--site-failure-rate", type=float, default=0.1)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-malformed-rate", type=float, default=0.02)
+    args = parser.parse_args()
+
+    site = FakeServer(SiteHandler, args.site_port, latency_ms=args.site_latency_ms,
+                      failure_rate=args.site_failure_rate).start()
+    llm = FakeServer(OpenAIHandler, args.llm_port, latency_ms=args.llm_latency_ms,
+                     malformed_rate=args.llm_malformed_rate).start()
+
+    print(f"ENRICH_URL_TEMPLATE={site.url}/{{domain}}")
+    print(f"OPENAI_BASE_URL={llm.url}/v1")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        site.stop()
+        llm.stop()
+
+if __name__ == "__main__":
+    main()
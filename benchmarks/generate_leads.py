@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Seeded synthetic lead generator for benchmarks.
+Writes a leads.csv with the same columns as data/leads.csv.
+"""
+
+import argparse
+import csv
+import random
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+FIRST_NAMES = ["Rahul", "Anita", "John", "Priya", "Maria", "Wei", "Omar", "Sara", "Luca", "Aiko"]
+LAST_NAMES = ["Sharma", "Patel", "Smith", "Garcia", "Chen", "Khan", "Rossi", "Tanaka", "Muller", "Silva"]
+PUBLIC_DOMAINS = ["gmail.com", "yahoo.com", "outlook.com", "hotmail.com", "icloud.com"]
+COMPANY_WORDS = ["Fin", "Tech", "Data", "Cloud", "Health", "Retail", "Logi", "Edu", "Secure", "Green"]
+COMPANY_SUFFIXES = ["X", "IO", "Labs", "Works", "AI", "Systems", "Hub", "Soft"]
+
+MESSAGES = [
+    "Looking for AI automation for sales ops",
+    "Need help with lead scoring and analytics",
+    "Just exploring",
+    "",
+    "Can you send pricing for a team of {n} and book a demo next week?",
+    "We are evaluating vendors to automate onboarding for {n} sales reps",
+    "Interested in an enterprise contract, budget approved for Q{q}",
+    "Hi, what does your product do?",
+    "BUY CHEAP SEO BACKLINKS NOW!!! visit our site for {n}% discount",
+]
+
+LONG_MESSAGE_TAIL = (
+    "\n\n-- \nBest regards,\n{name}\nHead of Operations\n"
+    "> On Mon, someone wrote:\n> previous thread quoted here " * 5
+)
+
+def make_company(rng):
+    return rng.choice(COMPANY_WORDS) + rng.choice(COMPANY_WORDS) + rng.choice(COMPANY_SUFFIXES)
+
+def generate(rows, seed=42, public_ratio=0.3, long_ratio=0.02):
+    """Yield (name, email, company, message) rows deterministically for a seed"""
+    rng = random.Random(seed)
+    # A bounded pool of companies so domains repeat, like real inbound traffic
+    companies = [make_company(rng) for _ in range(max(10, rows // 20))]
+
+    for i in range(rows):
+        first = rng.choice(FIRST_NAMES)
+        name = f"{first} {rng.choice(LAST_NAMES)}"
+        company = rng.choice(companies)
+
+        if rng.random() < public_ratio:
+            domain = rng.choice(PUBLIC_DOMAINS)
+            company = "Personal"
+        else:
+            domain = company.lower() + ".example"
+
+        message = rng.choice(MESSAGES).format(n=rng.randint(2, 500), q=rng.randint(1, 4))
+        if rng.random() < long_ratio:
+            message += LONG_MESSAGE_TAIL.format(name=name)
+
+        yield name, f"{first.lower()}.{i}@{domain}", company, message
+
+def write_csv(path, rows, seed=42):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "email", "company", "message"])
+        writer.writerows(generate(rows, seed))
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic leads.csv")
+    parser.add_argument("--size", default="1k", help="1k, 100k, 1m or an explicit row count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="leads_synthetic.csv")
+    args = parser.parse_args()
+
+    rows = SIZES.get(args.size.lower()) or int(args.size)
+    write_csv(args.out, rows, args.seed)
+    print(f"Wrote {rows} leads to {args.out}")
+
+if __name__ == "__main__":
+    main()
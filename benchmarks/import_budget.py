@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check for the modules on the startup path of CLI
+invocations, MCP server spawns and API workers.
+
+Each module is imported in a fresh interpreter with -X importtime and the
+cumulative time is compared with its budget. Exits non-zero when any module
+is over budget, so it can gate CI.
+
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --scale 2   # slower CI machines
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> budget in milliseconds (cumulative, including everything it imports).
+# Generous enough to absorb machine noise, tight enough to catch openai, requests,
+# pandas or dotenv creeping back onto the import path (each costs 100ms+).
+BUDGETS = {
+    "utils.db": 50,
+    "utils.enrichment": 60,
+    "utils.ai": 60,
+    "utils.dedup": 60,
+    "scripts.ingest_leads": 80,
+    "scripts.score_leads": 100,
+    "mcp_lead_query.server": 60,
+}
+
+def import_time_ms(module):
+    """Cumulative import time of module in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=ROOT
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    for line in reversed(result.stderr.splitlines()):
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"No import timing found for {module}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if startup imports exceed their budget")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget")
+    args = parser.parse_args()
+
+    failed = False
+    for module, budget in BUDGETS.items():
+        budget *= args.scale
+        try:
+            elapsed = import_time_ms(module)
+        except RuntimeError as e:
+            print(f"ERROR {module}: {e}")
+            failed = True
+            continue
+
+        status = "ok  " if elapsed <= budget else "SLOW"
+        failed = failed or elapsed > budget
+        print(f"{status} {module:<24} {elapsed:7.1f} ms (budget {budget:.0f} ms)")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
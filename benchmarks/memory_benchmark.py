@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the per-lead working sets of the batch stages and MCP.
+
+Each working set is built twice under tracemalloc, once with the row shape
+the code used before (dicts) and once with the __slots__ records from
+utils/records.py, and reported as bytes per row. The last check reads the
+leads table with fetchall() and with conn.stream() and reports the peak.
+
+    python -m benchmarks.memory_benchmark --size 100k
+"""
+
+import argparse
+import contextlib
+import csv
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.generate_leads import SIZES, write_csv
+
+def traced(build):
+    """(result, retained bytes, peak bytes, seconds) of build()"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak, elapsed
+
+def compare(name, rows, before, after):
+    _, before_bytes, _, before_seconds = traced(before)
+    _, after_bytes, _, after_seconds = traced(after)
+    return {
+        "working_set": name,
+        "rows": rows,
+        "before_bytes_per_row": round(before_bytes / rows, 1),
+        "after_bytes_per_row": round(after_bytes / rows, 1),
+        "reduction_pct": round(100 * (1 - after_bytes / before_bytes), 1),
+        "before_seconds": round(before_seconds, 3),
+        "after_seconds": round(after_seconds, 3),
+    }
+
+def ingest_rows(path, rows):
+    from scripts.ingest_leads import read_leads
+
+    def dict_rows():
+        with open(path, newline="") as f:
+            return list(csv.DictReader(f))
+
+    return compare("ingest rows", rows, dict_rows, lambda: list(read_leads(path)))
+
+def score_working_set(rows):
+    from utils.records import ScoreRecord
+
+    # score_lead-shaped results, as the score stage used to keep them for the whole run
+    reasons = [f"Reason {i % 50}" for i in range(50)]
+
+    def result(i):
+        return {
+            "score": 0.5 + (i % 50) / 100, "category": "Warm", "action": "review",
+            "reason": reasons[i % 50], "scorer_version": "gpt-3.5-turbo/p1-0a1b2c3d",
+            "usage": {"prompt_tokens": 180, "completion_tokens": 40,
+                      "latency_ms": 300.0 + i % 7, "cost_usd": 0.00015},
+        }
+
+    return compare(
+        "score run_scores", rows,
+        lambda: {i: result(i) for i in range(rows)},
+        lambda: {i: ScoreRecord.from_result(result(i)) for i in range(rows)}
+    )
+
+def mcp_rows(rows):
+    from utils.records import record_type
+
+    columns = ("name", "email", "company", "category", "score", "created_at")
+    source = [(f"Lead {i}", f"lead.{i}@example.com", "Acme", "Warm", 0.5, "2025-01-01 10:00:00")
+              for i in range(rows)]
+    make = record_type(columns)
+    return compare(
+        "mcp result rows", rows,
+        lambda: [dict(zip(columns, row)) for row in source],
+        lambda: [make(*row) for row in source]
+    )
+
+def read_leads_table(workdir, path, rows):
+    import utils.db
+    utils.db.DB_PATH = os.path.join(workdir, "memory.db")
+
+    from scripts.init_db import init_db
+    from scripts import ingest_leads
+    init_db()
+    ingest_leads.LEADS_FILE = path
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        ingest_leads.ingest_leads()
+
+    sql = "SELECT id, name, email, company, message FROM leads ORDER BY id"
+
+    def scan(rows_of):
+        conn = utils.db.get_connection()
+        try:
+            emails = 0
+            for _, _, email, _, _ in rows_of(conn):
+                emails += len(email)
+            return emails
+        finally:
+            conn.close()
+
+    _, _, fetchall_peak, fetchall_seconds = traced(lambda: scan(lambda c: c.execute(sql).fetchall()))
+    _, _, stream_peak, stream_seconds = traced(lambda: scan(lambda c: c.stream(sql)))
+    return {
+        "working_set": "leads scan (peak)",
+        "rows": rows,
+        "before_bytes_per_row": round(fetchall_peak / rows, 1),
+        "after_bytes_per_row": round(stream_peak / rows, 1),
+        "reduction_pct": round(100 * (1 - stream_peak / fetchall_peak), 1),
+        "before_seconds": round(fetchall_seconds, 3),
+        "after_seconds": round(stream_seconds, 3),
+    }
+
+def print_report(results):
+    header = f"{'working set':<20} {'rows':>9} {'before B/row':>13} {'after B/row':>12} {'saved':>7} {'before s':>9} {'after s':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['working_set']:<20} {r['rows']:>9} {r['before_bytes_per_row']:>13} "
+              f"{r['after_bytes_per_row']:>12} {r['reduction_pct']:>6}% "
+              f"{r['before_seconds']:>9} {r['after_seconds']:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes per lead before and after compact records")
+    parser.add_argument("--size", default="100k", help="1k, 100k, 1m or an explicit row count")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rows = SIZES.get(args.size.lower()) or int(args.size)
+    workdir = tempfile.mkdtemp(prefix="lead-memory-")
+    # Always a throwaway SQLite file, even if DATABASE_URL points at a real database
+    os.environ.pop("DATABASE_URL", None)
+    path = write_csv(os.path.join(workdir, "leads.csv"), rows, args.seed)
+
+    print_report([
+        ingest_rows(path, rows),
+        score_working_set(rows),
+        mcp_rows(rows),
+        read_leads_table(workdir, path, rows),
+    ])
+
+if __name__ == "__main__":
+    main()
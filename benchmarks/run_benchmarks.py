@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark for the lead pipeline.
+
+Runs every stage against a throwaway SQLite database, a seeded synthetic
+leads.csv, a local website stand-in and a fake OpenAI endpoint, then reports
+rows/sec and p50/p95/p99 latency per stage. Nothing leaves the machine.
+
+    python -m benchmarks.run_benchmarks --size 1k
+    python -m benchmarks.run_benchmarks --size 100k --site-latency-ms 1 --llm-latency-ms 5
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.generate_leads import SIZES, write_csv
+from benchmarks.fakes import FakeServer, SiteHandler, OpenAIHandler
+
+STAGES = ["ingest", "enrich", "score", "analytics", "actions", "submit_lead", "mcp"]
+
+MCP_QUESTIONS = [
+    "How many leads do we have?",
+    "Show me all hot leads",
+    "How many warm leads today?",
+    "Any leads from FinTechX?",
+    "Which leads mention AI?",
+]
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+class StageStats:
+    """
+    Wall time, row count and per-row (or per-batch) latency samples for one stage.
+    A stage that makes several passes over the same rows (analytics) counts them
+    once and reports the throughput of one pass.
+    """
+
+    def __init__(self, name, passes=1):
+        self.name = name
+        self.passes = passes
+        self.rows = 0
+        self.elapsed = 0.0
+        self.samples = []
+
+    def timed(self, fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.samples.append(time.perf_counter() - start)
+        return wrapper
+
+    def timed_iter(self, iterable):
+        """Yield items, recording how long the consumer spends on each one"""
+        for item in iterable:
+            start = time.perf_counter()
+            yield item
+            self.samples.append(time.perf_counter() - start)
+
+    def timed_batch_run(self, batch_run_class):
+        """BatchRun subclass recording the time from one lead's done() to the next"""
+        samples = self.samples
+
+        class TimedBatchRun(batch_run_class):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.mark = time.perf_counter()
+
+            def done(self, lead_id):
+                super().done(lead_id)
+                now = time.perf_counter()
+                samples.append(now - self.mark)
+                self.mark = now
+
+        return TimedBatchRun
+
+    def summary(self):
+        return {
+            "stage": self.name,
+            "rows": self.rows,
+            "seconds": round(self.elapsed, 3),
+            "rows_per_sec": round(self.rows * self.passes / self.elapsed, 1) if self.elapsed else 0.0,
+            "passes": self.passes,
+            "calls": len(self.samples),
+            "p50_ms": round(percentile(self.samples, 50) * 1000, 2),
+            "p95_ms": round(percentile(self.samples, 95) * 1000, 2),
+            "p99_ms": round(percentile(self.samples, 99) * 1000, 2),
+        }
+
+@contextlib.contextmanager
+def measure(stats):
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield stats
+    stats.elapsed = time.perf_counter() - start
+
+def count(table):
+    from utils.db import get_connection
+    conn = get_connection()
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+def setup_database(path):
+    import utils.db
+    utils.db.DB_PATH = path
+
+    from scripts.init_db import init_db
+    init_db()
+
+def run(args):
+    results = []
+    workdir = tempfile.mkdtemp(prefix="lead-bench-")
+    rows = SIZES.get(args.size.lower()) or int(args.size)
+
+    site = FakeServer(SiteHandler, latency_ms=args.site_latency_ms,
+                      failure_rate=args.site_failure_rate).start()
+    llm = FakeServer(OpenAIHandler, latency_ms=args.llm_latency_ms,
+                     malformed_rate=args.llm_malformed_rate).start()
+
+    # Must be set before the pipeline modules read them at import time
+    os.environ["ENRICH_URL_TEMPLATE"] = f"{site.url}/{{domain}}"
+    os.environ["OPENAI_BASE_URL"] = f"{llm.url}/v1"
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["CHECKPOINT_ROWS"] = str(args.checkpoint_rows)
+
+    # Always a throwaway SQLite file, even if DATABASE_URL points at a real database
+    os.environ.pop("DATABASE_URL", None)
+    setup_database(os.path.join(workdir, "bench.db"))
+    csv_path = write_csv(os.path.join(workdir, "leads.csv"), rows, args.seed)
+
+    stages = args.stages.split(",") if args.stages else STAGES
+
+    if "ingest" in stages:
+        from scripts import ingest_leads
+        ingest_leads.LEADS_FILE = csv_path
+        stats = StageStats("ingest")
+        # One sample per INSERT_BATCH_ROWS batch: validate, insert, index, commit
+        batched = ingest_leads.batched
+        ingest_leads.batched = lambda rows, size: stats.timed_iter(batched(rows, size))
+        with measure(stats):
+            ingest_leads.ingest_leads()
+        stats.rows = count("leads")
+        results.append(stats.summary())
+
+    if "enrich" in stages:
+        from scripts import enrich_leads
+        stats = StageStats("enrich")
+        # One sample per lead, whether it was fetched, copied or inherited
+        enrich_leads.BatchRun = stats.timed_batch_run(enrich_leads.BatchRun)
+        with measure(stats):
+            enrich_leads.enrich_leads(resume=False)
+        stats.rows = count("lead_enrichment")
+        results.append(stats.summary())
+
+    if "score" in stages:
+        from scripts import score_leads
+        stats = StageStats("score")
+        # One sample per lead, including pre-scored and inherited ones
+        score_leads.BatchRun = stats.timed_batch_run(score_leads.BatchRun)
+        with measure(stats):
+            score_leads.score_all_leads(resume=False)
+        stats.rows = count("lead_scores")
+        results.append(stats.summary())
+
+    if "analytics" in stages:
+        from scripts import analytics
+        stats = StageStats("analytics", passes=args.repeat)
+        generate = stats.timed(analytics.generate_daily_metrics)
+        with measure(stats):
+            for _ in range(args.repeat):
+                generate()
+        stats.rows = count("lead_scores")
+        results.append(stats.summary())
+
+    if "actions" in stages:
+        from scripts import actions
+        stats = StageStats("actions")
+        # One sample per scored lead read from the stream
+        connect = actions.get_connection
+
+        def timed_connection():
+            conn = connect()
+            stream = conn.stream
+            conn.stream = lambda *args, **kwargs: stats.timed_iter(stream(*args, **kwargs))
+            return conn
+
+        actions.get_connection = timed_connection
+        with measure(stats):
+            actions.run_actions()
+        stats.rows = count("lead_scores")
+        results.append(stats.summary())
+
+    if "submit_lead" in stages:
+        import api
+        from benchmarks.generate_leads import generate
+        stats = StageStats("submit_lead")
+        submit = stats.timed(api.submit_lead)
+        with measure(stats):
+            for i, (name, email, company, message) in enumerate(
+                    generate(args.requests, seed=args.seed + 1)):
+                lead = api.LeadSubmission(
+                    name=name, email=f"api.{i}.{email}", company=company, message=message
+                )
+                try:
+                    submit(lead)
+                except api.HTTPException:
+                    pass
+        stats.rows = len(stats.samples)
+        results.append(stats.summary())
+
+    if "mcp" in stages:
+        from mcp_lead_query.mcp_server import MCPLeadQueryServer
+        server = MCPLeadQueryServer()
+        stats = StageStats("mcp")
+        handle = stats.timed(server.handle_request)
+        with measure(stats):
+            for _ in range(args.repeat):
+                for question in MCP_QUESTIONS:
+                    handle({"method": "tools/call",
+                            "params": {"name": "query_leads", "arguments": {"question": question}}})
+                handle({"method": "tools/call", "params": {"name": "get_lead_stats", "arguments": {}}})
+        stats.rows = len(stats.samples)
+        results.append(stats.summary())
+
+    site.stop()
+    llm.stop()
+    return results
+
+def print_report(results):
+    header = f"{'stage':<12} {'rows':>9} {'sec':>9} {'rows/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['stage']:<12} {r['rows']:>9} {r['seconds']:>9} {r['rows_per_sec']:>10} "
+              f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lead pipeline offline")
+    parser.add_argument("--size", default="1k", help="1k, 100k, 1m or an explicit row count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--stages", help=f"Comma-separated subset of: {','.join(STAGES)}")
+    parser.add_argument("--repeat", type=int, default=20, help="Repetitions for analytics and MCP queries")
+    parser.add_argument("--requests", type=int, default=200, help="Number of /submit-lead calls")
+    parser.add_argument("--checkpoint-rows", type=int, default=500)
+    parser.add_argument("--site-latency-ms", type=float, default=20)
+    parser.add_argument("--site-failure-rate", type=float, default=0.1)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-malformed-rate", type=float, default=0.02)
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,43 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
+
+const METRICS_STREAM_URL = 'http://localhost:8000/metrics/stream'
 
 const AnalyticsDashboard = () => {
     const [metrics, setMetrics] = useState(null)
     const [loading, setLoading] = useState(true)
     const [error, setError] = useState(null)
+    const [live, setLive] = useState(false)
+    const sourceRef = useRef(null)
 
     useEffect(() => {
-        fetchMetrics()
+        connect()
+        return () => sourceRef.current?.close()
     }, [])
 
-    const fetchMetrics = async () => {
+    // The API pushes the current metrics on connect and again on every change;
+    // EventSource reconnects on its own after a dropped connection
+    const connect = () => {
+        sourceRef.current?.close()
         setLoading(true)
         setError(null)
 
-        try {
-            const response = await fetch('http://localhost:8000/metrics')
+        const source = new EventSource(METRICS_STREAM_URL)
+        sourceRef.current = source
 
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`)
-            }
+        source.onopen = () => setLive(true)
 
-            const data = await response.json()
-            setMetrics(data)
-        } catch (err) {
-            setError(err.message)
-        } finally {
+        source.addEventListener('metrics', (event) => {
+            setMetrics(JSON.parse(event.data))
             setLoading(false)
+            setError(null)
+        })
+
+        source.onerror = () => {
+            setLive(false)
+            if (source.readyState === EventSource.CLOSED) {
+                setError('Lost connection to the metrics stream')
+                setLoading(false)
+            }
         }
     }
 
@@ -49,7 +61,7 @@ const AnalyticsDashboard = () => {
                 <div className="error-message">
                     <h3>Error Loading Metrics</h3>
                     <p>{error}</p>
-                    <button onClick={fetchMetrics} className="retry-btn">
+                    <button onClick={connect} className="retry-btn">
                         Retry
                     </button>
                 </div>
@@ -61,9 +73,9 @@ const AnalyticsDashboard = () => {
         <div className="analytics-dashboard">
             <div className="dashboard-header">
                 <h2>Analytics Dashboard</h2>
-                <button onClick={fetchMetrics} className="refresh-btn">
-                    Refresh
-                </button>
+                <span className={`live-indicator ${live ? 'connected' : 'reconnecting'}`}>
+                    {live ? 'Live' : 'Reconnecting...'}
+                </span>
             </div>
 
             <div className="metrics-grid">
@@ -4,11 +4,7 @@ CLI interface for the MCP Lead Query Agent
 Run this to interactively ask questions about your leads
 """
 
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-from server import LeadQueryAgent
+from mcp_lead_query.server import LeadQueryAgent
 
 def main():
     """Interactive CLI for lead queries"""
@@ -3,13 +3,7 @@
 Demo script showing how to use the MCP Lead Query CLI
 """
 
-import sys
-import os
-
-# Add current directory to path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-from mcp_cli_test import MCPTestCLI
+from mcp_lead_query.mcp_cli_test import MCPTestCLI
 
 def main():
     """Demo the MCP CLI usage"""
@@ -47,7 +41,7 @@ def main():
         print(f"   • {question}")
     
     print("\n🚀 Start the interactive CLI:")
-    print("   python3 mcp-lead-query/mcp_cli_test.py")
+    print("   python -m mcp_lead_query.mcp_cli_test")
     
     print("\n💡 In the CLI, you can type:")
     print("   🎯 Command: How many hot leads?")
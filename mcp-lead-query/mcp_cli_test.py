@@ -5,13 +5,9 @@ Direct integration without subprocess complexity
 """
 
 import sys
-import os
 import json
 
-# Add current directory to path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-from mcp_server import MCPLeadQueryServer
+from mcp_lead_query.mcp_server import MCPLeadQueryServer
 
 class MCPTestCLI:
     """Simple CLI to test MCP functionality"""
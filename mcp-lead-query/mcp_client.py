@@ -14,8 +14,8 @@ from typing import Dict, Any, Optional
 class MCPClient:
     """Client to test MCP Lead Query Server"""
     
-    def __init__(self, server_script: str = "mcp_server.py"):
-        self.server_script = server_script
+    def __init__(self, server_module: str = "mcp_lead_query.mcp_server"):
+        self.server_module = server_module
         self.process = None
         self.request_id = 1
         
@@ -23,7 +23,7 @@ class MCPClient:
         """Start the MCP server process"""
         try:
             self.process = subprocess.Popen(
-                [sys.executable, self.server_script],
+                [sys.executable, "-m", self.server_module],
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
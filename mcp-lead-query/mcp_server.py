@@ -7,7 +7,8 @@ Implements Model Context Protocol for natural language lead queries
 import json
 import sys
 from typing import Any, Dict, List
-from server import LeadQueryAgent
+from mcp_lead_query.server import LeadQueryAgent
+from utils import metrics
 
 class MCPLeadQueryServer:
     """MCP Server that handles lead query requests"""
@@ -23,7 +24,7 @@ class MCPLeadQueryServer:
                     "properties": {
                         "question": {
                             "type": "string",
-                            "description": "Natural language question about leads (e.g., 'How many warm leads today?', 'Show me hot leads from Microsoft')"
+                            "description": "Natural language question about leads (e.g., 'How many warm leads today?', 'Show me hot leads from Microsoft', 'Average score of hot leads by company last month')"
                         }
                     },
                     "required": ["question"]
@@ -42,6 +43,12 @@ class MCPLeadQueryServer:
     
     def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """Handle incoming MCP requests"""
+        method = request.get("method")
+        tool = (request.get("params") or {}).get("name", "")
+        with metrics.track("mcp_request", method=method, tool=tool):
+            return self._dispatch(request)
+    
+    def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
         method = request.get("method")
         params = request.get("params", {})
         
@@ -71,9 +78,11 @@ class MCPLeadQueryServer:
                 stats_query = "SELECT COUNT(*) as total FROM leads"
                 total_results = self.agent.execute_query(stats_query)
                 
+                # Latest score per lead, so a re-scored lead counts once
                 category_query = """
                 SELECT ls.category, COUNT(*) as count 
-                FROM lead_scores ls 
+                FROM (SELECT lead_id, MAX(id) AS id FROM lead_scores GROUP BY lead_id) latest
+                JOIN lead_scores ls ON ls.id = latest.id
                 GROUP BY ls.category
                 """
                 category_results = self.agent.execute_query(category_query)
@@ -175,6 +184,7 @@ def main():
                 
     except KeyboardInterrupt:
         print("Server shutting down...", file=sys.stderr)
+        print(json.dumps(metrics.summarize()), file=sys.stderr)
     except Exception as e:
         print(f"Server error: {e}", file=sys.stderr)
 
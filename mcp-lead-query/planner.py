@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""
+Query planner for the Lead Query Agent
+Parses a business question with a small phrase grammar (filters, date ranges,
+group-by, aggregates, top-N) and compiles it to one parameterized SQL query
+"""
+
+import calendar
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, List, Optional
+
+from utils.domains import registrable_domain
+from utils.validators import normalize_email
+
+# Rows returned when the question does not ask for a number of them
+DEFAULT_LIMIT = 50
+
+TOKEN_PATTERN = re.compile(
+    r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+|\d{4}-\d{2}-\d{2}|\d+(?:\.\d+)?|@?[\w&'-]+(?:\.[\w-]+)*|[<>]=?"
+)
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "twenty": 20, "fifty": 50, "hundred": 100,
+}
+UNITS = {
+    "day": "day", "days": "day", "week": "week", "weeks": "week",
+    "month": "month", "months": "month", "year": "year", "years": "year",
+}
+MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+CATEGORIES = {"hot": "Hot", "warm": "Warm", "cold": "Cold"}
+
+# Latest score per lead through idx_lead_scores_lead, so re-scored leads count once
+JOINS = {
+    "scores": "LEFT JOIN lead_scores ls ON ls.id = (SELECT MAX(id) FROM lead_scores WHERE lead_id = l.id)",
+    "enrichment": "LEFT JOIN lead_enrichment le ON le.lead_id = l.id",
+    "companies": "LEFT JOIN lead_companies lc ON lc.lead_id = l.id\n"
+                 "        LEFT JOIN companies co ON co.id = lc.company_id",
+}
+JOIN_ORDER = ("scores", "enrichment", "companies")
+
+# Group-by dimension -> (SQL expression, joins it needs)
+DIMENSIONS = {
+    "company": ("COALESCE(co.name, l.company)", ("companies",)),
+    "category": ("ls.category", ("scores",)),
+    "domain": ("le.domain", ("enrichment",)),
+    "scorer": ("ls.scorer", ("scores",)),
+    "action": ("ls.action", ("scores",)),
+    "day": ("DATE(l.created_at)", ()),
+    "month": ("SUBSTR(CAST(l.created_at AS TEXT), 1, 7)", ()),
+}
+DIMENSION_WORDS = {
+    "company": "company", "companies": "company", "category": "category", "categories": "category",
+    "domain": "domain", "domains": "domain", "scorer": "scorer", "scorers": "scorer", "model": "scorer",
+    "action": "action", "actions": "action", "day": "day", "days": "day", "date": "day",
+    "daily": "day", "month": "month", "months": "month", "monthly": "month",
+}
+TIME_DIMENSIONS = {"day", "month"}
+
+# Dimensions grouped on more than the value they display: resolved companies
+# that share a name stay apart, unresolved leads group by their company text
+GROUP_KEYS = {"company": ("co.id", "COALESCE(co.name, l.company)")}
+
+# Aggregate -> (SQL expression, joins it needs); the key is the result column
+MEASURES = {
+    "count": ("COUNT(*)", ()),
+    "avg_score": ("AVG(ls.score)", ("scores",)),
+    "max_score": ("MAX(ls.score)", ("scores",)),
+    "min_score": ("MIN(ls.score)", ("scores",)),
+    "total_cost_usd": ("SUM(ls.cost_usd)", ("scores",)),
+}
+
+LIST_COLUMNS = "l.name, l.email, l.company, ls.category, ls.score, l.created_at"
+
+# Enrichment signals a question can filter on
+FLAGS = {"ai": "le.mentions_ai", "pricing": "le.has_pricing", "hiring": "le.has_careers", "careers": "le.has_careers"}
+
+COMPARATORS = {
+    ("above",): ">", ("over",): ">", ("greater", "than"): ">", ("more", "than"): ">",
+    ("higher", "than"): ">", (">",): ">", (">=",): ">=", ("at", "least"): ">=",
+    ("below",): "<", ("under",): "<", ("less", "than"): "<", ("lower", "than"): "<",
+    ("<",): "<", ("<=",): "<=", ("at", "most"): "<=",
+}
+
+# Words that end a company name ("leads from Acme Corp by category")
+STOP_WORDS = {
+    "by", "per", "in", "on", "since", "before", "after", "between", "last", "past", "this",
+    "today", "yesterday", "with", "without", "that", "who", "which", "and", "or", "where",
+    "sorted", "ordered", "order", "top", "score", "scored", "scores", "above", "below", "over",
+    "under", "grouped", "for", "each", "leads", "lead", "mentioning", "mention", "mentions",
+}
+# Function words never start or continue a company name ("from the AI team at Acme")
+FUNCTION_WORDS = {
+    "the", "a", "an", "at", "from", "of", "to", "is", "are", "was", "were", "my", "our", "their",
+    "its", "any", "all", "some", "whose", "whom", "team",
+}
+
+def utc_today() -> date:
+    """Today in UTC, the clock CURRENT_TIMESTAMP stamps created_at with"""
+    return datetime.now(timezone.utc).date()
+
+def shift_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+def parse_number(token: Optional[str]) -> Optional[float]:
+    if token in NUMBER_WORDS:
+        return NUMBER_WORDS[token]
+    if token and re.fullmatch(r"\d+(?:\.\d+)?", token):
+        return float(token)
+    return None
+
+def is_domain(token: Optional[str]) -> bool:
+    """acme.com or @acme.co.uk, not a number or a dotted abbreviation"""
+    return bool(token) and re.fullmatch(r"@?[\w-]+(?:\.[\w-]+)*\.[a-z]{2,63}", token) is not None
+
+def is_email(token: Optional[str]) -> bool:
+    return bool(token) and "@" in token[1:] and normalize_email(token) is not None
+
+def parse_date(token: Optional[str]) -> Optional[date]:
+    try:
+        return date.fromisoformat(token) if token else None
+    except ValueError:
+        return None
+
+class QueryPlan:
+    """One compiled question: SQL, its parameters and the shape of the result"""
+
+    def __init__(self, sql: str, params: tuple, kind: str, understood: bool):
+        self.sql = sql
+        self.params = params
+        self.kind = kind  # "list", "aggregate" or "grouped"
+        self.understood = understood
+
+class QueryPlanner:
+    """Recognizes phrases left to right; words no rule matches ("show", "me", "leads") are skipped"""
+
+    def __init__(self, question: str, resolve_company: Optional[Callable[[str], Optional[int]]] = None,
+                 today: Optional[date] = None):
+        self.tokens = TOKEN_PATTERN.findall(question.lower())
+        self.resolve_company = resolve_company
+        self.today = today or utc_today()
+        self.filters = []      # (SQL condition, params, joins)
+        self.categories = []
+        self.start = None      # created_at range, end exclusive
+        self.end = None
+        self.dimensions = []
+        self.measures = []
+        self.sort_measure = None
+        self.descending = True
+        self.order_by_score = False
+        self.limit = None
+        self.understood = False
+        self.rules = (self._date_range, self._top_n, self._measure, self._group_by, self._category,
+                      self._score_filter, self._flag, self._company, self._email, self._domain)
+
+    def tok(self, i: int) -> Optional[str]:
+        return self.tokens[i] if 0 <= i < len(self.tokens) else None
+
+    def plan(self) -> QueryPlan:
+        i = 0
+        while i < len(self.tokens):
+            for rule in self.rules:
+                consumed = rule(i)
+                if consumed:
+                    self.understood = True
+                    i += consumed
+                    break
+            else:
+                i += 1
+        return self.compile()
+
+    # --- grammar rules: each returns the number of tokens it consumed ---
+
+    def _set_range(self, start: Optional[date], end: Optional[date]):
+        if start is not None:
+            self.start = start
+        if end is not None:
+            self.end = end
+
+    def _period(self, day: date, unit: str) -> date:
+        """Start of the calendar period containing day"""
+        if unit == "week":
+            return day - timedelta(days=day.weekday())
+        if unit == "month":
+            return day.replace(day=1)
+        if unit == "year":
+            return day.replace(month=1, day=1)
+        return day
+
+    def _step(self, day: date, unit: str, n: int) -> date:
+        if unit == "month":
+            return shift_months(day, n)
+        if unit == "year":
+            return shift_months(day, 12 * n)
+        return day + timedelta(days=n * (7 if unit == "week" else 1))
+
+    def _date_range(self, i: int) -> int:
+        t, t1, t2 = self.tok(i), self.tok(i + 1), self.tok(i + 2)
+        today, tomorrow = self.today, self.today + timedelta(days=1)
+
+        if t == "today":
+            self._set_range(today, tomorrow)
+            return 1
+        if t == "yesterday":
+            self._set_range(today - timedelta(days=1), today)
+            return 1
+        if t in ("this", "current") and t1 in UNITS:
+            self._set_range(self._period(today, UNITS[t1]), tomorrow)
+            return 2
+        if t in ("last", "past", "previous") and parse_number(t1) and t2 in UNITS:
+            # Rolling window: "last 30 days", "past 3 months"
+            self._set_range(self._step(tomorrow, UNITS[t2], -int(parse_number(t1))), tomorrow)
+            return 3
+        if t in ("last", "previous") and t1 in UNITS:
+            # The previous calendar period: "last month" in October is September
+            unit = UNITS[t1]
+            current = self._period(today, unit)
+            self._set_range(self._step(current, unit, -1), current)
+            return 2
+        if t == "past" and t1 in UNITS:
+            self._set_range(self._step(tomorrow, UNITS[t1], -1), tomorrow)
+            return 2
+        if t in ("since", "after", "from") and parse_date(t1):
+            self._set_range(parse_date(t1) + timedelta(days=1 if t == "after" else 0), None)
+            if t == "from" and t2 in ("to", "until") and parse_date(self.tok(i + 3)):
+                self._set_range(None, parse_date(self.tok(i + 3)) + timedelta(days=1))
+                return 4
+            return 2
+        if t in ("before", "until") and parse_date(t1):
+            self._set_range(None, parse_date(t1))
+            return 2
+        if t == "on" and parse_date(t1):
+            self._set_range(parse_date(t1), parse_date(t1) + timedelta(days=1))
+            return 2
+        if t == "between" and parse_date(t1) and t2 == "and" and parse_date(self.tok(i + 3)):
+            self._set_range(parse_date(t1), parse_date(self.tok(i + 3)) + timedelta(days=1))
+            return 4
+        if t == "in" and t1 in MONTHS:
+            year = int(t2) if t2 and re.fullmatch(r"\d{4}", t2) else None
+            if year is None:
+                # "in March" means the most recent March
+                year = today.year if MONTHS[t1] <= today.month else today.year - 1
+            start = date(year, MONTHS[t1], 1)
+            self._set_range(start, shift_months(start, 1))
+            return 3 if t2 and re.fullmatch(r"\d{4}", t2) else 2
+        if t == "in" and t1 and re.fullmatch(r"\d{4}", t1):
+            self._set_range(date(int(t1), 1, 1), date(int(t1) + 1, 1, 1))
+            return 2
+        return 0
+
+    def _top_n(self, i: int) -> int:
+        t, t1 = self.tok(i), self.tok(i + 1)
+        consumed = 0
+        if t == "most" and t1 == "recent":
+            t, t1, consumed = "latest", self.tok(i + 2), 1
+
+        if t in ("top", "best", "highest", "bottom", "worst", "lowest") and parse_number(t1):
+            self.limit = int(parse_number(t1))
+            self.descending = t in ("top", "best", "highest")
+            self.order_by_score = True
+            consumed += 2
+        elif t in ("latest", "newest", "recent", "last", "first", "show", "list") and parse_number(t1):
+            self.limit = int(parse_number(t1))
+            consumed += 2
+        elif t == "top" and t1 in DIMENSION_WORDS:
+            consumed += 1
+        else:
+            return 0
+
+        # "top 5 companies": the ranking is over a dimension, not leads
+        dimension = DIMENSION_WORDS.get(self.tok(i + consumed))
+        if dimension:
+            self._add_dimension(dimension)
+            self.order_by_score = False
+            consumed += 1
+        return consumed
+
+    def _measure_phrase(self, i: int):
+        """(measure, tokens) for an aggregate phrase at i, or (None, 0)"""
+        t, t1 = self.tok(i), self.tok(i + 1)
+        score = 2 if t1 in ("score", "scores") else 1
+        if t == "how" and t1 == "many":
+            return "count", 2
+        if t in ("count", "number") or (t == "most" and t1 != "recent") or t in ("fewest", "least"):
+            return "count", 2 if t1 == "of" else 1
+        if t in ("average", "avg", "mean"):
+            return "avg_score", score
+        if t in ("highest", "max", "maximum", "best") and score == 2:
+            return "max_score", 2
+        if t in ("lowest", "min", "minimum", "worst") and score == 2:
+            return "min_score", 2
+        if t in ("total", "sum") and t1 in ("cost", "spend", "llm"):
+            return "total_cost_usd", 3 if t1 == "llm" and self.tok(i + 2) in ("cost", "spend") else 2
+        if t in ("cost", "spend"):
+            return "total_cost_usd", 1
+        return None, 0
+
+    def _measure(self, i: int) -> int:
+        measure, consumed = self._measure_phrase(i)
+        if not measure:
+            return 0
+        if self.tok(i) in ("most", "fewest", "least"):
+            self.sort_measure = measure
+            self.descending = self.tok(i) == "most"
+        self._add_measure(measure)
+        return consumed
+
+    def _group_by(self, i: int) -> int:
+        t = self.tok(i)
+        consumed = 1
+        if t == "for" and self.tok(i + 1) == "each":
+            consumed = 2
+        elif t not in ("by", "per", "each", "which", "what"):
+            return 0
+
+        # "by average score" orders the groups instead of adding one
+        measure, measure_tokens = self._measure_phrase(i + consumed)
+        if measure and t == "by":
+            self._add_measure(measure)
+            self.sort_measure = measure
+            return consumed + measure_tokens
+
+        dimension = DIMENSION_WORDS.get(self.tok(i + consumed))
+        if not dimension:
+            return 0
+        self._add_dimension(dimension)
+        consumed += 1
+        # "by category and month"
+        while self.tok(i + consumed) == "and" and self.tok(i + consumed + 1) in DIMENSION_WORDS:
+            self._add_dimension(DIMENSION_WORDS[self.tok(i + consumed + 1)])
+            consumed += 2
+        return consumed
+
+    def _category(self, i: int) -> int:
+        category = CATEGORIES.get(self.tok(i))
+        if not category:
+            return 0
+        if category not in self.categories:
+            self.categories.append(category)
+        return 1
+
+    def _score_filter(self, i: int) -> int:
+        consumed = 1 if self.tok(i) in ("score", "scores", "scored", "scoring") else 0
+        for words, op in COMPARATORS.items():
+            if tuple(self.tokens[i + consumed:i + consumed + len(words)]) == words:
+                value = parse_number(self.tok(i + consumed + len(words)))
+                if value is None:
+                    return 0
+                # Scores are 0-1; "scored over 80" means 0.8
+                if value > 1:
+                    value /= 100
+                self.filters.append((f"ls.score {op} ?", (value,), ("scores",)))
+                return consumed + len(words) + 1
+        return 0
+
+    def _flag(self, i: int) -> int:
+        column = FLAGS.get(self.tok(i))
+        if not column:
+            return 0
+        self.filters.append((f"{column} = 1", (), ("enrichment",)))
+        return 1
+
+    def _company(self, i: int) -> int:
+        t = self.tok(i)
+        if t in ("company", "companies") and self.tok(i + 1) in ("named", "called"):
+            start = i + 2
+        elif t in ("from", "at"):
+            start = i + 1
+        else:
+            return 0
+
+        name, j = self._company_name(start)
+        if not name:
+            return 0
+        names = [name]
+        # "from acme and beta": leads from either company
+        while self.tok(j) in ("and", "or"):
+            name, end = self._company_name(j + 1)
+            if not name:
+                break
+            names.append(name)
+            j = end
+
+        conditions, params = [], []
+        for name in names:
+            company_id = self.resolve_company(name) if self.resolve_company else None
+            if company_id is not None:
+                conditions.append("l.id IN (SELECT lead_id FROM lead_companies WHERE company_id = ?)")
+                params.append(company_id)
+            else:
+                conditions.append("l.company LIKE ?")
+                params.append(f"%{name}%")
+        condition = conditions[0] if len(conditions) == 1 else f"({' OR '.join(conditions)})"
+        self.filters.append((condition, tuple(params), ()))
+        return j - i
+
+    def _company_name(self, start: int):
+        """(company name starting at start, index after it), or (None, start)"""
+        words = []
+        j = start
+        while self.tok(j) is not None:
+            word = self.tok(j)
+            if (word in STOP_WORDS or word in FUNCTION_WORDS or word in CATEGORIES or parse_date(word)
+                    or is_email(word) or self._date_starts(j)):
+                break
+            words.append(word)
+            j += 1
+        # "from acme.com" is a domain filter
+        if not words or (len(words) == 1 and is_domain(words[0])):
+            return None, start
+        return " ".join(words), j
+
+    def _date_starts(self, i: int) -> bool:
+        """Whether a date phrase starts at i (checked on a scratch planner so nothing is recorded)"""
+        scratch = QueryPlanner("", today=self.today)
+        scratch.tokens = self.tokens
+        return bool(scratch._date_range(i))
+
+    def _email(self, i: int) -> int:
+        """One lead by address, matched on its normalized form like the leads.email_key index"""
+        if not is_email(self.tok(i)):
+            return 0
+        self.filters.append(("l.email_key = ?", (normalize_email(self.tok(i)).email,), ()))
+        return 1
+
+    def _domain(self, i: int) -> int:
+        t = self.tok(i)
+        consumed = 1
+        if t == "domain" and self.tok(i + 1):
+            t, consumed = self.tok(i + 1), 2
+        if not is_domain(t):
+            return 0
+        domain = t.lstrip("@")
+        self.filters.append(("le.domain = ?", (registrable_domain(domain) or domain,), ("enrichment",)))
+        return consumed
+
+    def _add_dimension(self, dimension: str):
+        if dimension not in self.dimensions:
+            self.dimensions.append(dimension)
+
+    def _add_measure(self, measure: str):
+        if measure not in self.measures:
+            self.measures.append(measure)
+
+    # --- compilation ---
+
+    def compile(self) -> QueryPlan:
+        joins = set()
+        conditions = []
+        params: List = []
+
+        if self.categories:
+            conditions.append(f"ls.category IN ({', '.join('?' * len(self.categories))})")
+            params.extend(self.categories)
+            joins.add("scores")
+        # Half-open range on the raw column so idx_leads_created_at is used
+        if self.start is not None:
+            conditions.append("l.created_at >= ?")
+            params.append(self.start.isoformat())
+        if self.end is not None:
+            conditions.append("l.created_at < ?")
+            params.append(self.end.isoformat())
+        for condition, condition_params, condition_joins in self.filters:
+            conditions.append(condition)
+            params.extend(condition_params)
+            joins.update(condition_joins)
+
+        if self.dimensions:
+            kind = "grouped"
+            measures = self.measures or ["count"]
+            select = [f"{DIMENSIONS[d][0]} AS {d}" for d in self.dimensions]
+            group_exprs = [key for d in self.dimensions for key in GROUP_KEYS.get(d, (DIMENSIONS[d][0],))]
+            select += [f"{MEASURES[m][0]} AS {m}" for m in measures]
+            for d in self.dimensions:
+                joins.update(DIMENSIONS[d][1])
+            for m in measures:
+                joins.update(MEASURES[m][1])
+
+            direction = "DESC" if self.descending else "ASC"
+            if self.sort_measure or self.limit or not set(self.dimensions) <= TIME_DIMENSIONS:
+                order = [f"{self.sort_measure or measures[0]} {direction}", "1"]
+            else:
+                # Time series read newest first, so LIMIT keeps the latest periods
+                order = [f"{i} DESC" for i in range(1, len(self.dimensions) + 1)]
+            tail = f"\n        GROUP BY {', '.join(group_exprs)}\n        ORDER BY {', '.join(order)}\n        LIMIT ?"
+            params.append(self.limit or DEFAULT_LIMIT)
+        elif self.measures:
+            kind = "aggregate"
+            select = [f"{MEASURES[m][0]} AS {m}" for m in self.measures]
+            for m in self.measures:
+                joins.update(MEASURES[m][1])
+            tail = ""
+        else:
+            kind = "list"
+            select = [LIST_COLUMNS]
+            joins.add("scores")
+            if self.order_by_score:
+                conditions.append("ls.score IS NOT NULL")
+                order = f"ls.score {'DESC' if self.descending else 'ASC'}, l.created_at DESC"
+            else:
+                order = "l.created_at DESC"
+            tail = f"\n        ORDER BY {order}\n        LIMIT ?"
+            params.append(self.limit or DEFAULT_LIMIT)
+
+        sql = f"SELECT {', '.join(select)}\n        FROM leads l"
+        for name in JOIN_ORDER:
+            if name in joins:
+                sql += f"\n        {JOINS[name]}"
+        if conditions:
+            sql += "\n        WHERE " + "\n          AND ".join(conditions)
+        sql += tail
+        return QueryPlan(sql, tuple(params), kind, self.understood)
+
+def plan_question(question: str, resolve_company: Optional[Callable[[str], Optional[int]]] = None,
+                  today: Optional[date] = None) -> QueryPlan:
+    """Compile a business question into one parameterized query"""
+    return QueryPlanner(question, resolve_company, today).plan()
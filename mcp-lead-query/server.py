@@ -5,16 +5,14 @@ Converts natural language business questions into safe SQL queries
 """
 
 import json
-import sqlite3
 import re
 from datetime import datetime, date
 from typing import Dict, List, Optional, Tuple
-import sys
-import os
 
-# Add parent directory to path to access utils
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.db import get_connection
+from utils.db import get_connection, Error as DatabaseError
+from utils.records import iter_records
+from utils.companies import company_key
+from mcp_lead_query.planner import QueryPlan, plan_question
 
 class LeadQueryAgent:
     """MCP-powered agent that answers business questions about leads"""
@@ -42,96 +40,38 @@ class LeadQueryAgent:
         
         try:
             conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute(sql, params)
+            try:
+                cursor = conn.cursor()
+                cursor.execute(sql, params)
+                
+                # Compact records named after the columns; they read like dicts
+                return list(iter_records(cursor))
+            finally:
+                conn.close()
             
-            # Get column names
-            columns = [description[0] for description in cursor.description]
-            
-            # Fetch results and convert to list of dicts
-            rows = cursor.fetchall()
-            results = []
-            for row in rows:
-                results.append(dict(zip(columns, row)))
-            
-            conn.close()
-            return results
-            
-        except sqlite3.Error as e:
+        except DatabaseError as e:
             raise Exception(f"Database error: {str(e)}")
     
-    def translate_question(self, question: str) -> str:
-        """Convert natural language question to SQL query"""
-        question_lower = question.lower().strip()
-        
-        # Base query components
-        base_select = """
-        SELECT 
-            l.name,
-            l.email, 
-            l.company,
-            ls.category,
-            ls.score,
-            l.created_at
-        FROM leads l
-        LEFT JOIN lead_scores ls ON l.id = ls.lead_id
-        """
-        
-        conditions = []
-        
-        # Date filters
-        if 'today' in question_lower:
-            conditions.append("DATE(l.created_at) = DATE('now')")
-        elif 'yesterday' in question_lower:
-            conditions.append("DATE(l.created_at) = DATE('now', '-1 day')")
-        elif 'this week' in question_lower or 'last 7 days' in question_lower:
-            conditions.append("DATE(l.created_at) >= DATE('now', '-7 days')")
-        
-        # Category filters (case-sensitive)
-        if 'hot lead' in question_lower:
-            conditions.append("ls.category = 'Hot'")
-        elif 'warm lead' in question_lower:
-            conditions.append("ls.category = 'Warm'")
-        elif 'cold lead' in question_lower:
-            conditions.append("ls.category = 'Cold'")
-        
-        # Company filters
-        company_match = re.search(r'from\s+(\w+)', question_lower)
-        if company_match:
-            company = company_match.group(1)
-            conditions.append(f"l.company LIKE '%{company}%'")
-        
-        # AI-related filters
-        if 'ai' in question_lower and ('mention' in question_lower or 'companies' in question_lower):
-            base_select = """
-            SELECT 
-                l.name,
-                l.email, 
-                l.company,
-                ls.category,
-                ls.score,
-                l.created_at
-            FROM leads l
-            LEFT JOIN lead_scores ls ON l.id = ls.lead_id
-            LEFT JOIN lead_enrichment le ON l.id = le.lead_id
-            """
-            conditions.append("le.mentions_ai = 1")
-        
-        # Count queries
-        if question_lower.startswith('how many') or 'count' in question_lower:
-            base_select = "SELECT COUNT(*) as count FROM leads l LEFT JOIN lead_scores ls ON l.id = ls.lead_id"
-        
-        # Build final query
-        where_clause = ""
-        if conditions:
-            where_clause = " WHERE " + " AND ".join(conditions)
-        
-        order_clause = ""
-        if 'COUNT(*)' not in base_select:
-            order_clause = " ORDER BY l.created_at DESC LIMIT 50"
-        
-        sql = base_select + where_clause + order_clause
-        return sql
+    def resolve_company(self, company: str) -> Optional[int]:
+        """Company id a name resolves to in the company index, if any"""
+        key = company_key(company)
+        if not key:
+            return None
+        try:
+            rows = self.execute_query("SELECT company_id FROM company_aliases WHERE alias = ?", (f"name:{key}",))
+        except Exception:
+            # Databases created before the company index have no alias table
+            return None
+        return rows[0]["company_id"] if rows else None
+    
+    def plan_question(self, question: str) -> QueryPlan:
+        """Parse a question into one parameterized query (see planner.py)"""
+        return plan_question(question, self.resolve_company)
+    
+    def translate_question(self, question: str) -> Tuple[str, tuple]:
+        """Convert natural language question to a SQL query and its parameters"""
+        plan = self.plan_question(question)
+        return plan.sql, plan.params
     
     def format_response(self, results: List[Dict], question: str) -> str:
         """Format query results into structured response"""
@@ -139,10 +79,14 @@ class LeadQueryAgent:
             return "No matching leads found."
         
         # Handle count queries
-        if len(results) == 1 and 'count' in results[0]:
+        if len(results) == 1 and list(results[0].keys()) == ['count']:
             count = results[0]['count']
             return f"Found {count} matching leads."
         
+        # Aggregates and grouped aggregates: one column per key
+        if 'email' not in results[0]:
+            return self.format_table(results)
+        
         # Regular lead queries
         count = len(results)
         response_lines = [f"Found {count} matching leads:\n"]
@@ -157,18 +101,20 @@ class LeadQueryAgent:
             email = lead.get('email', 'N/A')
             company = lead.get('company', 'N/A')
             category = lead.get('category', 'N/A')
-            score = lead.get('score', 'N/A')
-            if score != 'N/A':
-                score = f"{score:.1f}"
+            score = lead.get('score')
+            score = f"{score:.1f}" if score is not None else 'N/A'
             
             # Format timestamp
             created_at = lead.get('created_at', '')
             if created_at:
                 try:
-                    dt = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+                    if isinstance(created_at, datetime):
+                        dt = created_at  # Postgres returns timestamps, SQLite returns text
+                    else:
+                        dt = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
                     time_str = dt.strftime('%Y-%m-%d %H:%M')
                 except:
-                    time_str = created_at[:16]  # Fallback
+                    time_str = str(created_at)[:16]  # Fallback
             else:
                 time_str = 'N/A'
             
@@ -176,6 +122,24 @@ class LeadQueryAgent:
         
         return "\n".join(response_lines)
     
+    def format_table(self, results: List[Dict]) -> str:
+        """Format aggregate rows: a single row as key: value lines, several as a table"""
+        def cell(value):
+            if value is None:
+                return 'N/A'
+            if isinstance(value, float):
+                return f"{value:.2f}"
+            return str(value)
+        
+        columns = list(results[0].keys())
+        if len(results) == 1:
+            return "\n".join(f"{column}: {cell(results[0][column])}" for column in columns)
+        
+        response_lines = [f"Found {len(results)} groups:\n", " | ".join(columns), "-" * 80]
+        for row in results:
+            response_lines.append(" | ".join(cell(row[column]) for column in columns))
+        return "\n".join(response_lines)
+    
     def answer_question(self, question: str) -> str:
         """Main method to answer business questions about leads"""
         try:
@@ -183,15 +147,17 @@ class LeadQueryAgent:
             if not question or not question.strip():
                 return "Please ask a specific question about leads."
             
-            # Translate to SQL
-            sql = self.translate_question(question)
+            # Translate to one parameterized query
+            plan = self.plan_question(question)
             
             # Execute query
-            results = self.execute_query(sql)
+            results = self.execute_query(plan.sql, plan.params)
             
             # Format response
             response = self.format_response(results, question)
             
+            if not plan.understood:
+                response = "I couldn't match any filters in that question; showing the most recent leads.\n\n" + response
             return response
             
         except ValueError as e:
@@ -210,6 +176,8 @@ def main():
     print("- 'Show me all hot leads'")
     print("- 'Any leads from Microsoft?'")
     print("- 'Which leads mention AI?'")
+    print("- 'Average score of hot leads by company last month'")
+    print("- 'Top 5 domains by lead count in the last 30 days'")
     print("\nType 'quit' to exit.\n")
     
     while True:
@@ -3,13 +3,7 @@
 Quick start script for MCP Lead Query CLI
 """
 
-import sys
-import os
-
-# Add current directory to path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-from mcp_cli_test import MCPTestCLI
+from mcp_lead_query.mcp_cli_test import MCPTestCLI
 
 def main():
     """Start the MCP CLI"""
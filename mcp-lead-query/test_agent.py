@@ -5,10 +5,8 @@ Demonstrates all capabilities with various question types
 """
 
 import sys
-import os
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from server import LeadQueryAgent
+from mcp_lead_query.server import LeadQueryAgent
 
 def run_tests():
     """Run comprehensive tests of the query agent"""
@@ -41,6 +39,12 @@ def run_tests():
         ("Leads from yesterday", "📅 Yesterday's Leads"),
         ("Leads from this week", "📅 This Week's Leads"),
         
+        # Aggregates, group-by, top-N and date ranges
+        ("Average score of hot leads by company last month", "📈 Avg Score by Company"),
+        ("Top 5 companies by average score", "🏆 Top Companies"),
+        ("Count leads by category and month", "📅 Category by Month"),
+        ("Top 3 hot leads in the last 30 days", "🔥 Best Recent Leads"),
+        
         # AI-related questions
         ("Which leads mention AI?", "🤖 AI-Interested Leads"),
         ("Show me leads with AI companies", "🤖 AI Companies"),
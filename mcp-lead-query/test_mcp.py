@@ -5,13 +5,8 @@ Tests the MCP server functionality without full client setup
 """
 
 import json
-import sys
-import os
 
-# Add current directory to path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-from mcp_server import MCPLeadQueryServer
+from mcp_lead_query.mcp_server import MCPLeadQueryServer
 
 def test_mcp_server():
     """Test the MCP server directly"""
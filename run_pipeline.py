@@ -1,13 +1,35 @@
-import sys
-import os
+import json
 
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from utils import metrics
+from scripts.ingest_leads import ingest_leads
+from scripts.enrich_leads import enrich_leads
+from scripts.score_leads import score_all_leads
+from scripts.analytics import generate_daily_metrics
+from scripts.actions import run_actions
 
-print("🚀 Running AI Lead Automation Pipeline\n")
+STAGES = [
+    ("ingest", ingest_leads),
+    ("enrich", enrich_leads),
+    ("score", score_all_leads),
+    ("analytics", generate_daily_metrics),
+    ("actions", run_actions),
+]
 
-os.system("python scripts/ingest_leads.py")
-os.system("python scripts/score_leads.py")
-os.system("python scripts/analytics.py")
-os.system("python scripts/actions.py")
+def run_pipeline():
+    """Run every stage in this process, in order"""
+    for stage, run in STAGES:
+        print(f"\n▶ {stage}")
+        with metrics.track("pipeline_stage", stage=stage):
+            run()
 
-print("\n✅ Pipeline completed successfully")
+def main():
+    print("🚀 Running AI Lead Automation Pipeline")
+    run_pipeline()
+
+    print("\n📊 Pipeline metrics:")
+    print(json.dumps(metrics.summarize(), indent=2))
+
+    print("\n✅ Pipeline completed successfully")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,8 @@
-import sys
-import os
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import json
 
 from utils.db import get_connection
+from utils.hot_leads import CONFIRMED
+from utils.events import INSERT_EVENT_SQL, ACTIONED, event_values
 
 def notify_sales(email, reason):
     # In real life: Slack / Email / CRM
@@ -15,27 +14,54 @@ def add_to_review_queue(email, reason):
 def ignore_lead(email):
     print(f"[IGNORED] {email}")
 
+def last_actioned_score(cursor):
+    """Score id covered by the newest actioned event; later scores have no event yet"""
+    cursor.execute("""
+        SELECT payload FROM lead_events
+        WHERE event_type = ?
+        ORDER BY id DESC
+        LIMIT 1
+    """, (ACTIONED,))
+    row = cursor.fetchone()
+    return json.loads(row[0])["score_id"] if row else 0
+
 def run_actions():
     conn = get_connection()
     cursor = conn.cursor()
+    reported = last_actioned_score(cursor)
 
-    cursor.execute("""
-        SELECT l.email, s.action, s.reason
-        FROM lead_scores s
+    # Latest score per lead: lead-rescore adds rows, and older scores were already acted on
+    rows = conn.stream("""
+        SELECT s.id, s.lead_id, l.email, s.action, s.reason, a.lead_id
+        FROM (SELECT lead_id, MAX(id) AS id FROM lead_scores GROUP BY lead_id) latest
+        JOIN lead_scores s ON s.id = latest.id
         JOIN leads l ON s.lead_id = l.id
-    """)
-
-    rows = cursor.fetchall()
+        LEFT JOIN (SELECT DISTINCT lead_id FROM lead_alerts WHERE kind = ?) a ON s.lead_id = a.lead_id
+        ORDER BY s.id
+    """, (CONFIRMED,))
 
-    for email, action, reason in rows:
+    for score_id, lead_id, email, action, reason, confirmed in rows:
         if action == "notify_sales":
-            notify_sales(email, reason)
+            if not confirmed:
+                notify_sales(email, reason)
+            # else: the hot-lead fast path already alerted sales when the lead was scored
         elif action == "review":
             add_to_review_queue(email, reason)
         elif action == "ignore":
             ignore_lead(email)
 
+        # Each score is reported to the event log once, however often actions run
+        if score_id > reported:
+            cursor.execute(INSERT_EVENT_SQL, event_values(
+                lead_id, ACTIONED, action=action, reason=reason, score_id=score_id,
+                via="hot_path" if confirmed and action == "notify_sales" else "actions"
+            ))
+
+    conn.commit()
     conn.close()
 
-if __name__ == "__main__":
+def main():
     run_actions()
+
+if __name__ == "__main__":
+    main()
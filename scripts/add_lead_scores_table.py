@@ -1,8 +1,4 @@
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from utils.db import get_connection
+from utils.db import get_connection, add_missing_columns
 
 def create_table():
     conn = get_connection()
@@ -16,15 +12,37 @@ def create_table():
         category TEXT,
         action TEXT,
         reason TEXT,
+        scorer TEXT,
+        scorer_version TEXT,
+        run_id TEXT,
+        prompt_tokens INTEGER,
+        completion_tokens INTEGER,
+        latency_ms REAL,
+        cost_usd REAL,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY (lead_id) REFERENCES leads(id)
     )
     """)
 
+    add_missing_columns(cursor, "lead_scores", {
+        "scorer": "TEXT",
+        "scorer_version": "TEXT",
+        "run_id": "TEXT",
+        "prompt_tokens": "INTEGER",
+        "completion_tokens": "INTEGER",
+        "latency_ms": "REAL",
+        "cost_usd": "REAL"
+    })
+
+    # Latest score per lead (MAX(id) per lead_id) for re-scoring and reports
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_lead_scores_lead
+    ON lead_scores (lead_id, id)
+    """)
+
     conn.commit()
     conn.close()
 
 if __name__ == "__main__":
     create_table()
     print("lead_scores table created")
- 
\ No newline at end of file
@@ -1,7 +1,3 @@
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from utils.db import get_connection
 from datetime import date
 
@@ -12,15 +8,17 @@ def generate_daily_metrics():
     cursor.execute("SELECT COUNT(*) FROM leads")
     total_leads = cursor.fetchone()[0]
 
+    # Latest score per lead, so a re-scored lead counts once
     cursor.execute("""
-        SELECT category, COUNT(*)
-        FROM lead_scores
-        GROUP BY category
+        SELECT s.category, COUNT(*), SUM(s.score), COUNT(s.score)
+        FROM (SELECT lead_id, MAX(id) AS id FROM lead_scores GROUP BY lead_id) latest
+        JOIN lead_scores s ON s.id = latest.id
+        GROUP BY s.category
     """)
-    category_counts = dict(cursor.fetchall())
-
-    cursor.execute("SELECT AVG(score) FROM lead_scores")
-    avg_score = cursor.fetchone()[0] or 0
+    rows = cursor.fetchall()
+    category_counts = {category: count for category, count, _, _ in rows}
+    scored = sum(n for _, _, _, n in rows)
+    avg_score = sum(total or 0 for _, _, total, _ in rows) / scored if scored else 0
 
     metrics = {
         "date": str(date.today()),
@@ -49,8 +47,11 @@ def generate_daily_metrics():
 
     return metrics
  
-if __name__ == "__main__":
+def main():
     metrics = generate_daily_metrics()
     print("Daily Metrics Generated:")
     for k, v in metrics.items():
         print(f"{k}: {v}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+from utils.db import get_connection
+
+def create_tables():
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    # One row per resolved company; domain is its business email domain, if any
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS companies (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        domain TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    # Normalized name keys and business domains -> company (see utils/companies.py)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS company_aliases (
+        alias TEXT PRIMARY KEY,
+        company_id INTEGER,
+        FOREIGN KEY (company_id) REFERENCES companies(id)
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS lead_companies (
+        lead_id INTEGER PRIMARY KEY,
+        company_id INTEGER,
+        FOREIGN KEY (lead_id) REFERENCES leads(id),
+        FOREIGN KEY (company_id) REFERENCES companies(id)
+    )
+    """)
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_lead_companies_company ON lead_companies (company_id)")
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    create_tables()
+    print("company tables created")
@@ -0,0 +1,36 @@
+from utils.db import get_connection, add_missing_columns
+
+def create_table():
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    # Sales alerts sent by the hot-lead fast path: a provisional alert from
+    # cheap signals, then the confirmed or retracted follow-up once scored
+    # (see utils/hot_leads.py)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS lead_alerts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        lead_id INTEGER,
+        email TEXT,
+        kind TEXT,
+        score REAL,
+        category TEXT,
+        reason TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (lead_id) REFERENCES leads(id)
+    )
+    """)
+
+    # Set only when the submission was never stored (lead_id is NULL)
+    add_missing_columns(cursor, "lead_alerts", {
+        "email": "TEXT"
+    })
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_lead_alerts_lead ON lead_alerts (lead_id, kind)")
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    create_table()
+    print("lead_alerts table created")
@@ -0,0 +1,43 @@
+from utils.db import get_connection
+
+def create_tables():
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    # MinHash signature per lead (NUM_PERM little-endian uint32 values; NULL if too short to compare)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS lead_signatures (
+        lead_id INTEGER PRIMARY KEY,
+        domain TEXT,
+        signature BLOB,
+        FOREIGN KEY (lead_id) REFERENCES leads(id)
+    )
+    """)
+
+    # LSH band buckets, keyed with the email domain
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS lead_lsh_buckets (
+        band INTEGER,
+        bucket TEXT,
+        lead_id INTEGER,
+        PRIMARY KEY (band, bucket, lead_id)
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS lead_duplicates (
+        lead_id INTEGER PRIMARY KEY,
+        duplicate_of INTEGER,
+        similarity REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (lead_id) REFERENCES leads(id),
+        FOREIGN KEY (duplicate_of) REFERENCES leads(id)
+    )
+    """)
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    create_tables()
+    print("lead dedup tables created")
@@ -1,9 +1,4 @@
-import sys
-import os
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from utils.db import get_connection
+from utils.db import get_connection, add_missing_columns
 
 def create_table():
     conn = get_connection()
@@ -19,11 +14,23 @@ def create_table():
         has_careers INTEGER,
         mentions_ai INTEGER,
         summary TEXT,
+        fetch_failure TEXT,
+        fetch_retryable INTEGER DEFAULT 0,
+        fetch_attempts INTEGER DEFAULT 0,
+        rescore_pending INTEGER DEFAULT 0,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY (lead_id) REFERENCES leads(id)
     )
     """)
 
+    # Older databases were created before the fetch failure columns existed
+    add_missing_columns(cursor, "lead_enrichment", {
+        "fetch_failure": "TEXT",
+        "fetch_retryable": "INTEGER DEFAULT 0",
+        "fetch_attempts": "INTEGER DEFAULT 0",
+        "rescore_pending": "INTEGER DEFAULT 0"
+    })
+
     conn.commit()
     conn.close()
 
@@ -0,0 +1,27 @@
+from utils.db import get_connection
+
+def create_table():
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    # Append-only change feed of lead events; consumers page through it by id
+    # (see utils/events.py). Rows are never updated or deleted.
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS lead_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        lead_id INTEGER,
+        event_type TEXT,
+        payload TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (lead_id) REFERENCES leads(id)
+    )
+    """)
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_lead_events_type ON lead_events (event_type, id)")
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    create_table()
+    print("lead_events table created")
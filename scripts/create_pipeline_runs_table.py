@@ -0,0 +1,32 @@
+from utils.db import get_connection
+
+def create_table():
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    # Progress of each batch stage run, used to resume interrupted runs
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS pipeline_runs (
+        run_id TEXT PRIMARY KEY,
+        stage TEXT,
+        status TEXT,
+        last_lead_id INTEGER,
+        processed INTEGER,
+        error TEXT,
+        started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        finished_at TIMESTAMP
+    )
+    """)
+
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_pipeline_runs_stage_status
+    ON pipeline_runs (stage, status)
+    """)
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    create_table()
+    print("pipeline_runs table created")
@@ -0,0 +1,41 @@
+from utils.db import get_connection, add_missing_columns
+
+def create_table():
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    # Dead-letter table for leads the scorer gave up on
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS lead_scoring_failures (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        lead_id INTEGER,
+        error TEXT,
+        raw_response TEXT,
+        attempts INTEGER,
+        scorer TEXT,
+        run_id TEXT,
+        prompt_tokens INTEGER,
+        completion_tokens INTEGER,
+        latency_ms REAL,
+        cost_usd REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (lead_id) REFERENCES leads(id)
+    )
+    """)
+
+    # Failed calls are still billed, so they carry the same usage columns as lead_scores
+    add_missing_columns(cursor, "lead_scoring_failures", {
+        "scorer": "TEXT",
+        "run_id": "TEXT",
+        "prompt_tokens": "INTEGER",
+        "completion_tokens": "INTEGER",
+        "latency_ms": "REAL",
+        "cost_usd": "REAL"
+    })
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    create_table()
+    print("lead_scoring_failures table created")
@@ -0,0 +1,38 @@
+from utils.db import get_connection
+
+def create_table():
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    # Candidate scorer results for a sample of LLM-scored leads, next to the
+    # primary result they are compared with (see utils/shadow.py)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS lead_shadow_scores (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        lead_id INTEGER,
+        scorer TEXT,
+        scorer_version TEXT,
+        score REAL,
+        category TEXT,
+        action TEXT,
+        reason TEXT,
+        error TEXT,
+        prompt_tokens INTEGER,
+        completion_tokens INTEGER,
+        latency_ms REAL,
+        cost_usd REAL,
+        primary_scorer_version TEXT,
+        primary_score REAL,
+        primary_category TEXT,
+        primary_latency_ms REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (lead_id) REFERENCES leads(id)
+    )
+    """)
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    create_table()
+    print("lead_shadow_scores table created")
@@ -1,13 +1,23 @@
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.db import get_connection, add_missing_columns
+from utils.validators import normalize_email
 
-from utils.db import get_connection
+def backfill_email_keys(cursor):
+    """Set email_key on leads stored before it existed; a later lead that shares one keeps NULL"""
+    cursor.execute("SELECT email_key FROM leads WHERE email_key IS NOT NULL")
+    taken = {row[0] for row in cursor.fetchall()}
+    cursor.execute("SELECT id, email FROM leads WHERE email_key IS NULL ORDER BY id")
+    for lead_id, email in cursor.fetchall():
+        normalized = normalize_email(email or "")
+        if normalized and normalized.email not in taken:
+            taken.add(normalized.email)
+            cursor.execute("UPDATE leads SET email_key = ? WHERE id = ?", (normalized.email, lead_id))
 
 def create_tables():
     conn = get_connection()
     cursor = conn.cursor()
 
+    # email is the address as submitted; email_key its normalized form
+    # (utils/validators.normalize_email), which is what makes a lead unique
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS leads (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -15,10 +25,19 @@ def create_tables():
         email TEXT UNIQUE,
         company TEXT,
         message TEXT,
+        email_key TEXT,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
     """)
 
+    # Older databases were created before email_key existed
+    add_missing_columns(cursor, "leads", {"email_key": "TEXT"})
+    backfill_email_keys(cursor)
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_leads_email_key ON leads (email_key)")
+
+    # Date-range filters and newest-first listings (MCP query planner)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_leads_created_at ON leads (created_at)")
+
     conn.commit()
     conn.close()
 
@@ -0,0 +1,61 @@
+from utils.db import get_connection
+
+# Every scoring attempt (successful or dead-lettered) with its usage
+USAGE_ROWS = """
+    SELECT created_at, run_id, scorer, 0 AS failed,
+           prompt_tokens, completion_tokens, latency_ms, cost_usd
+    FROM lead_scores
+    UNION ALL
+    SELECT created_at, run_id, scorer, 1 AS failed,
+           prompt_tokens, completion_tokens, latency_ms, cost_usd
+    FROM lead_scoring_failures
+"""
+
+def create_views():
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    # Views are derived, so recreate them to pick up definition changes.
+    # ROUND over NUMERIC and a full GROUP BY keep them valid on Postgres too.
+    cursor.execute("DROP VIEW IF EXISTS lead_usage_daily")
+    cursor.execute(f"""
+    CREATE VIEW lead_usage_daily AS
+    SELECT
+        DATE(created_at) AS day,
+        scorer,
+        COUNT(*) AS leads,
+        SUM(failed) AS failed,
+        SUM(COALESCE(prompt_tokens, 0)) AS prompt_tokens,
+        SUM(COALESCE(completion_tokens, 0)) AS completion_tokens,
+        ROUND(CAST(SUM(COALESCE(cost_usd, 0)) AS NUMERIC), 6) AS cost_usd,
+        ROUND(CAST(AVG(latency_ms) AS NUMERIC), 1) AS avg_latency_ms
+    FROM ({USAGE_ROWS}) u
+    GROUP BY DATE(created_at), scorer
+    """)
+
+    cursor.execute("DROP VIEW IF EXISTS lead_usage_by_run")
+    cursor.execute(f"""
+    CREATE VIEW lead_usage_by_run AS
+    SELECT
+        u.run_id,
+        r.stage,
+        r.status,
+        r.started_at,
+        u.scorer,
+        COUNT(*) AS leads,
+        SUM(u.failed) AS failed,
+        SUM(COALESCE(u.prompt_tokens, 0)) AS prompt_tokens,
+        SUM(COALESCE(u.completion_tokens, 0)) AS completion_tokens,
+        ROUND(CAST(SUM(COALESCE(u.cost_usd, 0)) AS NUMERIC), 6) AS cost_usd,
+        ROUND(CAST(AVG(u.latency_ms) AS NUMERIC), 1) AS avg_latency_ms
+    FROM ({USAGE_ROWS}) u
+    LEFT JOIN pipeline_runs r ON r.run_id = u.run_id
+    GROUP BY u.run_id, r.stage, r.status, r.started_at, u.scorer
+    """)
+
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    create_views()
+    print("lead usage views created")
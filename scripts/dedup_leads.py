@@ -0,0 +1,39 @@
+from utils.db import get_connection, batched
+from utils.dedup import index_lead
+
+# Leads are indexed and committed in batches of this many
+DEDUP_BATCH_ROWS = 1000
+
+def dedup_leads():
+    """Index leads that are not in the near-duplicate index yet (oldest first)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    leads = conn.stream("""
+        SELECT l.id, l.email, l.message
+        FROM leads l
+        WHERE l.id NOT IN (SELECT lead_id FROM lead_signatures)
+        ORDER BY l.id
+    """)
+
+    indexed = 0
+    duplicates = 0
+
+    for batch in batched(leads, DEDUP_BATCH_ROWS):
+        for lead_id, email, message in batch:
+            indexed += 1
+            match = index_lead(cursor, lead_id, email, message)
+            if match:
+                duplicates += 1
+                print(f"Near-duplicate {email} → lead {match[0]} (similarity {match[1]:.2f})")
+        conn.commit()
+
+    conn.close()
+
+    print(f"Indexed: {indexed}, Near-duplicates: {duplicates}")
+
+def main():
+    dedup_leads()
+
+if __name__ == "__main__":
+    main()
@@ -1,67 +1,128 @@
-import sys
-import os
+from utils.db import get_connection, batched
+from utils.enrichment import (extract_domain, build_enrichment, prefetch_dns, is_public_email,
+                              MAX_FETCH_ATTEMPTS)
+from utils.dedup import COPY_ENRICHMENT_SQL, has_enrichment
+from utils.checkpoint import BatchRun
+from utils.companies import enriched_company_lead
+from utils.events import INSERT_EVENT_SQL, ENRICHED, event_values
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+INSERT_ENRICHMENT_SQL = """
+    INSERT OR REPLACE INTO lead_enrichment
+    (lead_id, domain, website_exists, has_pricing, has_careers, mentions_ai, summary,
+     fetch_failure, fetch_retryable, fetch_attempts, rescore_pending)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
 
-from utils.db import get_connection
-from utils.enrichment import extract_domain, check_website, extract_signals, is_public_email
+# A scored lead whose retried website check now succeeded is scored again
+MARK_RESCORE_SQL = "UPDATE lead_enrichment SET rescore_pending = 1 WHERE lead_id = ?"
 
-def enrich_leads():
+# Leads are read in chunks of this many; each chunk's DNS lookups run ahead in parallel
+PREFETCH_ROWS = 1000
+
+def enrich_leads(resume=True):
     conn = get_connection()
     cursor = conn.cursor()
+    run = BatchRun(conn, "enrich", resume=resume)
+
+    if run.resumed:
+        print(f"Resuming enrich run {run.run_id} after lead {run.last_lead_id}")
 
-    cursor.execute("""
-        SELECT l.id, l.email
+    # New leads, plus leads whose last website check failed transiently and
+    # that have attempts left
+    leads = conn.stream("""
+        SELECT l.id, l.email, d.duplicate_of, c.company_id, e.fetch_retryable, e.fetch_attempts,
+               EXISTS (SELECT 1 FROM lead_scores s WHERE s.lead_id = l.id)
         FROM leads l
-        WHERE l.id NOT IN (SELECT lead_id FROM lead_enrichment)
-    """)
-
-    leads = cursor.fetchall()
-
-    for lead_id, email in leads:
-        domain = extract_domain(email)
-        
-        # 🚨 Public email handling
-        if is_public_email(domain):
-            website_exists = False
-            signals = {
-                "has_pricing": 0,
-                "has_careers": 0,
-                "mentions_ai": 0
-            }
-            summary = "Public email domain detected (low business confidence)"
-        else:
-            website_exists, page_text = check_website(domain)
-            signals = extract_signals(page_text) if website_exists else {
-                "has_pricing": 0,
-                "has_careers": 0,
-                "mentions_ai": 0
-            }
-            summary = (
-                f"Website exists: {website_exists}, "
-                f"Pricing: {signals['has_pricing']}, "
-                f"Careers: {signals['has_careers']}, "
-                f"Mentions AI: {signals['mentions_ai']}"
-            )
-
-        cursor.execute("""
-            INSERT INTO lead_enrichment
-            (lead_id, domain, website_exists, has_pricing, has_careers, mentions_ai, summary)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            lead_id,
-            domain,
-            int(website_exists),
-            signals["has_pricing"],
-            signals["has_careers"],
-            signals["mentions_ai"],
-            summary
-        ))
-
-        print(f"Enriched {email} → {summary}")
-
-    conn.commit()
+        LEFT JOIN lead_duplicates d ON d.lead_id = l.id
+        LEFT JOIN lead_companies c ON c.lead_id = l.id
+        LEFT JOIN lead_enrichment e ON e.lead_id = l.id
+        WHERE l.id NOT IN (
+            SELECT lead_id FROM lead_enrichment
+            WHERE COALESCE(fetch_retryable, 0) = 0 OR COALESCE(fetch_attempts, 0) >= ?
+        )
+        AND l.id > ?
+        ORDER BY l.id
+    """, (MAX_FETCH_ATTEMPTS, run.last_lead_id))
+
+    # Leads enriched by this run, including ones still waiting for a checkpoint
+    enriched = set()
+    # (company_id, domain) -> a lead of this run with final enrichment for it
+    company_leads = {}
+    copied = 0
+
+    try:
+        for chunk in batched(leads, PREFETCH_ROWS):
+            # Resolve the chunk's business domains up front so dead ones fail fast in the loop
+            prefetch_dns({
+                domain for domain in (extract_domain(lead[1]) for lead in chunk)
+                if not is_public_email(domain)
+            })
+
+            for lead_id, email, duplicate_of, company_id, was_retryable, attempts, scored in chunk:
+                domain = extract_domain(email)
+                # Scored while its website check was failing: a final result means a new score
+                retried_scored = bool(was_retryable and scored)
+                # Another lead of the same company and domain already has the website's signals
+                source = None
+                if company_id and not duplicate_of and not is_public_email(domain):
+                    source = (company_leads.get((company_id, domain))
+                              or enriched_company_lead(cursor, company_id, domain))
+
+                # Near-duplicates reuse the original lead's enrichment instead of refetching
+                if duplicate_of and (duplicate_of in enriched or has_enrichment(cursor, duplicate_of)):
+                    run.write(COPY_ENRICHMENT_SQL, (lead_id, duplicate_of))
+                    run.write(INSERT_EVENT_SQL, event_values(lead_id, ENRICHED, domain=domain, copied_from=duplicate_of))
+                    if retried_scored:
+                        run.write(MARK_RESCORE_SQL, (lead_id,))
+                    print(f"Enriched {email} → copied from near-duplicate lead {duplicate_of}")
+                elif source:
+                    run.write(COPY_ENRICHMENT_SQL, (lead_id, source))
+                    run.write(INSERT_EVENT_SQL, event_values(lead_id, ENRICHED, domain=domain, copied_from=source))
+                    if retried_scored:
+                        run.write(MARK_RESCORE_SQL, (lead_id,))
+                    copied += 1
+                    print(f"Enriched {email} → copied from lead {source} of the same company")
+                else:
+                    enrichment = build_enrichment(domain, (attempts or 0) + 1)
+                    signals = enrichment["signals"]
+
+                    run.write(INSERT_ENRICHMENT_SQL, (
+                        lead_id,
+                        domain,
+                        int(enrichment["website_exists"]),
+                        signals["has_pricing"],
+                        signals["has_careers"],
+                        signals["mentions_ai"],
+                        enrichment["summary"],
+                        enrichment["fetch_failure"],
+                        int(enrichment["fetch_retryable"]),
+                        enrichment["fetch_attempts"],
+                        int(retried_scored and not enrichment["fetch_retryable"])
+                    ))
+                    run.write(INSERT_EVENT_SQL, event_values(
+                        lead_id, ENRICHED, domain=domain, website_exists=enrichment["website_exists"],
+                        summary=enrichment["summary"], fetch_failure=enrichment["fetch_failure"]
+                    ))
+
+                    print(f"Enriched {email} → {enrichment['summary']}")
+                    if company_id and not enrichment["fetch_retryable"]:
+                        company_leads.setdefault((company_id, domain), lead_id)
+
+                enriched.add(lead_id)
+                run.done(lead_id)
+    except BaseException as e:
+        run.interrupt(repr(e))
+        conn.close()
+        raise
+
+    run.finish()
     conn.close()
 
-if __name__ == "__main__":
+    print(f"Enrich run {run.run_id}: {run.processed} leads processed, "
+          f"{copied} copied from another lead of the same company")
+
+def main():
     enrich_leads()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+import argparse
+
+from utils.snapshot import SNAPSHOT_DIR, export_snapshot
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the joined lead view to date-partitioned Parquet")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR, help="snapshot directory")
+    parser.add_argument("--full", action="store_true", help="rebuild every partition")
+    args = parser.parse_args()
+
+    stats = export_snapshot(args.dir, full=args.full)
+    print(f"Snapshot: {stats['rows']} leads rewritten in {stats['partitions']} partitions ({args.dir})")
+
+if __name__ == "__main__":
+    main()
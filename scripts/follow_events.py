@@ -0,0 +1,32 @@
+import argparse
+import json
+
+from utils.events import EVENT_TYPES, read_events, follow_events
+
+def main():
+    parser = argparse.ArgumentParser(description="Print lead events after a cursor as JSON lines")
+    parser.add_argument("--after", type=int, default=0, help="id of the last event already handled")
+    parser.add_argument("--type", action="append", choices=EVENT_TYPES, dest="types",
+                        help="only this event type (repeatable)")
+    parser.add_argument("--follow", action="store_true", help="keep waiting for new events")
+    args = parser.parse_args()
+
+    if args.follow:
+        try:
+            for event in follow_events(args.after, args.types):
+                print(json.dumps(event), flush=True)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    after = args.after
+    while True:
+        events = read_events(after, types=args.types)
+        if not events:
+            break
+        for event in events:
+            print(json.dumps(event))
+        after = events[-1]["id"]
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,115 @@
-import pandas as pd
-import sys
+import argparse
+import csv
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from operator import itemgetter
 
-from utils.db import get_connection
-from utils.validators import is_valid_email
+from utils.db import get_connection, batched
+from utils.validators import normalize_many
+from utils.records import LeadRow
+from utils.dedup import index_lead
+from utils.companies import CompanyResolver
+from utils.events import INSERT_EVENT_SQL, INGESTED, event_values
+from utils.hot_leads import provisional_values, notify, INSERT_ALERT_SQL, PROVISIONAL
+from utils.paths import PROJECT_ROOT
 
-# Get the project root directory
-PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-LEADS_FILE = os.path.join(PROJECT_ROOT, "data", "leads.csv")
+# data/leads.csv under LEAD_HOME (default: the current directory); lead-ingest --file overrides it
+LEADS_FILE = os.getenv("LEADS_FILE", os.path.join(PROJECT_ROOT, "data", "leads.csv"))
 
-def ingest_leads():
-    df = pd.read_csv(LEADS_FILE)
+# Files smaller than this are read with the csv module; pandas only pays off
+# (and is only imported) for large exports
+PANDAS_MIN_BYTES = 50 * 1024 * 1024
+PANDAS_CHUNK_ROWS = 50_000
+
+# Leads are loaded in batches (COPY on Postgres); emails whose normalized form
+# (leads.email_key) already exists are skipped
+INSERT_BATCH_ROWS = 1000
+LEAD_COLUMNS = ("name", "email", "company", "message")
+INSERT_COLUMNS = LEAD_COLUMNS + ("email_key",)
+
+def read_leads(path):
+    """Yield each CSV row as a LeadRow of strings"""
+    if os.path.getsize(path) >= PANDAS_MIN_BYTES:
+        try:
+            import pandas as pd
+        except ImportError:
+            pd = None
+
+        if pd is not None:
+            for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=PANDAS_CHUNK_ROWS,
+                                     usecols=list(LEAD_COLUMNS)):
+                for row in chunk[list(LEAD_COLUMNS)].itertuples(index=False, name=None):
+                    yield LeadRow(*row)
+            return
+
+    # Plain rows instead of DictReader: no per-row dict, and extra columns are never kept
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        positions = [header.index(column) for column in LEAD_COLUMNS]
+        pick = itemgetter(*positions)
+        width = max(positions) + 1
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < width:
+                row += [""] * (width - len(row))
+            yield LeadRow(*pick(row))
+
+def ingest_leads(path=None):
 
     conn = get_connection()
     cursor = conn.cursor()
+    companies = CompanyResolver(cursor)
 
     inserted = 0
     skipped = 0
+    duplicates = 0
+    alerted = 0
 
-    for _, row in df.iterrows():
-        email = row["email"]
+    for batch in batched(read_leads(path or LEADS_FILE), INSERT_BATCH_ROWS):
+        keys = normalize_many(lead.email for lead in batch)
+        leads = [(lead.name, lead.email.strip(), lead.company, lead.message, key.email)
+                 for lead, key in zip(batch, keys) if key]
+        added = conn.bulk_insert("leads", INSERT_COLUMNS, leads)
 
-        if not is_valid_email(email):
-            skipped += 1
-            continue
+        # Invalid emails and emails that already exist are skipped
+        inserted += len(added)
+        skipped += len(batch) - len(added)
 
-        try:
-            cursor.execute("""
-            INSERT INTO leads (name, email, company, message)
-            VALUES (?, ?, ?, ?)
-            """, (
-                row["name"],
-                email,
-                row["company"],
-                row["message"]
+        alerts = []
+        for lead_id, (name, email, company, message, _) in added:
+            if index_lead(cursor, lead_id, email, message):
+                duplicates += 1
+            company_id = companies.link_lead(lead_id, company, email)
+            cursor.execute(INSERT_EVENT_SQL, event_values(
+                lead_id, INGESTED, email=email, company=company, company_id=company_id, source="csv"
             ))
-            inserted += 1
-        except Exception:
-            skipped += 1
+            # Likely-Hot leads alert sales now instead of after enrichment and scoring
+            alert = provisional_values(email, message)
+            if alert:
+                cursor.execute(INSERT_ALERT_SQL, (lead_id, *alert))
+                alerts.append((email, alert[3]))
+
+        # Each batch is its own transaction, so a large file never holds the
+        # write lock for the whole import and alerts go out as batches land
+        conn.commit()
+        for email, reason in alerts:
+            notify(PROVISIONAL, email, reason)
+        alerted += len(alerts)
 
-    conn.commit()
     conn.close()
 
-    print(f"Inserted: {inserted}, Skipped: {skipped}")
+    print(f"Inserted: {inserted}, Skipped: {skipped}, Near-duplicates: {duplicates}, "
+          f"Provisional hot alerts: {alerted}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Import leads from a CSV export")
+    parser.add_argument("--file", default=LEADS_FILE, help=f"CSV with name,email,company,message (default: {LEADS_FILE})")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        parser.error(f"{args.file} not found")
+    ingest_leads(args.file)
 
 if __name__ == "__main__":
-    ingest_leads()
+    main()
@@ -0,0 +1,34 @@
+import os
+
+from utils.db import get_storage
+from scripts import (create_tables, create_lead_enrichment_table, add_lead_scores_table,
+                     create_daily_metrics_table, create_lead_dedup_tables,
+                     create_scoring_failures_table, create_pipeline_runs_table,
+                     create_shadow_scores_table, create_lead_alerts_table, create_company_tables,
+                     create_lead_events_table, create_usage_views)
+
+def init_db():
+    """Create every table and view the pipeline uses (safe to re-run)"""
+    storage = get_storage()
+    if storage.name == "sqlite":
+        # A fresh directory has no db/ yet
+        os.makedirs(os.path.dirname(os.path.abspath(storage.path)), exist_ok=True)
+    create_tables.create_tables()
+    create_lead_enrichment_table.create_table()
+    add_lead_scores_table.create_table()
+    create_daily_metrics_table.create_table()
+    create_lead_dedup_tables.create_tables()
+    create_scoring_failures_table.create_table()
+    create_pipeline_runs_table.create_table()
+    create_shadow_scores_table.create_table()
+    create_lead_alerts_table.create_table()
+    create_company_tables.create_tables()
+    create_lead_events_table.create_table()
+    create_usage_views.create_views()
+
+def main():
+    init_db()
+    print("Database initialized")
+
+if __name__ == "__main__":
+    main()
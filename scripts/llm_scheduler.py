@@ -0,0 +1,20 @@
+import os
+
+from utils.db import DB_PATH
+from utils.scheduler import serve, LLM_SLOTS, LLM_RATE, SHARES
+
+def main():
+    address = os.getenv("LLM_SCHEDULER_ADDRESS", os.path.join(os.path.dirname(DB_PATH), "llm-scheduler.sock"))
+    authkey = os.getenv("LLM_SCHEDULER_AUTHKEY")
+    if not authkey:
+        raise SystemExit("Set LLM_SCHEDULER_AUTHKEY (shared with every client) to start the scheduler")
+    if os.path.exists(address):
+        os.remove(address)
+
+    print(f"LLM scheduler on {address}: {LLM_SLOTS} slots, "
+          f"{LLM_RATE or 'unlimited'} calls/s, shares {SHARES}")
+    print(f"Point the API and scripts at it with LLM_SCHEDULER_ADDRESS={address}")
+    serve(address, authkey.encode())
+
+if __name__ == "__main__":
+    main()
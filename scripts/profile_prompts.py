@@ -0,0 +1,77 @@
+import argparse
+import statistics
+
+from utils.db import get_connection
+from utils.ai import SYSTEM_PROMPT, build_user_prompt, estimate_tokens
+
+# A message is flagged when it alone exceeds this many tokens,
+# or is OUTLIER_FACTOR times larger than the median message
+MAX_MESSAGE_TOKENS = 300
+OUTLIER_FACTOR = 5
+
+def profile_prompts(max_message_tokens=MAX_MESSAGE_TOKENS, top=20):
+    conn = get_connection()
+
+    # Streamed: only each lead's token counts are kept, never its message
+    leads = conn.stream("""
+        SELECT l.id, l.name, l.email, l.company, l.message, e.summary, s.prompt_tokens
+        FROM leads l
+        LEFT JOIN lead_enrichment e ON l.id = e.lead_id
+        LEFT JOIN (SELECT lead_id, MAX(id) AS id FROM lead_scores GROUP BY lead_id) latest ON latest.lead_id = l.id
+        LEFT JOIN lead_scores s ON s.id = latest.id
+    """)
+
+    system_tokens = estimate_tokens(SYSTEM_PROMPT)
+    profiles = []
+    for lead_id, name, email, company, message, summary, actual_tokens in leads:
+        prompt = build_user_prompt(name, email, company, message, summary or "No enrichment data available")
+        profiles.append({
+            "lead_id": lead_id,
+            "email": email,
+            "message_tokens": estimate_tokens(message),
+            "prompt_tokens": system_tokens + estimate_tokens(prompt),
+            "actual_prompt_tokens": actual_tokens
+        })
+
+    conn.close()
+
+    if not profiles:
+        print("No leads to profile")
+        return []
+
+    message_tokens = sorted(p["message_tokens"] for p in profiles)
+    prompt_tokens = sorted(p["prompt_tokens"] for p in profiles)
+    median = statistics.median(message_tokens)
+    limit = min(max_message_tokens, max(median, 1) * OUTLIER_FACTOR)
+
+    flagged = sorted(
+        (p for p in profiles if p["message_tokens"] > limit),
+        key=lambda p: p["message_tokens"],
+        reverse=True
+    )
+    flagged_tokens = sum(p["prompt_tokens"] for p in flagged)
+
+    print(f"Leads profiled: {len(profiles)}")
+    print(f"Prompt tokens (estimated): p50={prompt_tokens[len(prompt_tokens) // 2]}, "
+          f"p95={prompt_tokens[int(len(prompt_tokens) * 0.95)]}, max={prompt_tokens[-1]}, "
+          f"system prompt={system_tokens}")
+    print(f"Message tokens: median={median}, flag limit={limit}")
+    print(f"Flagged leads: {len(flagged)} "
+          f"({flagged_tokens / max(sum(prompt_tokens), 1) * 100:.1f}% of all prompt tokens)")
+
+    for p in flagged[:top]:
+        actual = p["actual_prompt_tokens"] if p["actual_prompt_tokens"] is not None else "-"
+        print(f"  lead {p['lead_id']} {p['email']}: message≈{p['message_tokens']} tokens, "
+              f"prompt≈{p['prompt_tokens']}, billed={actual}")
+
+    return flagged
+
+def main():
+    parser = argparse.ArgumentParser(description="Find leads whose message inflates prompt size")
+    parser.add_argument("--max-message-tokens", type=int, default=MAX_MESSAGE_TOKENS)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    profile_prompts(args.max_message_tokens, args.top)
+
+if __name__ == "__main__":
+    main()
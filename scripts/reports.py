@@ -0,0 +1,62 @@
+import argparse
+
+from utils.snapshot import SNAPSHOT_DIR, read_snapshot
+
+# Reporting queries over the Parquet snapshot (see utils/snapshot.py). Each
+# report is a handful of vectorized pyarrow kernels over whole columns, so it
+# never touches the OLTP database. Refresh the snapshot with lead-export.
+
+def score_by_domain(table, limit=20):
+    """Lead count, score stats and hot share per enrichment domain, largest first"""
+    import pyarrow.compute as pc
+
+    scored = table.filter(pc.is_valid(table["score"]))
+    scored = scored.append_column("hot", pc.cast(pc.equal(scored["category"], "Hot"), "int8"))
+    grouped = scored.group_by("domain").aggregate([
+        ("score", "count"),
+        ("score", "mean"),
+        ("score", "min"),
+        ("score", "max"),
+        ("hot", "mean"),
+    ])
+    grouped = grouped.sort_by([("score_count", "descending"), ("domain", "ascending")])
+    return grouped.slice(0, limit).to_pylist()
+
+def category_by_week(table):
+    """Scored leads per category for each week (Monday start) of lead creation"""
+    import pyarrow.compute as pc
+
+    scored = table.filter(pc.is_valid(table["category"]))
+    week = pc.floor_temporal(scored["created_at"], unit="week", week_starts_monday=True)
+    scored = scored.append_column("week", week)
+    grouped = scored.group_by(["week", "category"]).aggregate([("lead_id", "count")])
+    grouped = grouped.sort_by([("week", "ascending"), ("category", "ascending")])
+
+    weeks = {}
+    for row in grouped.to_pylist():
+        weeks.setdefault(row["week"].date().isoformat(), {})[row["category"]] = row["lead_id_count"]
+    return weeks
+
+def main():
+    parser = argparse.ArgumentParser(description="Reports over the lead Parquet snapshot")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR, help="snapshot directory")
+    parser.add_argument("--days", type=int, help="only leads created in the last N days")
+    parser.add_argument("--top", type=int, default=20, help="domains to show")
+    args = parser.parse_args()
+
+    table = read_snapshot(["lead_id", "created_at", "domain", "score", "category"],
+                          since=args.days, snapshot_dir=args.dir)
+    print(f"{table.num_rows} leads in snapshot")
+
+    print("\nScore by domain:")
+    for row in score_by_domain(table, args.top):
+        print(f"  {row['domain'] or '-':30} leads={row['score_count']:<6} "
+              f"avg={row['score_mean']:.2f} min={row['score_min']:.2f} "
+              f"max={row['score_max']:.2f} hot={row['hot_mean']:.0%}")
+
+    print("\nCategory by week:")
+    for week, counts in category_by_week(table).items():
+        print(f"  {week}: " + ", ".join(f"{c}={n}" for c, n in counts.items()))
+
+if __name__ == "__main__":
+    main()
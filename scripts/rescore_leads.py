@@ -0,0 +1,214 @@
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from utils.db import get_connection
+from utils.ai import score_lead, ScoringError, MODEL_NAME, SCORER_VERSION
+from utils.prescore import prescore_lead, PRESCORER_NAME
+from utils.dedup import inherited_score, DUPLICATE_SCORER
+from utils.checkpoint import BatchRun
+from utils.throttle import RateLimiter
+from utils.scheduler import BACKFILL
+from utils.events import INSERT_EVENT_SQL, scored_event
+from utils import metrics
+from scripts.score_leads import INSERT_SCORE_SQL, INSERT_FAILURE_SQL, score_values, failure_values
+
+# Backfill for a prompt or model change: re-score leads whose latest score
+# was produced by a scorer version that is no longer current, newest leads
+# first. LLM calls run on RESCORE_WORKERS threads, throttled to RESCORE_RATE
+# calls per second; results are written from the main thread through the
+# usual BatchRun checkpoints.
+#
+# Staleness is the resume cursor: a re-scored lead has a current version and
+# drops out of the query, so an interrupted backfill simply picks up the
+# leads that are still stale. Leads that already failed in the run are not
+# retried when it resumes.
+RESCORE_WORKERS = int(os.getenv("RESCORE_WORKERS", "4"))
+RESCORE_RATE = float(os.getenv("RESCORE_RATE", "5"))
+
+STALE_LEADS_SQL = """
+    SELECT
+        l.id,
+        l.name,
+        l.email,
+        l.company,
+        l.message,
+        e.summary,
+        e.website_exists,
+        e.has_pricing,
+        e.has_careers,
+        e.mentions_ai,
+        e.fetch_retryable,
+        d.duplicate_of,
+        s.score,
+        s.category
+    FROM (SELECT lead_id, MAX(id) AS id FROM lead_scores GROUP BY lead_id) latest
+    JOIN lead_scores s ON s.id = latest.id
+    JOIN leads l ON l.id = latest.lead_id
+    LEFT JOIN lead_enrichment e ON l.id = e.lead_id
+    LEFT JOIN lead_duplicates d ON l.id = d.lead_id
+    WHERE (s.scorer_version IS NULL OR s.scorer_version NOT IN (?, ?))
+    AND l.id NOT IN (SELECT lead_id FROM lead_scoring_failures WHERE run_id = ?)
+    ORDER BY l.id DESC
+"""
+
+STALE_COUNTS_SQL = """
+    SELECT s.scorer_version, COUNT(*)
+    FROM (SELECT lead_id, MAX(id) AS id FROM lead_scores GROUP BY lead_id) latest
+    JOIN lead_scores s ON s.id = latest.id
+    WHERE s.scorer_version IS NULL OR s.scorer_version NOT IN (?, ?)
+    GROUP BY s.scorer_version
+"""
+
+def current_versions():
+    return (SCORER_VERSION, PRESCORER_NAME)
+
+def stale_counts():
+    """Leads with a stale latest score, per scorer version"""
+    conn = get_connection()
+    try:
+        return dict(conn.execute(STALE_COUNTS_SQL, current_versions()).fetchall())
+    finally:
+        conn.close()
+
+def _score_throttled(limiter, lead):
+    limiter.acquire()
+    (lead_id, name, email, company, message, enrichment_summary) = lead[:6]
+    return score_lead(name, email, company, message, enrichment_summary or "No enrichment data available",
+                      priority=BACKFILL)
+
+def rescore_stale_leads(workers=RESCORE_WORKERS, rate=RESCORE_RATE, limit=None, resume=True):
+    conn = get_connection()
+    cursor = conn.cursor()
+    run = BatchRun(conn, "rescore", resume=resume)
+    if run.resumed:
+        print(f"Resuming rescore run {run.run_id} ({run.processed} leads already re-scored)")
+
+    current = current_versions()
+    limiter = RateLimiter(rate)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rescore")
+    in_flight = {}
+    counts = {"llm_calls": 0, "prescored": 0, "inherited": 0, "failed": 0, "deferred": 0}
+    submitted = 0
+
+    def record(lead_id, ai_result, scorer, previous):
+        run.write(INSERT_SCORE_SQL, score_values(lead_id, ai_result, scorer, run.run_id))
+        run.write(INSERT_EVENT_SQL, scored_event(lead_id, ai_result, scorer, run.run_id, previous))
+        run.done(lead_id)
+
+    def collect(block):
+        # BatchRun is not thread-safe, so workers only call the LLM; results are written here
+        done, _ = wait(in_flight, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            lead_id, email, previous = in_flight.pop(future)
+            try:
+                record(lead_id, future.result(), MODEL_NAME, previous)
+            except ScoringError as e:
+                run.write(INSERT_FAILURE_SQL, failure_values(lead_id, e, run.run_id))
+                run.done(lead_id)
+                counts["failed"] += 1
+                print(f"Failed to re-score lead {email}: {e}")
+
+    try:
+        # Newest first means a near-duplicate comes before its (older) original.
+        # If the original is still stale the duplicate waits for the next pass,
+        # which inherits the original's new score instead of calling the LLM.
+        while True:
+            deferred = 0
+            progress = submitted
+            for lead in conn.stream(STALE_LEADS_SQL, (*current, run.run_id)):
+                if limit is not None and submitted >= limit:
+                    break
+                (lead_id, name, email, company, message, enrichment_summary,
+                 website_exists, has_pricing, has_careers, mentions_ai, fetch_retryable,
+                 duplicate_of, previous_score, previous_category) = lead
+                previous = (previous_score, previous_category)
+
+                if duplicate_of:
+                    ai_result = inherited_score(cursor, duplicate_of)
+                    if ai_result and ai_result["scorer_version"] in current:
+                        counts["inherited"] += 1
+                        metrics.inc("llm_calls_skipped_total", reason="duplicate")
+                        record(lead_id, ai_result, DUPLICATE_SCORER, previous)
+                        submitted += 1
+                        continue
+                    if ai_result:
+                        deferred += 1
+                        continue
+
+                ai_result = None
+                if enrichment_summary is not None:
+                    ai_result = prescore_lead(
+                        email,
+                        message,
+                        bool(website_exists),
+                        {"has_pricing": has_pricing, "has_careers": has_careers, "mentions_ai": mentions_ai},
+                        bool(fetch_retryable)
+                    )
+                submitted += 1
+                if ai_result:
+                    counts["prescored"] += 1
+                    metrics.inc("llm_calls_skipped_total", reason="prescore")
+                    record(lead_id, ai_result, PRESCORER_NAME, previous)
+                    continue
+
+                counts["llm_calls"] += 1
+                in_flight[pool.submit(_score_throttled, limiter, lead)] = (lead_id, email, previous)
+                # Keep the queue short so an interrupt loses little paid work
+                while len(in_flight) >= workers * 2:
+                    collect(block=True)
+                if in_flight:
+                    collect(block=False)
+
+            while in_flight:
+                collect(block=True)
+            # The next pass reads this pass's scores from the database
+            run.checkpoint()
+            counts["deferred"] = deferred
+            if not deferred or submitted == progress or (limit is not None and submitted >= limit):
+                break
+    except BaseException as e:
+        for future in list(in_flight):
+            if future.cancel():
+                del in_flight[future]
+        pool.shutdown(wait=True)
+        try:
+            # Calls that were already running are paid for; keep their scores
+            collect(block=False)
+        except Exception:
+            pass
+        run.interrupt(repr(e))
+        conn.close()
+        raise
+
+    pool.shutdown()
+    run.finish()
+    conn.close()
+
+    print(
+        f"Rescore run {run.run_id} ({SCORER_VERSION}): LLM calls: {counts['llm_calls']}, "
+        f"Pre-scored locally: {counts['prescored']}, Inherited from near-duplicates: {counts['inherited']}, "
+        f"Failed: {counts['failed']}, Still waiting on their original: {counts['deferred']}"
+    )
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score leads whose score came from an older prompt or model")
+    parser.add_argument("--workers", type=int, default=RESCORE_WORKERS, help="concurrent LLM calls")
+    parser.add_argument("--rate", type=float, default=RESCORE_RATE, help="max LLM calls per second (0 = unlimited)")
+    parser.add_argument("--limit", type=int, help="stop after this many leads (e.g. a canary batch)")
+    parser.add_argument("--restart", action="store_true", help="start a new run instead of resuming")
+    parser.add_argument("--dry-run", action="store_true", help="only count stale leads")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        counts = stale_counts()
+        print(f"Current scorer: {SCORER_VERSION}; stale leads: {sum(counts.values())}")
+        for version, n in sorted(counts.items(), key=lambda item: -item[1]):
+            print(f"  {version or '(unversioned)'}: {n}")
+        return
+
+    rescore_stale_leads(args.workers, args.rate, args.limit, resume=not args.restart)
+
+if __name__ == "__main__":
+    main()
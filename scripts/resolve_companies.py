@@ -0,0 +1,60 @@
+import argparse
+
+from utils.db import get_connection, batched
+from utils.companies import CompanyResolver
+
+# Leads are resolved and committed in batches of this many
+RESOLVE_BATCH_ROWS = 1000
+
+TOP_COMPANIES_SQL = """
+    SELECT co.id, co.name, co.domain, COUNT(*) AS leads
+    FROM lead_companies lc
+    JOIN companies co ON co.id = lc.company_id
+    GROUP BY co.id, co.name, co.domain
+    ORDER BY leads DESC, co.id
+    LIMIT ?
+"""
+
+def resolve_companies():
+    """Link leads ingested before the company index (or with no company yet) to companies"""
+    conn = get_connection()
+    resolver = CompanyResolver(conn.cursor())
+
+    leads = conn.stream("""
+        SELECT id, company, email
+        FROM leads
+        WHERE id NOT IN (SELECT lead_id FROM lead_companies)
+        ORDER BY id
+    """)
+
+    linked = 0
+    unresolved = 0
+    for batch in batched(leads, RESOLVE_BATCH_ROWS):
+        for lead_id, company, email in batch:
+            if resolver.link_lead(lead_id, company, email) is None:
+                unresolved += 1
+            else:
+                linked += 1
+        conn.commit()
+
+    conn.close()
+    print(f"Linked to companies: {linked}, No company or business domain: {unresolved}")
+
+def top_companies(limit=20):
+    conn = get_connection()
+    try:
+        return conn.execute(TOP_COMPANIES_SQL, (limit,)).fetchall()
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve leads to companies and list the largest ones")
+    parser.add_argument("--top", type=int, default=20, help="companies to list after resolving")
+    args = parser.parse_args()
+
+    resolve_companies()
+    for company_id, name, domain, leads in top_companies(args.top):
+        print(f"  {company_id:>6}  {name[:30]:30} {domain or '-':30} {leads:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import argparse
+import json
+
+from utils.score_stats import score_distribution
+
+BAR_WIDTH = 40
+
+def print_report(report):
+    print(f"Scores: {report['total']}  mean={report['mean']:.3f}  std={report['std']:.3f}")
+    if not report["total"]:
+        return
+
+    print("\nQuantiles: " + "  ".join(f"{k}={v:.3f}" for k, v in report["quantiles"].items()))
+
+    print("\nHistogram:")
+    largest = max(b["count"] for b in report["histogram"]) or 1
+    for b in report["histogram"]:
+        bar = "█" * round(BAR_WIDTH * b["count"] / largest)
+        print(f"  [{b['lower']:.2f}, {b['upper']:.2f})  {b['count']:>8}  {bar}")
+
+    for title, groups in (("By category", report["by_category"]), ("By domain", report["by_domain"])):
+        print(f"\n{title}:")
+        for g in groups:
+            print(f"  {g['key'] or '-':30} n={g['count']:<8} mean={g['mean']:.3f} "
+                  f"p50={g['p50']:.3f} p90={g['p90']:.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Score histogram, quantiles and per-category/domain breakdown")
+    parser.add_argument("--bins", type=int, default=10)
+    parser.add_argument("--top-domains", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print the raw report as JSON")
+    args = parser.parse_args()
+
+    report = score_distribution(args.bins, args.top_domains)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,190 @@
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from utils.db import get_connection
-from utils.ai import score_lead
+from utils.ai import score_lead, ScoringError, MODEL_NAME, usage_values
+from utils.prescore import prescore_lead, PRESCORER_NAME
+from utils.enrichment import MAX_FETCH_ATTEMPTS
+from utils.dedup import inherit_score, inherited_score, DUPLICATE_SCORER
+from utils.checkpoint import BatchRun
+from utils.records import ScoreRecord
+from utils.events import INSERT_EVENT_SQL, scored_event
+from utils.hot_leads import follow_up_values, notify, INSERT_ALERT_SQL, PROVISIONAL
+from utils import shadow
+from utils import metrics
+
+# Leads that have failed this many runs stay in the dead-letter table until handled
+MAX_FAILED_RUNS = 3
+
+INSERT_SCORE_SQL = """
+    INSERT INTO lead_scores
+    (lead_id, score, category, action, reason, scorer, scorer_version, run_id,
+     prompt_tokens, completion_tokens, latency_ms, cost_usd)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_FAILURE_SQL = """
+    INSERT INTO lead_scoring_failures
+    (lead_id, error, raw_response, attempts, scorer, run_id,
+     prompt_tokens, completion_tokens, latency_ms, cost_usd)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+CLEAR_RESCORE_SQL = "UPDATE lead_enrichment SET rescore_pending = 0 WHERE lead_id = ?"
+
+def score_values(lead_id, ai_result, scorer, run_id):
+    """INSERT_SCORE_SQL parameters for a score_lead-shaped result"""
+    return (
+        lead_id, ai_result["score"], ai_result["category"], ai_result["action"],
+        ai_result["reason"], scorer, ai_result.get("scorer_version"), run_id,
+        *usage_values(ai_result.get("usage"))
+    )
 
-def score_all_leads():
+def failure_values(lead_id, error, run_id):
+    """INSERT_FAILURE_SQL parameters for a ScoringError"""
+    return (
+        lead_id, str(error), error.raw_response, error.attempts, MODEL_NAME, run_id,
+        *usage_values(error.usage)
+    )
+
+def score_all_leads(resume=True):
     conn = get_connection()
     cursor = conn.cursor()
+    run = BatchRun(conn, "score", resume=resume)
+
+    if run.resumed:
+        print(f"Resuming score run {run.run_id} after lead {run.last_lead_id}")
 
-    cursor.execute("""
+    # Unscored leads, and scored ones whose website check has since succeeded.
+    # Leads whose website check will be retried wait for it instead of being
+    # scored on "web=unknown".
+    leads = conn.stream("""
     SELECT 
         l.id,
         l.name,
         l.email,
         l.company,
         l.message,
-        e.summary
+        e.summary,
+        e.website_exists,
+        e.has_pricing,
+        e.has_careers,
+        e.mentions_ai,
+        e.fetch_retryable,
+        d.duplicate_of,
+        a.lead_id,
+        ps.score,
+        ps.category
     FROM leads l
     LEFT JOIN lead_enrichment e ON l.id = e.lead_id
-    WHERE l.id NOT IN (SELECT lead_id FROM lead_scores)
-    """)
-
-    leads = cursor.fetchall()
-
-    for lead in leads:
-        lead_id, name, email, company, message, enrichment_summary = lead
-
-        ai_result = score_lead(
-            name,
-            email,
-            company,
-            message,
-            enrichment_summary or "No enrichment data available"
-        )
-
-        cursor.execute("""
-        INSERT INTO lead_scores (lead_id, score, category, action, reason)
-        VALUES (?, ?, ?, ?, ?)
-        """, (
-            lead_id,
-            ai_result["score"],
-            ai_result["category"],
-            ai_result["action"],
-            ai_result["reason"]
-        ))
-
-        print(f"Scored lead {email}: {ai_result['category']}")
-
-    conn.commit()
+    LEFT JOIN lead_duplicates d ON l.id = d.lead_id
+    LEFT JOIN (SELECT DISTINCT lead_id FROM lead_alerts WHERE kind = ?) a ON l.id = a.lead_id
+    LEFT JOIN lead_scores ps ON ps.id = (SELECT MAX(id) FROM lead_scores WHERE lead_id = l.id)
+    WHERE (ps.id IS NULL OR e.rescore_pending = 1)
+    AND NOT (COALESCE(e.fetch_retryable, 0) = 1 AND COALESCE(e.fetch_attempts, 0) < ?)
+    AND l.id NOT IN (
+        SELECT lead_id FROM lead_scoring_failures
+        GROUP BY lead_id
+        HAVING COUNT(*) >= ?
+    )
+    AND l.id > ?
+    ORDER BY l.id
+    """, (PROVISIONAL, MAX_FETCH_ATTEMPTS, MAX_FAILED_RUNS, run.last_lead_id))
+
+    llm_calls = 0
+    prescored = 0
+    inherited = 0
+    failed = 0
+
+    # Results scored by this run, including ones still waiting for a checkpoint.
+    # Kept for the whole run, so only the fields a near-duplicate inherits
+    run_scores = {}
+
+    try:
+        for lead in leads:
+            (lead_id, name, email, company, message, enrichment_summary,
+             website_exists, has_pricing, has_careers, mentions_ai, fetch_retryable,
+             duplicate_of, alerted, previous_score, previous_category) = lead
+            previous = (previous_score, previous_category) if previous_category is not None else None
+
+            # Originals sort first, so a near-duplicate's original is already scored here
+            ai_result = None
+            if duplicate_of:
+                if duplicate_of in run_scores:
+                    ai_result = inherit_score(duplicate_of, run_scores[duplicate_of])
+                else:
+                    ai_result = inherited_score(cursor, duplicate_of)
+
+            if ai_result:
+                scorer = DUPLICATE_SCORER
+                inherited += 1
+                metrics.inc("llm_calls_skipped_total", reason="duplicate")
+            elif enrichment_summary is not None:
+                ai_result = prescore_lead(
+                    email,
+                    message,
+                    bool(website_exists),
+                    {"has_pricing": has_pricing, "has_careers": has_careers, "mentions_ai": mentions_ai},
+                    bool(fetch_retryable)
+                )
+
+                if ai_result:
+                    scorer = PRESCORER_NAME
+                    prescored += 1
+                    metrics.inc("llm_calls_skipped_total", reason="prescore")
+
+            if not ai_result:
+                llm_calls += 1
+                try:
+                    ai_result = score_lead(
+                        name,
+                        email,
+                        company,
+                        message,
+                        enrichment_summary or "No enrichment data available"
+                    )
+                except ScoringError as e:
+                    run.write(INSERT_FAILURE_SQL, failure_values(lead_id, e, run.run_id))
+                    run.done(lead_id)
+                    failed += 1
+                    print(f"Failed to score lead {email}: {e}")
+                    continue
+                scorer = MODEL_NAME
+
+            run.write(INSERT_SCORE_SQL, score_values(lead_id, ai_result, scorer, run.run_id))
+            run.write(INSERT_EVENT_SQL, scored_event(lead_id, ai_result, scorer, run.run_id, previous))
+            if previous:
+                run.write(CLEAR_RESCORE_SQL, (lead_id,))
+            run_scores[lead_id] = ScoreRecord.from_result(ai_result)
+            if alerted and not previous:
+                # Sales already has a provisional alert for this lead; confirm or retract it
+                # once the score and alert rows are committed, so a crash never sends it twice
+                alert = follow_up_values(ai_result)
+                run.write(INSERT_ALERT_SQL, (lead_id, *alert))
+                run.after_commit(notify, alert[0], email, alert[3])
+            run.done(lead_id)
+            if scorer == MODEL_NAME:
+                shadow.maybe_shadow(lead_id, (name, email, company, message, enrichment_summary), ai_result)
+
+            print(f"Scored lead {email}: {ai_result['category']} ({scorer})")
+    except BaseException as e:
+        run.interrupt(repr(e))
+        conn.close()
+        raise
+
+    run.finish()
     conn.close()
+    shadow.drain()
 
-if __name__ == "__main__":
+    total = llm_calls + prescored + inherited
+    saved = ((prescored + inherited) / total * 100) if total else 0
+    print(
+        f"Score run {run.run_id}: LLM calls: {llm_calls}, Pre-scored locally: {prescored}, "
+        f"Inherited from near-duplicates: {inherited} ({saved:.1f}% of LLM calls saved), "
+        f"Failed: {failed}"
+    )
+
+    return {"llm_calls": llm_calls, "prescored": prescored, "inherited": inherited, "failed": failed}
+
+def main():
     score_all_leads()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import argparse
+import json
+
+from utils.shadow import shadow_report
+
+def print_report(report):
+    if not report:
+        print("No shadow scores yet (set SHADOW_SAMPLE_RATE to start sampling)")
+        return
+
+    for version, r in report.items():
+        print(f"\nCandidate {version} vs {', '.join(r['primary_versions'])}")
+        print(f"  compared: {r['compared']}  errors: {r['errors']}  cost: ${r['cost_usd']:.4f}")
+        if not r["compared"]:
+            continue
+        print(f"  category agreement: {r['category_agreement']:.1%}")
+        print(f"  score shift: {r['mean_score_shift']:+.3f}  mean |diff|: {r['mean_abs_score_diff']:.3f}")
+        print(f"  latency p50/p95: candidate {r['latency_ms']['p50']}/{r['latency_ms']['p95']} ms, "
+              f"primary {r['primary_latency_ms']['p50']}/{r['primary_latency_ms']['p95']} ms")
+        print("  primary -> candidate:")
+        for transition, n in r["confusion"].items():
+            print(f"    {transition:15} {n}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare shadow (candidate) scores with the primary scorer")
+    parser.add_argument("--json", action="store_true", help="print the raw report as JSON")
+    args = parser.parse_args()
+
+    report = shadow_report()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+if __name__ == "__main__":
+    main()
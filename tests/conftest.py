@@ -0,0 +1,13 @@
+import pytest
+
+from scripts.init_db import init_db
+from utils.db import get_connection
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Connection to a fresh SQLite database with every pipeline table; get_connection() opens the same file"""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'database.db'}")
+    init_db()
+    conn = get_connection()
+    yield conn
+    conn.close()
@@ -0,0 +1,149 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from utils import ai
+from utils.ai import parse_score_response, score_lead, ScoringError, MAX_ATTEMPTS
+
+REPLY = {"score": 0.8, "category": "Hot", "action": "notify_sales", "reason": "Asked for pricing"}
+
+def reply(**fields):
+    return json.dumps({**REPLY, **fields})
+
+def test_plain_json_reply():
+    assert parse_score_response(reply()) == REPLY
+
+def test_code_fences_and_surrounding_prose_are_stripped():
+    content = f"Here is the score:\n```json\n{reply()}\n```\nLet me know if you need more."
+    assert parse_score_response(content) == REPLY
+
+@pytest.mark.parametrize("score, expected", [(85, 0.85), (100, 1.0), ("0.4", 0.4), (1, 1.0), (0, 0.0)])
+def test_scores_on_a_0_100_scale_are_scaled(score, expected):
+    assert parse_score_response(reply(score=score))["score"] == expected
+
+@pytest.mark.parametrize("score", [-0.1, 101, "high", None])
+def test_invalid_scores_are_rejected(score):
+    with pytest.raises(ValueError):
+        parse_score_response(reply(score=score))
+
+def test_category_and_action_casing_is_normalized():
+    result = parse_score_response(reply(category=" WARM ", action="Review", reason="  Maybe later "))
+    assert (result["category"], result["action"], result["reason"]) == ("Warm", "review", "Maybe later")
+
+@pytest.mark.parametrize("content", [
+    "", "no json here", "{not json}", "[1, 2]", reply(category="Lukewarm"), reply(action="call"), reply(reason=" ")
+])
+def test_unrepairable_replies_are_rejected(content):
+    with pytest.raises(ValueError):
+        parse_score_response(content)
+
+# --- score_lead with a stubbed client -----------------------------------------
+
+def api_error(name, message="boom"):
+    """An openai exception without building the HTTP request/response it normally carries"""
+    openai = pytest.importorskip("openai")
+    error_type = getattr(openai, name)
+    error = error_type.__new__(error_type)
+    Exception.__init__(error, message)
+    return error
+
+class FakeClient:
+    """Returns the queued replies (content strings or exceptions) in order"""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, temperature):
+        self.calls.append(messages)
+        content = self.replies.pop(0)
+        if isinstance(content, Exception):
+            raise content
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20)
+        )
+
+@pytest.fixture
+def client(monkeypatch):
+    pytest.importorskip("openai")
+    backoffs = []
+    monkeypatch.setattr(ai, "_backoff", backoffs.append)
+
+    def install(*replies):
+        fake = FakeClient(*replies)
+        fake.backoffs = backoffs
+        monkeypatch.setattr(ai, "_client", fake)
+        return fake
+    return install
+
+def score():
+    return score_lead("Ana", "ana@acme.com", "Acme", "We need pricing", "web=yes")
+
+def test_valid_reply_is_scored_once_with_usage_and_version(client):
+    fake = client(reply())
+    result = score()
+    assert result["category"] == "Hot"
+    assert result["usage"]["prompt_tokens"] == 100
+    assert result["scorer_version"] == ai.SCORER_VERSION
+    assert len(fake.calls) == 1 and fake.backoffs == []
+
+def test_transient_errors_are_retried_with_backoff(client):
+    fake = client(api_error("RateLimitError"), api_error("APIConnectionError"), reply())
+    assert score()["category"] == "Hot"
+    assert len(fake.calls) == 3
+    assert fake.backoffs == [1, 2]
+
+def test_malformed_reply_is_shown_to_the_model_on_retry(client):
+    fake = client("not json", reply())
+    result = score()
+    assert result["usage"]["prompt_tokens"] == 200
+    retry = fake.calls[1]
+    assert retry[2] == {"role": "assistant", "content": "not json"}
+    assert "invalid" in retry[3]["content"]
+
+def test_exhausted_retries_raise_a_scoring_error(client):
+    fake = client(*["still not json"] * MAX_ATTEMPTS)
+    with pytest.raises(ScoringError) as error:
+        score()
+    assert error.value.attempts == MAX_ATTEMPTS
+    assert error.value.raw_response == "still not json"
+    assert error.value.usage["prompt_tokens"] == 100 * MAX_ATTEMPTS
+    assert str(error.value).startswith("Malformed response")
+    assert len(fake.backoffs) == MAX_ATTEMPTS - 1
+
+def test_bad_request_is_not_retried(client):
+    fake = client(api_error("BadRequestError", "context too long"), reply())
+    with pytest.raises(ScoringError) as error:
+        score()
+    assert error.value.attempts == 1
+    assert len(fake.calls) == 1
+
+def test_backoff_doubles_up_to_the_cap(monkeypatch):
+    delays = []
+    monkeypatch.setattr(ai.time, "sleep", delays.append)
+    monkeypatch.setattr(ai.random, "uniform", lambda low, high: high)
+    for attempt in range(1, 6):
+        ai._backoff(attempt)
+    assert delays == [1.0, 2.0, 4.0, 8.0, 8.0]
+
+# --- dead-letter table ---------------------------------------------------------
+
+def test_failed_leads_are_dead_lettered_and_skipped_after_max_failed_runs(db, monkeypatch):
+    from scripts import score_leads
+
+    def fail(*args, **kwargs):
+        raise ScoringError("Malformed response: no JSON", raw_response="nope", attempts=3)
+
+    monkeypatch.setattr(score_leads, "score_lead", fail)
+    db.execute("INSERT INTO leads (name, email, company, message) VALUES ('Ana', 'ana@acme.com', 'Acme', 'Hi')")
+    db.commit()
+
+    results = [score_leads.score_all_leads(resume=False)["failed"] for _ in range(score_leads.MAX_FAILED_RUNS + 1)]
+    assert results == [1] * score_leads.MAX_FAILED_RUNS + [0]
+    assert db.execute("SELECT error, raw_response, attempts FROM lead_scoring_failures").fetchall() == [
+        ("Malformed response: no JSON", "nope", 3)
+    ] * score_leads.MAX_FAILED_RUNS
+    assert db.execute("SELECT COUNT(*) FROM lead_scores").fetchone() == (0,)
@@ -0,0 +1,140 @@
+import pytest
+
+from utils.checkpoint import BatchRun, stale_before
+from utils.db import get_connection
+
+NOTE_SQL = "INSERT INTO checkpoint_notes (lead_id) VALUES (?)"
+
+@pytest.fixture
+def notes(db):
+    db.execute("CREATE TABLE checkpoint_notes (lead_id INTEGER NOT NULL)")
+    db.commit()
+    return db
+
+def committed_notes():
+    """Rows another connection can see"""
+    conn = get_connection()
+    try:
+        return [row[0] for row in conn.execute("SELECT lead_id FROM checkpoint_notes ORDER BY lead_id")]
+    finally:
+        conn.close()
+
+def run_row(conn, run_id):
+    return conn.execute("SELECT status, last_lead_id, processed, error FROM pipeline_runs WHERE run_id = ?",
+                        (run_id,)).fetchone()
+
+def process(run, lead_ids):
+    for lead_id in lead_ids:
+        run.write(NOTE_SQL, (lead_id,))
+        run.done(lead_id)
+
+def test_writes_are_buffered_until_a_checkpoint(notes):
+    run = BatchRun(notes, "test", every_rows=2, every_seconds=3600)
+    process(run, [1])
+    assert committed_notes() == []
+    process(run, [2])
+    assert committed_notes() == [1, 2]
+    assert run_row(notes, run.run_id) == ("running", 2, 2, None)
+
+def test_finished_runs_are_not_resumed(notes):
+    run = BatchRun(notes, "test")
+    process(run, [1, 2])
+    run.finish()
+    assert run_row(notes, run.run_id)[:3] == ("completed", 2, 2)
+    assert not BatchRun(notes, "test").resumed
+
+def test_interrupted_run_saves_its_work_and_resumes_at_once(notes):
+    run = BatchRun(notes, "test", every_rows=100)
+    process(run, [1, 2, 3])
+    run.interrupt("KeyboardInterrupt()")
+    assert committed_notes() == [1, 2, 3]
+    assert run_row(notes, run.run_id) == ("interrupted", 3, 3, "KeyboardInterrupt()")
+
+    resumed = BatchRun(notes, "test")
+    assert resumed.resumed
+    assert (resumed.run_id, resumed.last_lead_id, resumed.processed) == (run.run_id, 3, 3)
+    assert run_row(notes, run.run_id)[0] == "running"
+
+def test_failed_buffered_write_resumes_from_the_last_good_checkpoint(notes):
+    run = BatchRun(notes, "test", every_rows=2)
+    process(run, [1, 2])
+    run.write("INSERT INTO checkpoint_notes (lead_id) VALUES (NULL)", ())
+    run.done(3)
+    run.interrupt("IntegrityError()")
+    assert committed_notes() == [1, 2]
+    assert run_row(notes, run.run_id)[:2] == ("interrupted", 2)
+
+def test_running_run_is_only_taken_over_once_stale(notes):
+    run = BatchRun(notes, "test")
+    process(run, [1])
+    run.checkpoint()
+
+    # Still checkpointing: another process may be working on it
+    other = BatchRun(notes, "test")
+    assert not other.resumed and other.run_id != run.run_id
+    other.finish()
+
+    # Crashed: no checkpoint for longer than STALE_RUN_SECONDS
+    notes.execute("UPDATE pipeline_runs SET updated_at = ? WHERE run_id = ?",
+                  (stale_before(3600), run.run_id))
+    notes.commit()
+    resumed = BatchRun(notes, "test")
+    assert resumed.resumed and resumed.run_id == run.run_id
+    assert resumed.last_lead_id == 1
+
+def test_fresh_run_ignores_resumable_runs(notes):
+    run = BatchRun(notes, "test")
+    run.interrupt("stopped")
+    assert not BatchRun(notes, "test", resume=False).resumed
+    assert not BatchRun(notes, "other", resume=True).resumed
+
+def test_after_commit_callbacks_run_once_their_writes_are_committed(notes):
+    seen = []
+    run = BatchRun(notes, "test", every_rows=2)
+
+    for lead_id in (1, 2):
+        run.write(NOTE_SQL, (lead_id,))
+        run.after_commit(lambda lead_id: seen.append((lead_id, committed_notes())), lead_id)
+        run.done(lead_id)
+    assert seen == [(1, [1, 2]), (2, [1, 2])]
+
+def test_after_commit_callbacks_are_dropped_with_failed_writes(notes):
+    seen = []
+    run = BatchRun(notes, "test")
+    run.write("INSERT INTO checkpoint_notes (lead_id) VALUES (NULL)", ())
+    run.after_commit(seen.append, 1)
+    run.done(1)
+    run.interrupt("IntegrityError()")
+    assert seen == []
+
+def test_interrupted_score_run_resumes_after_the_last_checkpointed_lead(db, monkeypatch):
+    from scripts import score_leads
+    from utils.ai import MODEL_NAME
+
+    scored = []
+
+    def score_lead(name, *args, **kwargs):
+        if name == "Ben" and "stop" not in scored:
+            scored.append("stop")
+            raise KeyboardInterrupt()
+        scored.append(name)
+        return {"score": 0.5, "category": "Warm", "action": "review", "reason": "ok"}
+
+    monkeypatch.setattr(score_leads, "score_lead", score_lead)
+    monkeypatch.setattr(score_leads.shadow, "maybe_shadow", lambda *args: None)
+    for name in ("Ana", "Ben", "Cara"):
+        db.execute("INSERT INTO leads (name, email, company, message) VALUES (?, ?, 'Acme', 'Hi')",
+                   (name, f"{name.lower()}@acme.com"))
+    db.commit()
+
+    with pytest.raises(KeyboardInterrupt):
+        score_leads.score_all_leads()
+    status, last_lead_id = db.execute("SELECT status, last_lead_id FROM pipeline_runs").fetchone()
+    assert (status, last_lead_id) == ("interrupted", 1)
+
+    score_leads.score_all_leads()
+    assert scored == ["Ana", "stop", "Ben", "Cara"]
+    assert db.execute("SELECT lead_id, scorer FROM lead_scores ORDER BY lead_id").fetchall() == [
+        (1, MODEL_NAME), (2, MODEL_NAME), (3, MODEL_NAME)
+    ]
+    assert db.execute("SELECT status FROM pipeline_runs").fetchall() == [("completed",)]
@@ -0,0 +1,29 @@
+from utils.compaction import compact_message
+
+def test_message_starting_with_a_quote_marker_is_kept():
+    message = ("> 50 employees and growing fast.\n"
+               "We need pricing for the enterprise plan.\n"
+               "Can we book a demo next week?")
+    assert compact_message(message) == ("> 50 employees and growing fast. We need pricing for the "
+                                        "enterprise plan. Can we book a demo next week?")
+
+def test_single_quote_marker_line_in_the_body_is_kept():
+    message = "Our team:\n> 50 engineers\nWe want a demo."
+    assert compact_message(message) == "Our team: > 50 engineers We want a demo."
+
+def test_trailing_run_of_quoted_lines_is_dropped():
+    message = ("Yes, Tuesday works for the demo.\n"
+               "\n"
+               "> Would Tuesday work for a call?\n"
+               ">\n"
+               "> Thanks, Sam\n")
+    assert compact_message(message) == "Yes, Tuesday works for the demo."
+
+def test_reply_header_drops_the_quoted_message():
+    message = ("Sounds good, send the contract.\n"
+               "On Mon, 4 May 2026 at 10:00, Sam <sam@vendor.com> wrote:\n"
+               "> Here is the proposal")
+    assert compact_message(message) == "Sounds good, send the contract."
+
+def test_sent_from_my_footer_is_dropped():
+    assert compact_message("Call me tomorrow.\nSent from my iPhone") == "Call me tomorrow."
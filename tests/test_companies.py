@@ -0,0 +1,68 @@
+import pytest
+
+from utils.companies import CompanyResolver, company_key, enriched_company_lead
+
+@pytest.mark.parametrize("name, key", [
+    ("FinTechX", "fintechx"),
+    ("fintechx inc", "fintechx"),
+    ("FinTech X, Inc.", "fintechx"),
+    ("The FinTech X Company Ltd", "fintechx"),
+    ("Acme S.A.", "acme"),
+    ("Johnson & Johnson", "johnsonandjohnson"),
+    ("Café Société GmbH", "cafesociete"),
+])
+def test_company_names_normalize_to_one_key(name, key):
+    assert company_key(name) == key
+
+@pytest.mark.parametrize("name", [None, "", "  ", "Personal", "Self-employed", "N/A", "Inc.", 42])
+def test_names_that_are_not_companies_have_no_key(name):
+    assert company_key(name) is None
+
+@pytest.fixture
+def resolver(db):
+    return CompanyResolver(db.cursor())
+
+def companies(conn):
+    return conn.execute("SELECT id, name, domain FROM companies ORDER BY id").fetchall()
+
+def test_name_variants_and_domain_merge_into_one_company(db, resolver):
+    first = resolver.resolve("FinTechX", "ana@fintechx.com")
+    assert resolver.resolve("fintechx inc", "ben@gmail.com") == first
+    assert resolver.resolve("FinTech X", "cy@mail.fintechx.com") == first
+    assert resolver.resolve("", "dan@fintechx.com") == first
+    assert companies(db) == [(first, "FinTechX", "fintechx.com")]
+
+def test_same_name_with_another_business_domain_is_another_company(db, resolver):
+    acme_com = resolver.resolve("Acme", "ana@acme.com")
+    acme_org = resolver.resolve("Acme", "dan@acme.org")
+    assert acme_org != acme_com
+    # The name stays with the first company; a free-mail lead named Acme joins it
+    assert resolver.resolve("Acme Inc", "eve@gmail.com") == acme_com
+    assert resolver.resolve("Other name", "finn@acme.org") == acme_org
+
+def test_domain_is_filled_in_when_a_name_only_company_gets_one(db, resolver):
+    company_id = resolver.resolve("Beta", "ana@gmail.com")
+    assert companies(db) == [(company_id, "Beta", None)]
+    assert resolver.resolve("Beta", "ben@beta.io") == company_id
+    assert companies(db) == [(company_id, "Beta", "beta.io")]
+
+def test_free_mail_without_a_company_name_resolves_to_nothing(db, resolver):
+    assert resolver.resolve("Personal", "ana@gmail.com") is None
+    assert resolver.link_lead(1, None, "ana@mailinator.com") is None
+    assert companies(db) == []
+
+def test_a_fresh_resolver_reads_the_aliases_back(db, resolver):
+    company_id = resolver.resolve("FinTechX", "ana@fintechx.com")
+    db.commit()
+    assert CompanyResolver(db.cursor()).resolve("FinTech X Ltd", "ben@gmail.com") == company_id
+
+def test_enriched_company_lead_skips_retryable_enrichment(db, resolver):
+    cursor = db.cursor()
+    for lead_id, email in [(1, "ana@acme.com"), (2, "ben@acme.com")]:
+        cursor.execute("INSERT INTO leads (id, name, email, company, message) VALUES (?, 'X', ?, 'Acme', '')",
+                       (lead_id, email))
+        company_id = resolver.link_lead(lead_id, "Acme", email)
+    cursor.execute("INSERT INTO lead_enrichment (lead_id, domain, fetch_retryable) VALUES (1, 'acme.com', 1)")
+    assert enriched_company_lead(cursor, company_id, "acme.com") is None
+    cursor.execute("INSERT INTO lead_enrichment (lead_id, domain, fetch_retryable) VALUES (2, 'acme.com', 0)")
+    assert enriched_company_lead(cursor, company_id, "acme.com") == 2
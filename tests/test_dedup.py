@@ -0,0 +1,83 @@
+from scripts.dedup_leads import dedup_leads
+from utils import dedup
+from utils.dedup import (find_duplicate, index_lead, minhash, pack_signature, shingles, similarity,
+                         unpack_signature, NUM_PERM)
+
+DEMO = ("Hi, we are looking for an AI tool to automate lead scoring for our sales team "
+        "of 40 people. Can we book a demo next week?")
+# A few words changed: about 0.8 Jaccard on shingles
+DEMO_EDITED = ("Hi, we are looking for an AI tool to automate lead scoring for our sales team "
+               "of 45 people. Could we book a demo next week?")
+UNRELATED = "Hello, our marketing agency wants pricing for your analytics product and an onboarding call this month."
+
+def add_lead(conn, email, message):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO leads (name, email, company, message) VALUES (?, ?, ?, ?)",
+                   ("Test", email, "Acme", message))
+    conn.commit()
+    return cursor.lastrowid
+
+def duplicates(conn):
+    return conn.execute("SELECT lead_id, duplicate_of FROM lead_duplicates ORDER BY lead_id").fetchall()
+
+def test_signature_packs_to_a_fixed_width():
+    signature = minhash(shingles(DEMO))
+    blob = pack_signature(signature)
+    assert len(blob) == NUM_PERM * 4
+    assert unpack_signature(blob) == signature
+
+def test_near_duplicate_from_the_same_domain_is_found(db):
+    cursor = db.cursor()
+    first = add_lead(db, "ana@acme.com", DEMO)
+    second = add_lead(db, "ben@acme.com", DEMO_EDITED)
+
+    assert index_lead(cursor, first, "ana@acme.com", DEMO) is None
+    match = index_lead(cursor, second, "ben@acme.com", DEMO_EDITED)
+    assert match[0] == first
+    assert match[1] >= dedup.DUPLICATE_THRESHOLD
+    assert duplicates(db) == [(second, first)]
+
+def test_chains_of_near_duplicates_point_at_the_root_lead(db):
+    cursor = db.cursor()
+    for email, message in [("ana@acme.com", DEMO), ("ben@acme.com", DEMO_EDITED), ("cy@acme.com", DEMO_EDITED)]:
+        index_lead(cursor, add_lead(db, email, message), email, message)
+    assert [duplicate_of for _, duplicate_of in duplicates(db)] == [1, 1]
+
+def test_other_domains_and_other_messages_are_not_duplicates(db):
+    cursor = db.cursor()
+    index_lead(cursor, add_lead(db, "ana@acme.com", DEMO), "ana@acme.com", DEMO)
+
+    assert find_duplicate(cursor, "dan@beta.io", DEMO) is None
+    assert find_duplicate(cursor, "ben@acme.com", UNRELATED) is None
+    assert find_duplicate(cursor, "ben@acme.com", DEMO_EDITED)[0] == 1
+
+def test_matches_below_the_threshold_are_ignored(db, monkeypatch):
+    cursor = db.cursor()
+    index_lead(cursor, add_lead(db, "ana@acme.com", DEMO), "ana@acme.com", DEMO)
+    estimate = similarity(minhash(shingles(DEMO)), minhash(shingles(DEMO_EDITED)))
+
+    monkeypatch.setattr(dedup, "DUPLICATE_THRESHOLD", estimate + 0.01)
+    assert find_duplicate(cursor, "ben@acme.com", DEMO_EDITED) is None
+    monkeypatch.setattr(dedup, "DUPLICATE_THRESHOLD", estimate)
+    assert find_duplicate(cursor, "ben@acme.com", DEMO_EDITED) == (1, estimate)
+
+def test_short_messages_are_recorded_without_a_signature(db):
+    lead_id = add_lead(db, "ana@acme.com", "Call me")
+    assert index_lead(db.cursor(), lead_id, "ana@acme.com", "Call me") is None
+    assert db.execute("SELECT domain, signature FROM lead_signatures WHERE lead_id = ?",
+                      (lead_id,)).fetchall() == [("acme.com", None)]
+    assert db.execute("SELECT COUNT(*) FROM lead_lsh_buckets").fetchone() == (0,)
+
+def test_rerun_only_indexes_new_leads(db, capsys):
+    first = add_lead(db, "ana@acme.com", DEMO)
+    add_lead(db, "eve@acme.com", "Call me")
+    dedup_leads()
+    assert "Indexed: 2, Near-duplicates: 0" in capsys.readouterr().out
+
+    second = add_lead(db, "ben@acme.com", DEMO_EDITED)
+    dedup_leads()
+    assert "Indexed: 1, Near-duplicates: 1" in capsys.readouterr().out
+    assert duplicates(db) == [(second, first)]
+
+    dedup_leads()
+    assert "Indexed: 0, Near-duplicates: 0" in capsys.readouterr().out
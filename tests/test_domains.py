@@ -0,0 +1,49 @@
+from utils.domains import (PublicSuffixList, to_ascii, registrable_domain, is_free_email_domain,
+                           is_disposable_domain)
+
+def test_registrable_domain_under_a_multi_label_suffix():
+    assert registrable_domain("mail.acme.co.uk") == "acme.co.uk"
+    assert registrable_domain("acme.com") == "acme.com"
+    assert registrable_domain("Sales.EU.Acme.com.") == "acme.com"
+
+def test_bare_public_suffix_has_no_registrable_domain():
+    assert registrable_domain("co.uk") is None
+    assert registrable_domain("com") is None
+
+def test_wildcard_rule_makes_the_next_label_part_of_the_suffix():
+    # *.ck: anything.ck is a public suffix, so the registrable domain has three labels
+    assert registrable_domain("shop.acme.ck") == "shop.acme.ck"
+    assert registrable_domain("www.shop.acme.ck") == "shop.acme.ck"
+    assert registrable_domain("acme.ck") is None
+
+def test_exception_rule_overrides_the_wildcard():
+    # !www.ck: www.ck itself is registrable
+    assert registrable_domain("www.ck") == "www.ck"
+    assert registrable_domain("mail.www.ck") == "www.ck"
+    assert registrable_domain("a.b.city.kawasaki.jp") == "city.kawasaki.jp"
+
+def test_unlisted_tld_uses_the_implicit_star_rule():
+    assert registrable_domain("mail.acme.notatld") == "acme.notatld"
+
+def test_idn_domains_are_encoded_to_punycode():
+    assert to_ascii("Bücher.de") == "xn--bcher-kva.de"
+    assert registrable_domain("mail.bücher.de") == "xn--bcher-kva.de"
+    assert registrable_domain("xn--bcher-kva.de") == "xn--bcher-kva.de"
+
+def test_rules_are_parsed_from_psl_lines():
+    psl = PublicSuffixList(["// comment", "", "com", "*.example", "!keep.example"])
+    assert psl.suffix_labels(["a", "com"]) == 1
+    assert psl.suffix_labels(["a", "b", "example"]) == 2
+    assert psl.suffix_labels(["a", "keep", "example"]) == 1
+
+def test_free_mail_providers():
+    assert is_free_email_domain("gmail.com")
+    # Subdomains of a listed provider count too
+    assert is_free_email_domain("eu.gmail.com")
+    assert not is_free_email_domain("acme.com")
+
+def test_disposable_providers():
+    assert is_disposable_domain("mailinator.com")
+    assert is_disposable_domain("yopmail.fr")
+    assert not is_disposable_domain("gmail.com")
+    assert not is_disposable_domain("acme.com")
@@ -0,0 +1,196 @@
+import socket
+import ssl
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import enrichment
+from utils.enrichment import (extract_domain, resolve_domain, probe_port, probe_tls, build_enrichment,
+                              MAX_FETCH_ATTEMPTS)
+
+@pytest.fixture(autouse=True)
+def empty_dns_cache(monkeypatch):
+    monkeypatch.setattr(enrichment, "_dns_cache", {})
+    monkeypatch.setattr(enrichment, "_dns_pending", {})
+
+def test_extract_domain_returns_the_registrable_domain():
+    assert extract_domain("ana@mail.acme.co.uk") == "acme.co.uk"
+    assert extract_domain("Ana@Sales.Acme.COM") == "acme.com"
+    assert extract_domain("ana@shop.acme.ck") == "shop.acme.ck"
+    assert extract_domain("ana@mail.bücher.de") == "xn--bcher-kva.de"
+
+# --- DNS ----------------------------------------------------------------------
+
+def resolver(monkeypatch, answer):
+    """Stub getaddrinfo with answer(host): a list of addresses, or an exception to raise"""
+    calls = []
+
+    def getaddrinfo(host, port, type=0):
+        calls.append(host)
+        result = answer(host)
+        if isinstance(result, Exception):
+            raise result
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port)) for address in result]
+
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+    return calls
+
+def test_resolved_addresses_keep_resolver_order_and_are_cached(monkeypatch):
+    calls = resolver(monkeypatch, lambda host: ["2001:db8::1", "192.0.2.1", "2001:db8::1"])
+    assert resolve_domain("acme.com") == (("2001:db8::1", "192.0.2.1"), None)
+    assert resolve_domain("acme.com") == (("2001:db8::1", "192.0.2.1"), None)
+    assert calls == ["acme.com"]
+
+@pytest.mark.parametrize("error, failure", [
+    (socket.gaierror(socket.EAI_NONAME, "Name or service not known"), "dns_nxdomain"),
+    (socket.gaierror(socket.EAI_AGAIN, "Temporary failure"), "dns_error"),
+    (OSError("network down"), "dns_error"),
+])
+def test_dns_failures_are_typed(monkeypatch, error, failure):
+    resolver(monkeypatch, lambda host: error)
+    assert resolve_domain("acme.com") == (None, failure)
+
+def test_slow_dns_is_a_timeout(monkeypatch):
+    monkeypatch.setattr(enrichment, "DNS_TIMEOUT", 0.05)
+    resolver(monkeypatch, lambda host: time.sleep(0.3) or ["192.0.2.1"])
+    assert resolve_domain("slow.com") == (None, "dns_timeout")
+
+# --- TCP and TLS ----------------------------------------------------------------
+
+class FakeSocket:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+def connector(monkeypatch, outcomes):
+    """Stub create_connection; outcomes maps an address to an exception, or None to accept"""
+    def create_connection(address, timeout=None):
+        error = outcomes[address[0]]
+        if error:
+            raise error
+        return FakeSocket()
+    monkeypatch.setattr(socket, "create_connection", create_connection)
+
+def test_first_accepting_address_is_used(monkeypatch):
+    connector(monkeypatch, {"2001:db8::1": OSError("network unreachable"), "192.0.2.1": None})
+    assert probe_port(["2001:db8::1", "192.0.2.1"]) == ("192.0.2.1", None)
+
+@pytest.mark.parametrize("errors, failure", [
+    ([ConnectionRefusedError(), ConnectionRefusedError()], "connect_refused"),
+    ([ConnectionRefusedError(), socket.timeout()], "connect_timeout"),
+    ([OSError("no route"), OSError("no route")], "connect_timeout"),
+])
+def test_tcp_failures_are_typed(monkeypatch, errors, failure):
+    addresses = ["192.0.2.1", "192.0.2.2"]
+    connector(monkeypatch, dict(zip(addresses, errors)))
+    assert probe_port(addresses) == (None, failure)
+
+def tls_context(monkeypatch, error):
+    def wrap_socket(sock, server_hostname):
+        if error:
+            raise error
+        return FakeSocket()
+    monkeypatch.setattr(ssl, "create_default_context",
+                        lambda cafile=None: SimpleNamespace(wrap_socket=wrap_socket))
+
+@pytest.mark.parametrize("error, failure", [
+    (None, None),
+    (ssl.SSLCertVerificationError("certificate has expired"), "tls_handshake"),
+    (socket.timeout(), "tls_timeout"),
+])
+def test_tls_failures_are_typed(monkeypatch, error, failure):
+    connector(monkeypatch, {"192.0.2.1": None})
+    tls_context(monkeypatch, error)
+    assert probe_tls("192.0.2.1", 443, "acme.com") == failure
+
+# --- HTTP -------------------------------------------------------------------------
+
+@pytest.fixture
+def reachable(monkeypatch):
+    """DNS, TCP and TLS pre-flight all pass"""
+    monkeypatch.setattr(enrichment, "resolve_domain", lambda host: (("192.0.2.1",), None))
+    monkeypatch.setattr(enrichment, "probe_port", lambda addresses, port: (addresses[0], None))
+    monkeypatch.setattr(enrichment, "probe_tls", lambda address, port, hostname, cafile=None: None)
+
+def http_get(monkeypatch, result):
+    requests = pytest.importorskip("requests")
+
+    def get(url, timeout):
+        if isinstance(result, Exception):
+            raise result
+        return SimpleNamespace(status_code=result, text="Pricing | Careers | AI")
+    monkeypatch.setattr(requests, "get", get)
+    return requests
+
+@pytest.mark.parametrize("status, failure", [(200, None), (404, "http_status"), (503, "http_5xx")])
+def test_http_status_is_typed(monkeypatch, reachable, status, failure):
+    http_get(monkeypatch, status)
+    website_exists, _, result = enrichment.check_website("acme.com")
+    assert (website_exists, result) == (status == 200, failure)
+
+def test_http_exceptions_are_typed(monkeypatch, reachable):
+    requests = pytest.importorskip("requests")
+    for error, failure in [(requests.exceptions.SSLError(), "tls_error"),
+                           (requests.exceptions.ReadTimeout(), "http_timeout"),
+                           (requests.exceptions.ConnectionError(), "http_error")]:
+        http_get(monkeypatch, error)
+        assert enrichment.check_website("acme.com") == (False, "", failure)
+
+def test_failed_pre_flight_skips_the_fetch(monkeypatch):
+    monkeypatch.setattr(enrichment, "resolve_domain", lambda host: (None, "dns_nxdomain"))
+    http_get(monkeypatch, AssertionError("fetched a domain that does not resolve"))
+    assert enrichment.check_website("gone.example") == (False, "", "dns_nxdomain")
+
+# --- attempts -----------------------------------------------------------------------
+
+def failing_website(monkeypatch, failure):
+    calls = []
+
+    def check_website(domain):
+        calls.append(domain)
+        return False, "", failure
+    monkeypatch.setattr(enrichment, "check_website", check_website)
+    return calls
+
+def test_retryable_failure_retries_until_max_attempts(monkeypatch):
+    failing_website(monkeypatch, "dns_timeout")
+    first = build_enrichment("acme.com")
+    assert first["fetch_retryable"] and "will retry" in first["summary"]
+    last = build_enrichment("acme.com", MAX_FETCH_ATTEMPTS)
+    assert last["fetch_attempts"] == MAX_FETCH_ATTEMPTS
+    assert f"gave up after {MAX_FETCH_ATTEMPTS} attempts" in last["summary"]
+
+def test_public_email_domains_are_never_fetched(monkeypatch):
+    calls = failing_website(monkeypatch, "dns_timeout")
+    assert build_enrichment("gmail.com")["fetch_failure"] is None
+    assert calls == []
+
+def test_enrich_runs_stop_retrying_after_max_attempts(db, monkeypatch):
+    from scripts import enrich_leads
+
+    monkeypatch.setattr(enrich_leads, "prefetch_dns", lambda domains: None)
+    calls = failing_website(monkeypatch, "connect_timeout")
+    db.execute("INSERT INTO leads (name, email, company, message) VALUES ('Ana', 'ana@acme.com', 'Acme', 'Hi')")
+    db.commit()
+
+    for _ in range(MAX_FETCH_ATTEMPTS + 2):
+        enrich_leads.enrich_leads(resume=False)
+    assert calls == ["acme.com"] * MAX_FETCH_ATTEMPTS
+    assert db.execute("SELECT fetch_failure, fetch_retryable, fetch_attempts FROM lead_enrichment").fetchall() == [
+        ("connect_timeout", 1, MAX_FETCH_ATTEMPTS)
+    ]
+
+def test_final_failure_is_not_retried(db, monkeypatch):
+    from scripts import enrich_leads
+
+    monkeypatch.setattr(enrich_leads, "prefetch_dns", lambda domains: None)
+    calls = failing_website(monkeypatch, "dns_nxdomain")
+    db.execute("INSERT INTO leads (name, email, company, message) VALUES ('Ana', 'ana@gone.example', 'Gone', 'Hi')")
+    db.commit()
+
+    enrich_leads.enrich_leads(resume=False)
+    enrich_leads.enrich_leads(resume=False)
+    assert calls == ["gone.example"]
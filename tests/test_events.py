@@ -0,0 +1,127 @@
+import asyncio
+import json
+
+import pytest
+
+from utils.events import (event_values, scored_event, read_events, follow_events, INSERT_EVENT_SQL,
+                          INGESTED, ENRICHED, SCORED)
+
+CSV = """name,email,company,message
+Ana,ana@acme.com,Acme,We need pricing
+Ben,ben@beta.io,Beta,Just looking
+Ana again,Ana+promo@acme.com,Acme,Second form
+"""
+
+def add_events(conn, *events):
+    conn.executemany(INSERT_EVENT_SQL, events)
+    conn.commit()
+
+def test_scored_event_carries_the_previous_score():
+    result = {"score": 0.9, "category": "Hot", "action": "notify_sales", "scorer_version": "v2"}
+    lead_id, event_type, payload = scored_event(7, result, "gpt", "run-1", previous=(0.4, "Cold"))
+    assert (lead_id, event_type) == (7, SCORED)
+    assert json.loads(payload) == {
+        "score": 0.9, "category": "Hot", "action": "notify_sales", "scorer": "gpt", "scorer_version": "v2",
+        "run_id": "run-1", "previous_score": 0.4, "previous_category": "Cold"
+    }
+
+def test_read_events_pages_after_a_cursor_and_filters_types(db):
+    add_events(db, event_values(1, INGESTED, email="a"), event_values(1, ENRICHED, domain="acme.com"),
+               event_values(2, INGESTED, email="b"), event_values(1, SCORED, score=0.9))
+
+    page = read_events(after=0, limit=2)
+    assert [(e["id"], e["type"]) for e in page] == [(1, INGESTED), (2, ENRICHED)]
+    assert page[1]["data"] == {"domain": "acme.com"}
+    assert [e["id"] for e in read_events(after=page[-1]["id"])] == [3, 4]
+    assert [e["lead_id"] for e in read_events(types=[INGESTED])] == [1, 2]
+    assert read_events(after=4) == []
+
+def test_ingest_writes_one_event_per_new_lead(db, tmp_path):
+    from scripts.ingest_leads import ingest_leads
+
+    path = tmp_path / "leads.csv"
+    path.write_text(CSV)
+    ingest_leads(str(path))
+    events = read_events()
+    # The third row is Ana's address again (normalized), so it is not a new lead
+    assert [(e["lead_id"], e["type"], e["data"]["email"]) for e in events] == [
+        (1, INGESTED, "ana@acme.com"), (2, INGESTED, "ben@beta.io")
+    ]
+
+def test_score_run_writes_scored_events_in_its_transaction(db, monkeypatch):
+    from scripts import score_leads
+
+    monkeypatch.setattr(score_leads, "score_lead", lambda *args, **kwargs: {
+        "score": 0.5, "category": "Warm", "action": "review", "reason": "ok", "scorer_version": "v1"
+    })
+    db.execute("INSERT INTO leads (name, email, company, message) VALUES ('Ana', 'ana@acme.com', 'Acme', 'Hi')")
+    db.commit()
+    score_leads.score_all_leads(resume=False)
+
+    (event,) = read_events(types=[SCORED])
+    run_id = db.execute("SELECT run_id FROM lead_scores").fetchone()[0]
+    assert event["lead_id"] == 1
+    assert event["data"]["category"] == "Warm" and event["data"]["run_id"] == run_id
+
+def test_follow_events_picks_up_new_events_after_catching_up(db):
+    add_events(db, event_values(1, INGESTED, email="a"))
+    feed = follow_events(poll_seconds=0)
+    assert next(feed)["id"] == 1
+    add_events(db, event_values(2, INGESTED, email="b"))
+    assert next(feed)["id"] == 2
+    feed.close()
+
+# --- SSE -------------------------------------------------------------------------------
+
+class FakeRequest:
+    def __init__(self, last_event_id=None):
+        self.headers = {"last-event-id": last_event_id} if last_event_id else {}
+
+    async def is_disconnected(self):
+        return False
+
+def sse_chunks(api, count, request, **params):
+    """The first count chunks of /events/stream"""
+    async def read():
+        response = await api.stream_events(request, **{"after": 0, "types": None, **params})
+        chunks = []
+        async for chunk in response.body_iterator:
+            chunks.append(chunk)
+            if len(chunks) == count:
+                break
+        await response.body_iterator.aclose()
+        return response, chunks
+    return asyncio.run(read())
+
+@pytest.fixture
+def api(db):
+    pytest.importorskip("fastapi")
+    import api
+    add_events(db, event_values(1, INGESTED, email="ana@acme.com"), event_values(1, SCORED, score=0.9),
+               event_values(2, INGESTED, email="ben@beta.io"))
+    return api
+
+def test_sse_frames_carry_the_event_id_type_and_json(api):
+    response, chunks = sse_chunks(api, 2, FakeRequest())
+    assert response.media_type == "text/event-stream"
+    assert chunks[0].startswith("id: 1\nevent: ingested\ndata: ")
+    assert chunks[0].endswith("\n\n")
+    assert json.loads(chunks[1].split("data: ", 1)[1]) == {
+        "id": 2, "lead_id": 1, "type": "scored", "data": {"score": 0.9},
+        "created_at": read_events(after=1, limit=1)[0]["created_at"]
+    }
+
+def test_sse_resumes_after_last_event_id(api):
+    _, chunks = sse_chunks(api, 1, FakeRequest(last_event_id="2"))
+    assert chunks[0].startswith("id: 3\nevent: ingested\n")
+
+def test_sse_filters_event_types(api):
+    _, chunks = sse_chunks(api, 1, FakeRequest(), types="scored")
+    assert chunks[0].startswith("id: 2\nevent: scored\n")
+
+def test_unknown_event_types_are_rejected(api):
+    from fastapi import HTTPException
+
+    with pytest.raises(HTTPException) as error:
+        api.parse_event_types("scored,clicked")
+    assert error.value.status_code == 400
@@ -0,0 +1,136 @@
+import pytest
+
+from utils import writer
+from utils.db import get_connection
+from utils.ai import ScoringError
+from utils.hot_leads import (predict_hot, provisional_values, follow_up_values, retract, INSERT_ALERT_SQL,
+                             PROVISIONAL, CONFIRMED, RETRACTED)
+
+HOT_MESSAGE = "We want pricing and a demo for our sales team rollout next quarter"
+HOT = {"score": 0.9, "category": "Hot", "action": "notify_sales", "reason": "Clear buying intent"}
+WARM = {"score": 0.5, "category": "Warm", "action": "review", "reason": "Just browsing"}
+
+def test_business_email_with_buying_intent_is_predicted_hot():
+    assert predict_hot("ana@acme.com", HOT_MESSAGE) == "Provisional: business domain and 4 buying-intent keywords"
+    assert provisional_values("ana@acme.com", HOT_MESSAGE)[:3] == (PROVISIONAL, None, "Hot")
+
+@pytest.mark.parametrize("email, message, min_intent", [
+    ("ana@gmail.com", HOT_MESSAGE, 2),
+    ("ana@mailinator.com", HOT_MESSAGE, 2),
+    ("ana@acme.com", "pricing and a demo please", 2),
+    ("ana@acme.com", "We would like to hear more about pricing for our company soon", 2),
+    ("ana@acme.com", HOT_MESSAGE, 5),
+    ("ana@acme.com", HOT_MESSAGE, 0),
+])
+def test_hot_prediction_thresholds(email, message, min_intent):
+    assert predict_hot(email, message, min_intent=min_intent) is None
+
+def test_follow_up_confirms_hot_and_retracts_anything_else():
+    assert follow_up_values(HOT) == (CONFIRMED, 0.9, "Hot", "Clear buying intent")
+    assert follow_up_values(WARM) == (RETRACTED, 0.5, "Warm", "Scored Warm: Just browsing")
+
+def test_retract_notifies_sales(capsys):
+    assert retract("ana@acme.com", "scoring failed") == (RETRACTED, None, None, "Not processed: scoring failed")
+    assert "[SALES ALERT - RETRACTED] ana@acme.com" in capsys.readouterr().out
+
+# --- batch follow-up -------------------------------------------------------------
+
+def alerts(conn):
+    return conn.execute("SELECT lead_id, email, kind FROM lead_alerts ORDER BY id").fetchall()
+
+@pytest.fixture
+def batch(db, monkeypatch):
+    """score_all_leads with a stubbed LLM; returns (set the LLM result, sent notifications)"""
+    from scripts import score_leads
+
+    result = {}
+    sent = []
+    monkeypatch.setattr(score_leads, "score_lead", lambda *args, **kwargs: dict(result["value"]))
+    # Records whether the follow-up row was committed when the notification went out
+    monkeypatch.setattr(score_leads, "notify",
+                        lambda kind, email, reason: sent.append((kind, email, last_committed_kind())))
+
+    def run(ai_result):
+        result["value"] = ai_result
+        score_leads.score_all_leads(resume=False)
+    return run, sent
+
+def last_committed_kind():
+    conn = get_connection()
+    try:
+        return alerts(conn)[-1][2]
+    finally:
+        conn.close()
+
+def add_lead(conn, email, provisional):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO leads (name, email, company, message) VALUES ('Ana', ?, 'Acme', ?)",
+                   (email, HOT_MESSAGE))
+    if provisional:
+        cursor.execute(INSERT_ALERT_SQL, (cursor.lastrowid, *provisional_values(email, HOT_MESSAGE)))
+    conn.commit()
+
+@pytest.mark.parametrize("ai_result, kind", [(HOT, CONFIRMED), (WARM, RETRACTED)])
+def test_scored_lead_confirms_or_retracts_its_provisional_alert(db, batch, ai_result, kind):
+    run, sent = batch
+    add_lead(db, "ana@acme.com", provisional=True)
+    run(ai_result)
+    assert alerts(db) == [(1, None, PROVISIONAL), (1, None, kind)]
+    assert sent == [(kind, "ana@acme.com", kind)]
+
+def test_no_follow_up_without_a_provisional_alert(db, batch):
+    run, sent = batch
+    add_lead(db, "ana@acme.com", provisional=False)
+    run(HOT)
+    assert alerts(db) == [] and sent == []
+
+# --- API: retraction when the submission fails ---------------------------------
+
+@pytest.fixture
+def api(db, monkeypatch):
+    pytest.importorskip("fastapi")
+    import api
+
+    monkeypatch.delenv("WRITER_ADDRESS", raising=False)
+    monkeypatch.setattr(writer, "_writer", None)
+    monkeypatch.setattr(api, "build_enrichment", lambda domain: {
+        "website_exists": True, "signals": {"has_pricing": 0, "has_careers": 0, "mentions_ai": 0},
+        "summary": "Website exists: True", "fetch_failure": None, "fetch_retryable": False, "fetch_attempts": 1
+    })
+    return api
+
+def submit(api):
+    return api.submit_lead(api.LeadSubmission(name="Ana", email="ana@acme.com", company="Acme", message=HOT_MESSAGE))
+
+def test_api_confirms_once_the_lead_is_stored(db, api, monkeypatch):
+    monkeypatch.setattr(api, "score_lead", lambda *args, **kwargs: dict(HOT))
+    assert submit(api).category == "Hot"
+    assert alerts(db) == [(1, None, PROVISIONAL), (1, None, CONFIRMED)]
+
+@pytest.mark.parametrize("error, status, reason", [
+    (ScoringError("Malformed response"), 502, "Not processed: scoring failed: Malformed response"),
+    (RuntimeError("disk full"), 500, "Not processed: processing error: disk full"),
+])
+def test_api_retracts_the_provisional_alert_when_the_lead_fails(db, api, monkeypatch, error, status, reason):
+    from fastapi import HTTPException
+
+    def score_lead(*args, **kwargs):
+        raise error
+    monkeypatch.setattr(api, "score_lead", score_lead)
+
+    with pytest.raises(HTTPException) as response:
+        submit(api)
+    assert response.value.status_code == status
+    assert alerts(db) == [(None, "ana@acme.com", PROVISIONAL), (None, "ana@acme.com", RETRACTED)]
+    assert db.execute("SELECT reason FROM lead_alerts WHERE kind = ?", (RETRACTED,)).fetchone() == (reason,)
+    assert db.execute("SELECT COUNT(*) FROM leads").fetchone() == (0,)
+
+def test_api_duplicate_email_retracts_nothing_it_never_sent(db, api, monkeypatch):
+    from fastapi import HTTPException
+
+    monkeypatch.setattr(api, "score_lead", lambda *args, **kwargs: dict(HOT))
+    submit(api)
+    with pytest.raises(HTTPException) as response:
+        submit(api)
+    assert response.value.status_code == 400
+    assert [kind for _, _, kind in alerts(db)] == [PROVISIONAL, CONFIRMED]
@@ -0,0 +1,107 @@
+import asyncio
+
+from utils.events import INSERT_EVENT_SQL, INGESTED, SCORED, event_values, read_events
+from utils.live_metrics import LiveMetrics, lead_metrics, apply_events, metrics_view
+
+def add_lead(conn, name, score=None, category=None):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO leads (name, email, company, message) VALUES (?, ?, 'Acme', 'Hi')",
+                   (name, f"{name.lower()}@acme.com"))
+    lead_id = cursor.lastrowid
+    cursor.execute(INSERT_EVENT_SQL, event_values(lead_id, INGESTED, email=f"{name.lower()}@acme.com"))
+    if category:
+        rescore(conn, lead_id, score, category)
+    conn.commit()
+    return lead_id
+
+def rescore(conn, lead_id, score, category):
+    previous = conn.execute("""
+        SELECT score, category FROM lead_scores WHERE lead_id = ? ORDER BY id DESC LIMIT 1
+    """, (lead_id,)).fetchone()
+    conn.execute("INSERT INTO lead_scores (lead_id, score, category) VALUES (?, ?, ?)", (lead_id, score, category))
+    conn.execute(INSERT_EVENT_SQL, event_values(
+        lead_id, SCORED, score=score, category=category,
+        **({"previous_score": previous[0], "previous_category": previous[1]} if previous else {})
+    ))
+    conn.commit()
+
+def test_lead_metrics_count_each_lead_once_by_its_latest_score(db):
+    add_lead(db, "Ana", 0.9, "Hot")
+    ben = add_lead(db, "Ben", 0.3, "Cold")
+    add_lead(db, "Cy")
+    rescore(db, ben, 0.6, "Warm")
+
+    after, totals = lead_metrics(db)
+    assert after == 6
+    assert metrics_view(totals) == {"total_leads": 3, "hot_leads": 1, "warm_leads": 1, "cold_leads": 0,
+                                    "avg_score": 0.75}
+
+def test_applying_events_matches_a_fresh_aggregate(db):
+    _, start = lead_metrics(db)
+    ana = add_lead(db, "Ana", 0.9, "Hot")
+    ben = add_lead(db, "Ben", 0.3, "Cold")
+    rescore(db, ana, 0.5, "Warm")
+    rescore(db, ben, 0.2, "Cold")
+
+    apply_events(start, read_events())
+    assert start == lead_metrics(db)[1]
+
+def collect(live, count, timeout=0.2, between=None):
+    """The first count values one subscriber sees; between(i) runs after the i-th value"""
+    async def run():
+        seen = []
+        updates = live.updates(timeout=timeout)
+        async for value in updates:
+            seen.append(value)
+            if len(seen) == count:
+                break
+            if between:
+                between(len(seen))
+        await updates.aclose()
+        await asyncio.sleep(live.poll_seconds * 3)
+        return seen
+    return asyncio.run(run())
+
+def test_subscriber_gets_current_metrics_then_each_change(db):
+    add_lead(db, "Ana", 0.9, "Hot")
+    live = LiveMetrics(poll_seconds=0.01, resync_seconds=0)
+
+    def between(i):
+        add_lead(db, "Ben", 0.3, "Cold")
+
+    seen = collect(live, 2, timeout=1, between=between)
+    assert seen == [
+        {"total_leads": 1, "hot_leads": 1, "warm_leads": 0, "cold_leads": 0, "avg_score": 0.9},
+        {"total_leads": 2, "hot_leads": 1, "warm_leads": 0, "cold_leads": 1, "avg_score": 0.6},
+    ]
+    assert live.subscribers == 0
+
+def test_idle_stream_yields_keep_alives(db):
+    live = LiveMetrics(poll_seconds=0.01, resync_seconds=0)
+    seen = collect(live, 3, timeout=0.05)
+    assert seen[0]["total_leads"] == 0
+    assert seen[1:] == [None, None]
+
+def test_resyncs_do_not_republish_an_unchanged_view(db):
+    live = LiveMetrics(poll_seconds=0.01, resync_seconds=0.02)
+    seen = collect(live, 3, timeout=0.1)
+    assert live.version == 1
+    assert seen[1:] == [None, None]
+
+def test_resync_corrects_totals_the_event_cursor_missed(db):
+    add_lead(db, "Ana", 0.9, "Hot")
+    live = LiveMetrics(poll_seconds=0.01, resync_seconds=0.05)
+
+    def between(i):
+        if i == 1:
+            # A row written without an event (as a late Postgres commit would look)
+            db.execute("INSERT INTO leads (name, email, company, message) VALUES ('Ben', 'ben@acme.com', 'Acme', 'Hi')")
+            db.commit()
+
+    seen = collect(live, 2, timeout=1, between=between)
+    assert [view["total_leads"] for view in seen] == [1, 2]
+
+def test_follower_stops_without_subscribers(db):
+    live = LiveMetrics(poll_seconds=0.01, resync_seconds=0)
+    collect(live, 1)
+    assert live._task is None
@@ -0,0 +1,142 @@
+from datetime import date
+
+import pytest
+
+from mcp_lead_query.planner import plan_question
+from utils.companies import CompanyResolver, company_key
+from utils.validators import normalize_email
+
+TODAY = date(2026, 5, 10)
+
+# name, email, company, created_at, scores oldest first, enrichment (domain, mentions_ai)
+LEADS = [
+    ("Ana", "ana@acme.com", "Acme", "2026-05-08 10:00:00", [(0.9, "Hot")], ("acme.com", 1)),
+    ("Ben", "ben@acme.com", "Acme Inc", "2026-04-28 09:00:00", [(0.4, "Cold"), (0.85, "Hot")], ("acme.com", 0)),
+    ("Cara", "cara@beta.io", "Beta", "2026-03-15 12:00:00", [(0.6, "Warm")], ("beta.io", 0)),
+    # Same name as Ana's company, different business domain: another company
+    ("Dan", "dan@acme.org", "Acme", "2025-12-20 08:00:00", [(0.7, "Warm")], ("acme.org", 0)),
+    ("Eve", "eve@gmail.com", "Personal", "2025-10-05 16:00:00", [(0.2, "Cold")], None),
+    ("Finn", "finn@beta.io", "Beta", "2026-02-15 18:00:00", [], ("beta.io", 1)),
+]
+
+@pytest.fixture
+def leads_db(db):
+    cursor = db.cursor()
+    companies = CompanyResolver(cursor)
+    for name, email, company, created_at, scores, enrichment in LEADS:
+        cursor.execute(
+            "INSERT INTO leads (name, email, company, message, email_key, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (name, email, company, "", normalize_email(email).email, created_at)
+        )
+        lead_id = cursor.lastrowid
+        companies.link_lead(lead_id, company, email)
+        for score, category in scores:
+            cursor.execute("INSERT INTO lead_scores (lead_id, score, category) VALUES (?, ?, ?)",
+                           (lead_id, score, category))
+        if enrichment:
+            cursor.execute("INSERT INTO lead_enrichment (lead_id, domain, mentions_ai) VALUES (?, ?, ?)",
+                           (lead_id, *enrichment))
+    db.commit()
+    return db
+
+def resolver(conn):
+    """The MCP server's company lookup, on the test database"""
+    def resolve(name):
+        row = conn.execute("SELECT company_id FROM company_aliases WHERE alias = ?",
+                           (f"name:{company_key(name)}",)).fetchone()
+        return row[0] if row else None
+    return resolve
+
+def run(conn, question, today=TODAY, resolve=False):
+    plan = plan_question(question, resolver(conn) if resolve else None, today=today)
+    assert plan.understood
+    return plan, conn.execute(plan.sql, plan.params).fetchall()
+
+def names(rows):
+    """Lead names of a list query (newest first)"""
+    return [row[0] for row in rows]
+
+def test_last_month_in_january_is_december_of_the_previous_year(leads_db):
+    _, rows = run(leads_db, "leads from last month", today=date(2026, 1, 15))
+    assert names(rows) == ["Dan"]
+
+def test_in_month_already_reached_this_year_is_this_year(leads_db):
+    _, rows = run(leads_db, "leads in march")
+    assert names(rows) == ["Cara"]
+
+def test_in_month_not_reached_yet_is_last_year(leads_db):
+    _, rows = run(leads_db, "leads in october")
+    assert names(rows) == ["Eve"]
+
+def test_between_dates_includes_the_end_date(leads_db):
+    _, rows = run(leads_db, "leads between 2026-02-01 and 2026-02-15")
+    assert names(rows) == ["Finn"]
+
+def test_past_three_months_is_a_rolling_window_through_today(leads_db):
+    # Ben was Cold first; only his latest score counts
+    _, rows = run(leads_db, "hot leads from the past 3 months", today=date(2026, 5, 31))
+    assert names(rows) == ["Ana", "Ben"]
+
+def test_list_shows_the_latest_score(leads_db):
+    _, rows = run(leads_db, "latest 2 leads")
+    assert [(row[0], row[3], row[4]) for row in rows] == [("Ana", "Hot", 0.9), ("Ben", "Hot", 0.85)]
+
+def test_top_companies_by_average_score_keep_same_named_companies_apart(leads_db):
+    plan, rows = run(leads_db, "top 5 companies by average score")
+    assert plan.kind == "grouped"
+    assert [(company, round(score, 3)) for company, score in rows] == [
+        ("Acme", 0.875), ("Acme", 0.7), ("Beta", 0.6), ("Personal", 0.2)
+    ]
+
+def test_company_name_ends_at_a_stop_word(leads_db):
+    _, rows = run(leads_db, "leads from beta by category")
+    assert sorted(rows, key=str) == sorted([(None, 1), ("Warm", 1)], key=str)
+
+def test_company_name_ends_where_a_date_phrase_starts(leads_db):
+    _, rows = run(leads_db, "leads from acme last week")
+    assert names(rows) == ["Ben"]
+
+def test_company_name_stops_at_function_words(leads_db):
+    _, rows = run(leads_db, "leads from the AI team at acme")
+    assert names(rows) == ["Ana"]
+
+def test_resolved_company_filters_by_company_id(leads_db):
+    # Dan's "Acme" is a different company (acme.org), so only a name match would include him
+    _, rows = run(leads_db, "leads from acme corp", resolve=True)
+    assert names(rows) == ["Ana", "Ben"]
+    _, rows = run(leads_db, "leads from acme")
+    assert names(rows) == ["Ana", "Ben", "Dan"]
+
+def test_and_between_company_names_matches_either_company(leads_db):
+    _, rows = run(leads_db, "leads from acme inc and beta by category", resolve=True)
+    assert sorted(rows, key=str) == sorted([("Hot", 2), ("Warm", 1), (None, 1)], key=str)
+
+def test_and_before_a_category_is_not_a_second_company(leads_db):
+    _, rows = run(leads_db, "leads from acme and hot")
+    assert names(rows) == ["Ana", "Ben"]
+
+def test_email_is_one_token_matched_on_its_normalized_form(leads_db):
+    plan, rows = run(leads_db, "leads from Ben+promo@Acme.com")
+    assert names(rows) == ["Ben"]
+    assert "LIKE" not in plan.sql
+
+def test_percent_score_threshold_is_scaled_to_the_0_1_range(leads_db):
+    _, rows = run(leads_db, "leads scored over 80")
+    assert names(rows) == ["Ana", "Ben"]
+    _, rows = run(leads_db, "leads with score at least 0.7")
+    assert names(rows) == ["Ana", "Ben", "Dan"]
+
+def test_count_by_day_lists_the_newest_days_first(leads_db):
+    _, rows = run(leads_db, "count leads by day")
+    assert rows[0] == ("2026-05-08", 1)
+    assert [row[0] for row in rows] == sorted((row[0] for row in rows), reverse=True)
+
+def test_how_many_counts_leads_by_latest_category(leads_db):
+    plan, rows = run(leads_db, "how many hot leads")
+    assert plan.kind == "aggregate"
+    assert rows == [(2,)]
+
+def test_unrelated_question_is_not_understood():
+    plan = plan_question("what is the weather like", today=TODAY)
+    assert not plan.understood
+    assert plan.params == (50,)
@@ -0,0 +1,66 @@
+import pytest
+
+from utils.prescore import prescore_lead, PRESCORER_NAME
+
+NO_SIGNALS = {"has_pricing": 0, "has_careers": 0, "mentions_ai": 0}
+PRICING = {"has_pricing": 1, "has_careers": 0, "mentions_ai": 0}
+QUESTION = "Could you tell me more about what you do?"
+
+def test_one_cold_signal_is_not_confident_enough_to_skip_the_llm():
+    assert prescore_lead("ana@gmail.com", QUESTION, False, NO_SIGNALS) is None
+    result = prescore_lead("ana@gmail.com", QUESTION, False, NO_SIGNALS, threshold=0.6)
+    assert result["confidence"] == 0.6
+    assert result["reason"] == "Pre-scored locally: public email domain"
+
+def test_disposable_domain_counts_as_one_signal():
+    assert prescore_lead("ana@mailinator.com", QUESTION, False, NO_SIGNALS) is None
+    result = prescore_lead("ana@mailinator.com", QUESTION, False, NO_SIGNALS, threshold=0.6)
+    assert result["reason"] == "Pre-scored locally: disposable email domain"
+
+def test_two_cold_signals_skip_the_llm():
+    result = prescore_lead("ana@acme.com", "hi", False, NO_SIGNALS)
+    assert result["category"] == "Cold"
+    assert result["confidence"] == 0.9
+    assert result["scorer_version"] == PRESCORER_NAME
+    assert result["reason"] == "Pre-scored locally: no company website, empty message"
+
+def test_public_email_with_an_empty_message_skips_the_llm():
+    result = prescore_lead("ana@mailinator.com", "", False, NO_SIGNALS)
+    assert result["confidence"] == 0.9
+    assert result["reason"] == "Pre-scored locally: disposable email domain, empty message"
+
+def test_any_buying_intent_keeps_a_cold_looking_lead_for_the_llm():
+    assert prescore_lead("ana@gmail.com", "demo", False, NO_SIGNALS) is None
+
+def test_retryable_fetch_failure_is_not_a_missing_website():
+    assert prescore_lead("ana@acme.com", "hi", False, NO_SIGNALS, fetch_retryable=True) is None
+
+@pytest.mark.parametrize("threshold, skipped", [(0.9, True), (0.91, False)])
+def test_cold_skip_boundary_is_inclusive(threshold, skipped):
+    result = prescore_lead("ana@acme.com", "hi", False, NO_SIGNALS, threshold=threshold)
+    assert (result is not None) == skipped
+
+@pytest.mark.parametrize("message, signals, confidence", [
+    ("We need pricing and a demo", PRICING, None),
+    ("We need pricing, a demo and a quote", PRICING, 0.85),
+    ("We need pricing and a demo", {**PRICING, "mentions_ai": 1}, 0.85),
+    ("We need pricing, a demo, a quote and a trial", {**PRICING, "mentions_ai": 1}, 0.95),
+])
+def test_hot_confidence_grows_with_intent_and_ai(message, signals, confidence):
+    result = prescore_lead("ana@acme.com", message, True, signals)
+    if confidence is None:
+        assert result is None
+    else:
+        assert result["category"] == "Hot"
+        assert result["confidence"] == pytest.approx(confidence)
+
+def test_hot_needs_a_business_domain_and_a_pricing_page():
+    message = "We need pricing, a demo and a quote"
+    assert prescore_lead("ana@gmail.com", message, True, PRICING) is None
+    assert prescore_lead("ana@acme.com", message, True, NO_SIGNALS) is None
+
+@pytest.mark.parametrize("threshold, skipped", [(0.85, True), (0.86, False)])
+def test_hot_skip_boundary_is_inclusive(threshold, skipped):
+    result = prescore_lead("ana@acme.com", "We need pricing and a demo", True,
+                           {**PRICING, "mentions_ai": 1}, threshold=threshold)
+    assert (result is not None) == skipped
@@ -0,0 +1,67 @@
+import sqlite3
+import tracemalloc
+
+import pytest
+
+from utils.records import LeadRow, ScoreRecord, record_type, iter_records
+
+def test_construction_by_position_reads_by_name_index_and_get():
+    lead = LeadRow("Ana", "ana@acme.com", "Acme", "Pricing?")
+    assert lead.email == lead["email"] == lead[1] == lead.get("email") == "ana@acme.com"
+    assert lead.get("missing", "-") == "-"
+    assert "company" in lead and "missing" not in lead
+    with pytest.raises(KeyError):
+        lead["missing"]
+
+def test_wrong_number_of_values_is_a_type_error():
+    with pytest.raises(TypeError):
+        ScoreRecord(0.9, "Hot")
+    with pytest.raises(TypeError):
+        LeadRow("Ana", "ana@acme.com", "Acme")
+
+def test_tuple_round_trip():
+    row = ("Ana", "ana@acme.com", "Acme", "Pricing?")
+    lead = LeadRow(*row)
+    name, email, company, message = lead
+    assert tuple(lead) == row and len(lead) == 4
+    assert LeadRow(*tuple(lead)) == lead
+    assert lead.as_dict() == {"name": "Ana", "email": "ana@acme.com", "company": "Acme", "message": "Pricing?"}
+    assert repr(lead) == "LeadRow(name='Ana', email='ana@acme.com', company='Acme', message='Pricing?')"
+
+def test_equal_records_hash_alike_and_types_do_not_mix():
+    columns = ("name", "email", "company", "message")
+    a = LeadRow("Ana", "ana@acme.com", "Acme", "")
+    b = LeadRow("Ana", "ana@acme.com", "Acme", "")
+    assert a == b and hash(a) == hash(b)
+    assert len({a, b}) == 1
+    assert a != tuple(a)
+    assert a != record_type(columns)(*a)
+
+def test_record_type_is_shared_per_column_list():
+    assert record_type(["id", "email"]) is record_type(("id", "email"))
+
+def test_iter_records_names_rows_after_the_columns():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE leads (id INTEGER, email TEXT)")
+    conn.executemany("INSERT INTO leads VALUES (?, ?)", [(1, "a@x.com"), (2, "b@x.com"), (3, "c@x.com")])
+
+    rows = list(iter_records(conn.execute("SELECT id, email FROM leads ORDER BY id"), size=2))
+    assert [row.email for row in rows] == ["a@x.com", "b@x.com", "c@x.com"]
+    # COUNT(*) and names such as get cannot be fields; those rows are dicts
+    assert list(iter_records(conn.execute("SELECT COUNT(*) FROM leads"))) == [{"COUNT(*)": 3}]
+    assert list(iter_records(conn.execute("SELECT id AS get FROM leads WHERE id = 1"))) == [{"get": 1}]
+
+def retained_bytes(build):
+    tracemalloc.start()
+    rows = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return current
+
+def test_records_take_less_memory_than_dict_rows():
+    columns = ("name", "email", "company", "message")
+    source = [(f"Lead {i}", f"lead.{i}@example.com", "Acme", "Hello") for i in range(10_000)]
+    dict_bytes = retained_bytes(lambda: [dict(zip(columns, row)) for row in source])
+    record_bytes = retained_bytes(lambda: [LeadRow(*row) for row in source])
+    assert record_bytes < dict_bytes / 2
@@ -0,0 +1,119 @@
+import threading
+
+import pytest
+
+from scripts import rescore_leads
+from utils.ai import SCORER_VERSION, MODEL_NAME
+from utils.dedup import DUPLICATE_SCORER
+from utils.throttle import RateLimiter
+
+OLD_VERSION = "gpt-3.5-turbo:r0:00000000"
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Stub score_lead; returns the names it was called with, in call order"""
+    calls = []
+    lock = threading.Lock()
+
+    def score_lead(name, *args, **kwargs):
+        with lock:
+            calls.append(name)
+        return {"score": 0.7, "category": "Warm", "action": "review", "reason": "re-scored",
+                "scorer_version": SCORER_VERSION}
+
+    monkeypatch.setattr(rescore_leads, "score_lead", score_lead)
+    return calls
+
+def add_scored_lead(conn, name, version=OLD_VERSION, duplicate_of=None):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO leads (name, email, company, message) VALUES (?, ?, 'Acme', 'Hi')",
+                   (name, f"{name.lower()}@acme.com"))
+    lead_id = cursor.lastrowid
+    cursor.execute("INSERT INTO lead_scores (lead_id, score, category, scorer, scorer_version) VALUES (?, 0.3, 'Cold', ?, ?)",
+                   (lead_id, MODEL_NAME, version))
+    if duplicate_of:
+        cursor.execute("INSERT INTO lead_duplicates (lead_id, duplicate_of, similarity) VALUES (?, ?, 0.9)",
+                       (lead_id, duplicate_of))
+    conn.commit()
+    return lead_id
+
+def latest_scorers(conn):
+    return dict(conn.execute("""
+        SELECT l.name, s.scorer FROM leads l
+        JOIN lead_scores s ON s.id = (SELECT MAX(id) FROM lead_scores WHERE lead_id = l.id)
+    """).fetchall())
+
+def test_stale_leads_are_rescored_newest_first(db, llm):
+    for name in ("Ana", "Ben", "Cara"):
+        add_scored_lead(db, name)
+    add_scored_lead(db, "Dan", version=SCORER_VERSION)
+
+    counts = rescore_leads.rescore_stale_leads(workers=1, rate=0)
+    assert llm == ["Cara", "Ben", "Ana"]
+    assert counts["llm_calls"] == 3
+    assert rescore_leads.stale_counts() == {}
+
+def test_stale_counts_group_by_version(db):
+    add_scored_lead(db, "Ana")
+    add_scored_lead(db, "Ben")
+    add_scored_lead(db, "Cara", version=None)
+    add_scored_lead(db, "Dan", version=SCORER_VERSION)
+    assert rescore_leads.stale_counts() == {OLD_VERSION: 2, None: 1}
+
+def test_duplicates_wait_for_their_original_and_then_inherit(db, llm):
+    original = add_scored_lead(db, "Ana")
+    add_scored_lead(db, "Ben")
+    add_scored_lead(db, "Cy", duplicate_of=original)
+
+    counts = rescore_leads.rescore_stale_leads(workers=1, rate=0)
+    # Cy is read first but its original is still stale, so Cy waits for the next pass
+    assert llm == ["Ben", "Ana"]
+    assert (counts["llm_calls"], counts["inherited"], counts["deferred"]) == (2, 1, 0)
+    assert latest_scorers(db) == {"Ana": MODEL_NAME, "Ben": MODEL_NAME, "Cy": DUPLICATE_SCORER}
+
+def test_duplicate_of_an_unscored_original_is_scored_itself(db, llm):
+    cursor = db.cursor()
+    cursor.execute("INSERT INTO leads (name, email, company, message) VALUES ('Ana', 'ana@acme.com', 'Acme', 'Hi')")
+    add_scored_lead(db, "Cy", duplicate_of=cursor.lastrowid)
+
+    rescore_leads.rescore_stale_leads(workers=1, rate=0)
+    assert llm == ["Cy"]
+
+def test_limit_stops_a_canary_batch(db, llm):
+    for name in ("Ana", "Ben", "Cara"):
+        add_scored_lead(db, name)
+    rescore_leads.rescore_stale_leads(workers=2, rate=0, limit=2)
+    assert sorted(llm) == ["Ben", "Cara"]
+    assert rescore_leads.stale_counts() == {OLD_VERSION: 1}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 3))
+        self.now += seconds
+
+def test_rate_limiter_allows_a_burst_then_spaces_calls(monkeypatch):
+    from utils import throttle
+
+    clock = FakeClock()
+    monkeypatch.setattr(throttle, "time", clock)
+    limiter = RateLimiter(rate=10, burst=2)
+    for _ in range(4):
+        limiter.acquire()
+    assert clock.sleeps == [0.1, 0.1]
+
+def test_rate_limiter_without_a_rate_never_waits(monkeypatch):
+    from utils import throttle
+
+    clock = FakeClock()
+    monkeypatch.setattr(throttle, "time", clock)
+    limiter = RateLimiter(rate=0)
+    for _ in range(100):
+        limiter.acquire()
+    assert clock.sleeps == []
@@ -0,0 +1,120 @@
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+
+from utils import scheduler
+from utils.scheduler import INTERACTIVE, BATCH, BACKFILL, PRIORITIES, Scheduler, RemoteScheduler
+
+# 4 slots: interactive may use all 4, batch and backfill together 2, backfill alone 1
+SHARES = {INTERACTIVE: 1.0, BATCH: 0.5, BACKFILL: 0.25}
+
+def enqueue(sched, priority):
+    """Add a waiter the way acquire() does and run one dispatch pass"""
+    sched.tickets += 1
+    entry = [PRIORITIES.index(priority), sched.tickets, False]
+    sched.waiting.append(entry)
+    with sched.cond:
+        sched._dispatch()
+    return entry
+
+def release(sched, priority):
+    sched.release(priority)
+
+def granted(entries):
+    return sum(1 for entry in entries if entry[2])
+
+def test_caps_limit_each_class_and_the_classes_below_it():
+    sched = Scheduler(slots=4, rate=0, shares=SHARES)
+    assert sched.caps == {INTERACTIVE: 4, BATCH: 2, BACKFILL: 1}
+
+    backfill = [enqueue(sched, BACKFILL) for _ in range(3)]
+    assert granted(backfill) == 1
+
+    # Backfill counts against the batch share too
+    batch = [enqueue(sched, BATCH) for _ in range(3)]
+    assert granted(batch) == 1
+    assert sched.active == {INTERACTIVE: 0, BATCH: 1, BACKFILL: 1}
+
+def test_interactive_takes_the_slots_lower_classes_cannot_use():
+    sched = Scheduler(slots=4, rate=0, shares=SHARES)
+    for _ in range(5):
+        enqueue(sched, BATCH)
+    for _ in range(5):
+        enqueue(sched, BACKFILL)
+    assert sched.active[BATCH] + sched.active[BACKFILL] == 2
+
+    interactive = [enqueue(sched, INTERACTIVE) for _ in range(2)]
+    assert granted(interactive) == 2
+    assert sum(sched.active.values()) == 4
+
+def test_freed_slot_goes_to_the_highest_waiting_class():
+    sched = Scheduler(slots=2, rate=0, shares={INTERACTIVE: 1.0, BATCH: 1.0, BACKFILL: 1.0})
+    enqueue(sched, BACKFILL)
+    enqueue(sched, BACKFILL)
+    backfill = enqueue(sched, BACKFILL)
+    batch = enqueue(sched, BATCH)
+    interactive = enqueue(sched, INTERACTIVE)
+    assert not (backfill[2] or batch[2] or interactive[2])
+
+    release(sched, BACKFILL)
+    assert interactive[2] and not batch[2] and not backfill[2]
+    release(sched, BACKFILL)
+    assert batch[2] and not backfill[2]
+
+def test_lower_class_does_not_jump_a_rate_blocked_higher_waiter():
+    sched = Scheduler(slots=4, rate=10, shares={INTERACTIVE: 1.0, BATCH: 0.5, BACKFILL: 0.5})
+    sched.class_rates[BATCH].tokens = 0
+    batch = enqueue(sched, BATCH)
+    backfill = enqueue(sched, BACKFILL)
+    assert not batch[2]
+    # Backfill spends from the batch share as well, so it waits behind batch
+    assert not backfill[2]
+    assert enqueue(sched, INTERACTIVE)[2]
+
+def test_acquire_and_release_from_threads():
+    sched = Scheduler(slots=2, rate=0, shares=SHARES)
+    sched.acquire(INTERACTIVE)
+    sched.acquire(INTERACTIVE)
+
+    done = threading.Event()
+
+    def waiter():
+        sched.acquire(BATCH)
+        done.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    assert not done.wait(0.1)
+    sched.release(INTERACTIVE)
+    assert done.wait(2)
+    thread.join()
+    assert sched.active == {INTERACTIVE: 1, BATCH: 1, BACKFILL: 0}
+
+def test_address_without_authkey_runs_unscheduled(monkeypatch):
+    monkeypatch.setenv("LLM_SCHEDULER_ADDRESS", "127.0.0.1:1")
+    monkeypatch.delenv("LLM_SCHEDULER_AUTHKEY", raising=False)
+    monkeypatch.setattr(scheduler, "_scheduler", None)
+
+    with scheduler.llm_slot(INTERACTIVE):
+        pass
+    assert isinstance(scheduler.get_scheduler(), RemoteScheduler)
+
+def test_wrong_authkey_runs_unscheduled():
+    listener = Listener(("127.0.0.1", 0), authkey=b"right-key")
+
+    def accept():
+        try:
+            listener.accept()
+        except AuthenticationError:
+            pass
+
+    thread = threading.Thread(target=accept, daemon=True)
+    thread.start()
+    try:
+        remote = RemoteScheduler(listener.address, b"wrong-key")
+        remote.acquire(BATCH)
+        assert remote.local.granted is False
+        remote.release(BATCH)
+    finally:
+        thread.join(2)
+        listener.close()
@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+
+from utils import shadow, writer
+from utils.ai import ScoringError
+from utils.shadow import ShadowScorer, INSERT_SHADOW_SQL, sampled, shadow_report
+
+LEAD = ("Ana", "ana@acme.com", "Acme", "We need pricing", "web=yes")
+PRIMARY = {"score": 0.8, "category": "Hot", "scorer_version": "primary-v1", "usage": {"latency_ms": 900.0}}
+
+@pytest.fixture
+def local_writer(db, monkeypatch):
+    """Shadow results written inline to the test database"""
+    monkeypatch.delenv("WRITER_ADDRESS", raising=False)
+    monkeypatch.setattr(writer, "_writer", None)
+    return db
+
+def test_sampling_is_deterministic_per_email():
+    assert not sampled("ana@acme.com", rate=0)
+    assert sampled("ana@acme.com", rate=1)
+    assert sampled("Ana@Acme.com", rate=0.5) == sampled("ana@acme.com", rate=0.5)
+
+def test_sample_rate_picks_about_that_share_of_leads():
+    picked = sum(sampled(f"lead.{i}@example.com", rate=0.1) for i in range(5000))
+    assert 400 <= picked <= 600
+
+def shadow_row(category, score, primary_category="Hot", primary_score=0.8, latency=500.0, cost=0.001, error=None,
+               version="candidate-v2"):
+    return (1, "gpt-4o-mini", version, score, category, "review", "reason", error,
+            100, 20, latency, cost, "primary-v1", primary_score, primary_category, 900.0)
+
+def test_report_shows_agreement_drift_and_cost(db):
+    db.executemany(INSERT_SHADOW_SQL, [
+        shadow_row("Hot", 0.9),
+        shadow_row("Hot", 0.7),
+        shadow_row("Warm", 0.5, latency=700.0),
+        shadow_row("Cold", 0.2, primary_category="Cold", primary_score=0.1),
+        shadow_row(None, None, latency=None, error="Malformed response"),
+        shadow_row("Hot", 0.8, version="candidate-v3"),
+    ])
+    db.commit()
+
+    report = shadow_report(db)
+    v2 = report["candidate-v2"]
+    assert (v2["compared"], v2["errors"]) == (4, 1)
+    assert v2["category_agreement"] == 0.75
+    assert v2["confusion"] == {"Cold->Cold": 1, "Hot->Hot": 2, "Hot->Warm": 1}
+    assert v2["mean_score_shift"] == pytest.approx(-0.05)
+    assert v2["mean_abs_score_diff"] == pytest.approx(0.15)
+    assert v2["latency_ms"] == {"p50": 500.0, "p95": 700.0}
+    assert v2["cost_usd"] == pytest.approx(0.005)
+    assert v2["primary_versions"] == ["primary-v1"]
+    assert report["candidate-v3"]["category_agreement"] == 1.0
+
+def test_candidate_results_and_errors_are_saved_next_to_the_primary(local_writer, monkeypatch):
+    def score_lead(name, *args, model, system_prompt, priority):
+        if name == "Ben":
+            raise ScoringError("Malformed response: no JSON", attempts=3,
+                               usage={"prompt_tokens": 300, "completion_tokens": 60})
+        return {"score": 0.6, "category": "Warm", "action": "review", "reason": "maybe",
+                "usage": {"prompt_tokens": 100, "completion_tokens": 20, "latency_ms": 400.0}}
+
+    monkeypatch.setattr(shadow, "score_lead", score_lead)
+    scorer = ShadowScorer("gpt-4o-mini", "Score this lead", rate=0)
+    assert scorer.submit(1, LEAD, PRIMARY)
+    assert scorer.submit(2, ("Ben", *LEAD[1:]), PRIMARY)
+    scorer.drain()
+
+    rows = local_writer.execute("""
+        SELECT lead_id, scorer, scorer_version, category, error, prompt_tokens,
+               primary_scorer_version, primary_category, primary_latency_ms
+        FROM lead_shadow_scores ORDER BY lead_id
+    """).fetchall()
+    assert rows == [
+        (1, "gpt-4o-mini", scorer.version, "Warm", None, 100, "primary-v1", "Hot", 900.0),
+        (2, "gpt-4o-mini", scorer.version, None, "Malformed response: no JSON", 300, "primary-v1", "Hot", 900.0),
+    ]
+    assert shadow_report(local_writer)[scorer.version]["category_agreement"] == 0.0
+
+def test_full_queue_drops_leads_instead_of_blocking(local_writer, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def score_lead(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return {"score": 0.6, "category": "Warm", "action": "review", "reason": "maybe"}
+
+    monkeypatch.setattr(shadow, "score_lead", score_lead)
+    scorer = ShadowScorer("gpt-4o-mini", "Score this lead", queue_size=1, rate=0)
+    assert scorer.submit(1, LEAD, PRIMARY)
+    started.wait(5)
+    assert scorer.submit(2, LEAD, PRIMARY)
+    assert not scorer.submit(3, LEAD, PRIMARY)
+    release.set()
+    scorer.drain()
+    assert local_writer.execute("SELECT lead_id FROM lead_shadow_scores ORDER BY lead_id").fetchall() == [(1,), (2,)]
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from utils.snapshot import export_snapshot, read_snapshot, PARTITION_FILE
+
+# name, created_at, score
+LEADS = [
+    ("Ana", "2026-05-01 09:00:00", 0.9),
+    ("Ben", "2026-05-01 17:30:00", None),
+    ("Cara", "2026-05-03 12:00:00", 0.4),
+    ("Dan", "2026-05-05 08:00:00", 0.6),
+]
+
+@pytest.fixture
+def snapshot_db(db):
+    cursor = db.cursor()
+    for name, created_at, score in LEADS:
+        cursor.execute("INSERT INTO leads (name, email, company, message, created_at) VALUES (?, ?, ?, ?, ?)",
+                       (name, f"{name.lower()}@acme.com", "Acme", "", created_at))
+        if score is not None:
+            cursor.execute("INSERT INTO lead_scores (lead_id, score, category) VALUES (?, ?, ?)",
+                           (cursor.lastrowid, score, "Warm"))
+    db.commit()
+    return db
+
+def partition_mtimes(snapshot_dir):
+    return {
+        name: os.stat(os.path.join(snapshot_dir, name, PARTITION_FILE)).st_mtime_ns
+        for name in os.listdir(snapshot_dir) if name.startswith("created_date=")
+    }
+
+def test_first_export_writes_one_partition_per_date(snapshot_db, tmp_path):
+    snapshot_dir = str(tmp_path / "snapshot")
+    assert export_snapshot(snapshot_dir) == {"partitions": 3, "rows": 4}
+
+    table = read_snapshot(["lead_id", "score"], snapshot_dir=snapshot_dir).sort_by("lead_id")
+    assert table.column("score").to_pylist() == [0.9, None, 0.4, 0.6]
+
+def test_latest_score_is_exported(snapshot_db, tmp_path):
+    snapshot_db.execute("INSERT INTO lead_scores (lead_id, score, category) VALUES (1, 0.2, 'Cold')")
+    snapshot_db.commit()
+    snapshot_dir = str(tmp_path / "snapshot")
+    export_snapshot(snapshot_dir)
+
+    table = read_snapshot(["lead_id", "category"], snapshot_dir=snapshot_dir).sort_by("lead_id")
+    assert table.column("category").to_pylist()[0] == "Cold"
+
+def test_rerun_rewrites_only_changed_partitions(snapshot_db, tmp_path):
+    snapshot_dir = str(tmp_path / "snapshot")
+    export_snapshot(snapshot_dir)
+    assert export_snapshot(snapshot_dir) == {"partitions": 0, "rows": 0}
+    before = partition_mtimes(snapshot_dir)
+
+    # A late score for the oldest date must not rewrite the later ones
+    snapshot_db.execute("INSERT INTO lead_scores (lead_id, score, category) VALUES (2, 0.7, 'Warm')")
+    snapshot_db.commit()
+    assert export_snapshot(snapshot_dir) == {"partitions": 1, "rows": 2}
+
+    after = partition_mtimes(snapshot_dir)
+    assert [name for name in after if after[name] != before[name]] == ["created_date=2026-05-01"]
+    table = read_snapshot(["lead_id", "score"], snapshot_dir=snapshot_dir).sort_by("lead_id")
+    assert table.column("score").to_pylist()[1] == 0.7
+
+def test_read_snapshot_prunes_older_partitions(snapshot_db, tmp_path):
+    snapshot_dir = str(tmp_path / "snapshot")
+    export_snapshot(snapshot_dir)
+    table = read_snapshot(["lead_id"], since="2026-05-03", snapshot_dir=snapshot_dir)
+    assert sorted(table.column("lead_id").to_pylist()) == [3, 4]
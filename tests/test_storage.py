@@ -0,0 +1,140 @@
+import os
+import sqlite3
+
+import pytest
+
+from utils.storage import translate_sql
+
+def test_placeholders_become_pyformat_and_percent_is_escaped():
+    assert (translate_sql("SELECT name FROM leads WHERE email = ? AND message LIKE '%demo%'")
+            == "SELECT name FROM leads WHERE email = %s AND message ILIKE '%%demo%%'")
+
+def test_percent_is_left_alone_without_parameters():
+    assert translate_sql("SELECT 1 WHERE 'a' LIKE '%'", False) == "SELECT 1 WHERE 'a' ILIKE '%'"
+
+def test_quoted_literals_keep_question_marks_and_like():
+    assert (translate_sql("SELECT id FROM leads WHERE message = 'Is it LIKE this?' AND email = ?")
+            == "SELECT id FROM leads WHERE message = 'Is it LIKE this?' AND email = %s")
+    assert (translate_sql("SELECT id FROM leads WHERE name = 'O''Brien?' AND company LIKE ?")
+            == "SELECT id FROM leads WHERE name = 'O''Brien?' AND company ILIKE %s")
+
+def test_insert_or_ignore_becomes_on_conflict_do_nothing():
+    assert (translate_sql("INSERT OR IGNORE INTO company_aliases (alias, company_id) VALUES (?, ?)")
+            == "INSERT INTO company_aliases (alias, company_id) VALUES (%s, %s) ON CONFLICT DO NOTHING")
+
+def test_insert_or_replace_becomes_upsert_on_the_table_key():
+    assert (translate_sql("INSERT OR REPLACE INTO lead_duplicates (lead_id, duplicate_of, similarity) VALUES (?, ?, ?)")
+            == "INSERT INTO lead_duplicates (lead_id, duplicate_of, similarity) VALUES (%s, %s, %s)"
+               " ON CONFLICT (lead_id) DO UPDATE SET duplicate_of = EXCLUDED.duplicate_of,"
+               " similarity = EXCLUDED.similarity")
+
+def test_inserts_into_id_tables_return_the_id():
+    assert (translate_sql("INSERT INTO leads (name, email) VALUES (?, ?);")
+            == "INSERT INTO leads (name, email) VALUES (%s, %s) RETURNING id")
+    # An explicit RETURNING is kept as written
+    assert (translate_sql("INSERT INTO companies (name) VALUES (?) RETURNING id, name")
+            == "INSERT INTO companies (name) VALUES (%s) RETURNING id, name")
+    # Tables without a serial id get no RETURNING
+    assert (translate_sql("INSERT INTO lead_alerts (lead_id, kind) VALUES (?, ?)")
+            == "INSERT INTO lead_alerts (lead_id, kind) VALUES (%s, %s)")
+
+def test_date_now_becomes_current_date():
+    assert (translate_sql("SELECT COUNT(*) FROM leads WHERE DATE(created_at) = DATE('now')", False)
+            == "SELECT COUNT(*) FROM leads WHERE DATE(created_at) = CURRENT_DATE")
+    assert (translate_sql("SELECT id FROM leads WHERE created_at >= DATE('now', '-7 days')", False)
+            == "SELECT id FROM leads WHERE created_at >= (CURRENT_DATE - 7)")
+    assert (translate_sql("SELECT id FROM leads WHERE created_at >= DATE('now', '-1 day')", False)
+            == "SELECT id FROM leads WHERE created_at >= (CURRENT_DATE - 1)")
+
+def test_ddl_types_are_mapped():
+    assert (translate_sql("CREATE TABLE t (id INTEGER PRIMARY KEY AUTOINCREMENT, score REAL, body BLOB)", False)
+            == "CREATE TABLE t (id BIGSERIAL PRIMARY KEY, score DOUBLE PRECISION, body BYTEA)")
+
+# --- PostgresStorage round trip -----------------------------------------------
+
+SCHEMA = "lead_storage_test"
+
+@pytest.fixture
+def postgres(tmp_path):
+    """PostgresStorage on TEST_DATABASE_URL, or on a throwaway pgserver instance"""
+    psycopg = pytest.importorskip("psycopg")
+    pytest.importorskip("psycopg_pool")
+
+    url = os.getenv("TEST_DATABASE_URL")
+    server = None
+    if not url:
+        pgserver = pytest.importorskip("pgserver")
+        try:
+            server = pgserver.get_server(str(tmp_path / "pg"), cleanup_mode="stop")
+        except Exception as e:
+            pytest.skip(f"pgserver could not start: {e}")
+        url = server.get_uri()
+
+    try:
+        admin = psycopg.connect(url, autocommit=True)
+    except psycopg.OperationalError as e:
+        pytest.skip(f"no Postgres server: {e}")
+
+    from utils.storage import PostgresStorage
+
+    admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    admin.execute(f"CREATE SCHEMA {SCHEMA}")
+    storage = PostgresStorage(psycopg.conninfo.make_conninfo(url, options=f"-c search_path={SCHEMA}"),
+                              min_size=1, max_size=2)
+    try:
+        yield storage
+    finally:
+        storage.pool.close()
+        admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        admin.close()
+        if server is not None:
+            server.cleanup()
+
+def test_postgres_round_trip(postgres):
+    conn = postgres.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE leads (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                email TEXT UNIQUE,
+                company TEXT,
+                message TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+
+        cursor.execute("INSERT INTO leads (name, email, company, message) VALUES (?, ?, ?, ?)",
+                       ("Ana", "ana@acme.com", "Acme", "Pricing? 100% interested"))
+        first = cursor.lastrowid
+        assert first is not None
+
+        cursor.execute("INSERT OR IGNORE INTO leads (name, email) VALUES (?, ?)", ("Dup", "ana@acme.com"))
+        assert cursor.rowcount == 0
+
+        with pytest.raises(sqlite3.IntegrityError):
+            cursor.execute("INSERT INTO leads (name, email) VALUES (?, ?)", ("Dup", "ana@acme.com"))
+        conn.rollback()
+
+        cursor.execute("INSERT INTO leads (name, email, company, message) VALUES (?, ?, ?, ?)",
+                       ("Ana", "ana@acme.com", "Acme", "Pricing? 100% interested"))
+        added = conn.bulk_insert("leads", ("name", "email", "company"),
+                                 [("Ben", "ben@beta.io", "Beta"), ("Ana", "ana@acme.com", "Acme")])
+        assert [row for _, row in added] == [("Ben", "ben@beta.io", "Beta")]
+        conn.commit()
+
+        # LIKE ignores case as on SQLite; a literal "?" and "%" are not parameters
+        cursor.execute("SELECT email FROM leads WHERE company LIKE ? AND message LIKE '%pricing?%'", ("acme",))
+        assert cursor.fetchall() == [("ana@acme.com",)]
+
+        cursor.execute("SELECT COUNT(*) FROM leads WHERE DATE(created_at) >= DATE('now', '-1 day')")
+        assert cursor.fetchone() == (2,)
+
+        assert [row[0] for row in conn.stream("SELECT email FROM leads ORDER BY id", size=1)] == [
+            "ana@acme.com", "ben@beta.io"
+        ]
+        assert conn.table_columns("leads") == ["id", "name", "email", "company", "message", "created_at"]
+    finally:
+        conn.close()
@@ -0,0 +1,33 @@
+from utils.validators import is_valid_email, validate_many, normalize_email, normalize_many
+
+def test_valid_and_invalid_addresses():
+    assert is_valid_email("john.smith+sales@acme.co.uk")
+    assert is_valid_email("anna@bücher.de")
+    assert not is_valid_email("john@")
+    assert not is_valid_email("john@acme")
+    assert not is_valid_email("john smith@acme.com")
+    assert not is_valid_email("a" * 250 + "@acme.com")
+
+def test_validate_many_matches_is_valid_email():
+    emails = ["a@acme.com", "bad", "b@bücher.de", "c@acme"]
+    assert validate_many(emails) == [is_valid_email(email) for email in emails]
+
+def test_plus_tag_and_case_are_dropped():
+    assert normalize_email(" John+Newsletter@Acme.com ").email == "john@acme.com"
+
+def test_gmail_ignores_dots_and_googlemail_is_gmail():
+    assert normalize_email("j.ohn@gmail.com").email == "john@gmail.com"
+    assert normalize_email("J.O.H.N+x@googlemail.com").email == "john@gmail.com"
+    # Other providers keep their dots
+    assert normalize_email("j.ohn@acme.com").email == "j.ohn@acme.com"
+
+def test_domain_facts():
+    normalized = normalize_email("anna@mail.bücher.de")
+    assert normalized.domain == "mail.xn--bcher-kva.de"
+    assert normalized.registrable_domain == "xn--bcher-kva.de"
+    assert not normalized.free_mail and not normalized.disposable
+    assert normalize_email("x@mailinator.com").disposable
+    assert normalize_email("x@gmail.com").free_mail
+
+def test_invalid_address_normalizes_to_none():
+    assert normalize_many(["a@acme.com", "nope"])[1] is None
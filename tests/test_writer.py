@@ -0,0 +1,112 @@
+import os
+import queue
+import threading
+import time
+
+import pytest
+
+from utils.db import get_connection, IntegrityError
+from utils.writer import write_task, RemoteWriter, WriterServer, WriterProcess, WriteError
+
+AUTHKEY = b"test"
+
+class DriverError(Exception):
+    """Stands in for a driver exception that cannot be pickled"""
+
+    def __init__(self):
+        super().__init__(threading.Lock())
+
+@write_task
+def add_note(cursor, value):
+    cursor.execute("INSERT INTO writer_notes (value) VALUES (?)", (value,))
+    return cursor.lastrowid
+
+@write_task
+def add_note_then_fail(cursor, value):
+    cursor.execute("INSERT INTO writer_notes (value) VALUES (?)", (value,))
+    raise DriverError()
+
+@pytest.fixture
+def notes(db):
+    db.execute("CREATE TABLE writer_notes (id INTEGER PRIMARY KEY AUTOINCREMENT, value TEXT UNIQUE)")
+    db.commit()
+    return db
+
+def note_values(conn):
+    return [row[0] for row in conn.execute("SELECT value FROM writer_notes ORDER BY id")]
+
+@pytest.fixture
+def remote(notes, tmp_path):
+    address = str(tmp_path / "writer.sock")
+    server = WriterServer(address, AUTHKEY)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    while not os.path.exists(address):
+        time.sleep(0.01)
+    return RemoteWriter(address, AUTHKEY, timeout=5)
+
+def test_next_batch_takes_up_to_batch_size_queued_tasks():
+    server = WriterServer("unused", AUTHKEY, batch_size=3, batch_seconds=0)
+    for i in range(5):
+        server.pending.put(("add_note", (str(i),), None))
+    assert [args for _, args, _ in server._next_batch()] == [("0",), ("1",), ("2",)]
+    assert [args for _, args, _ in server._next_batch()] == [("3",), ("4",)]
+
+def test_failing_task_only_rolls_back_its_own_savepoint(notes):
+    conn = get_connection()
+    conn.isolation_level = None
+    replies = [queue.Queue() for _ in range(4)]
+    batch = list(zip(
+        ["add_note", "add_note", "add_note_then_fail", "add_note"],
+        [("a",), ("a",), ("b",), ("c",)],
+        replies
+    ))
+    WriterServer("unused", AUTHKEY)._write_batch(conn, batch)
+    conn.close()
+
+    results = [reply.get_nowait() for reply in replies]
+    assert [status for status, _ in results] == ["ok", "error", "error", "ok"]
+    assert isinstance(results[1][1], IntegrityError)
+    assert note_values(notes) == ["a", "c"]
+
+def test_results_and_integrity_errors_reach_the_worker(remote, notes):
+    assert remote.submit("add_note", "a") == 1
+    with pytest.raises(IntegrityError):
+        remote.submit("add_note", "a")
+    assert note_values(notes) == ["a"]
+
+def test_unpicklable_errors_arrive_as_write_errors(remote, notes):
+    with pytest.raises(WriteError) as error:
+        remote.submit("add_note_then_fail", "b")
+    assert error.value.code == "error"
+    assert str(error.value).startswith("DriverError")
+    # The socket is still usable and the failed task left nothing behind
+    assert remote.submit("ping") is True
+    assert note_values(notes) == []
+
+def test_concurrent_workers_are_all_answered(remote, notes):
+    results = {}
+
+    def submit(i):
+        results[i] = remote.submit("add_note", str(i))
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results.values()) == list(range(1, 21))
+    assert sorted(note_values(notes), key=int) == [str(i) for i in range(20)]
+
+def test_dead_writer_is_restarted(notes, tmp_path):
+    writer = WriterProcess(str(tmp_path / "writer.sock"), AUTHKEY, interval=2)
+    writer.start()
+    try:
+        assert writer.check() is False
+        first = writer.process
+        first.kill()
+        first.join()
+        assert writer.check() is True
+        assert writer.process is not first
+        assert writer.healthy()
+    finally:
+        writer.stop()
@@ -1,46 +1,228 @@
 import os
+import re
 import json
-from openai import OpenAI
-from dotenv import load_dotenv
+import time
+import random
+from hashlib import sha256
 
-load_dotenv()
+from utils import metrics
+from utils.scheduler import llm_slot, BATCH
+from utils.compaction import compact_message, compact_enrichment
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from utils.paths import PROJECT_ROOT
 
-SYSTEM_PROMPT = """
-You are an AI sales analyst.
-Your job is to score inbound B2B leads.
+ENV_FILE = os.getenv("LEAD_ENV_FILE", os.path.join(PROJECT_ROOT, ".env"))
 
-Return ONLY valid JSON in this format:
-{
-  "score": float between 0 and 1,
-  "category": "Cold" | "Warm" | "Hot",
-  "action": "ignore" | "review" | "notify_sales",
-  "reason": "short explanation"
+# python-dotenv is only needed when there is a .env file to read
+if os.path.exists(ENV_FILE):
+    from dotenv import load_dotenv
+    load_dotenv(ENV_FILE)
+
+# openai is imported and the client built on first use, so importing this
+# module stays cheap for callers that never reach the LLM
+_client = None
+
+def get_client():
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+MODEL_NAME = os.getenv("MODEL_NAME", "gpt-3.5-turbo")
+
+# Retry policy for transient API errors and malformed replies
+MAX_ATTEMPTS = int(os.getenv("SCORE_MAX_ATTEMPTS", "3"))
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 8.0
+
+# USD per 1K (prompt, completion) tokens; override with MODEL_PRICE_PROMPT/MODEL_PRICE_COMPLETION
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4o": (0.0025, 0.01)
 }
-"""
-
-def score_lead(name, email, company, message, enrichment_summary):
-    user_prompt = f"""
-Lead details:
-Name: {name}
-Email: {email}
-Company: {company}
-Message: {message}
-
-Company enrichment: {enrichment_summary}
-"""
-
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": user_prompt}
-        ],
-        temperature=0
+
+CATEGORIES = {"cold": "Cold", "warm": "Warm", "hot": "Hot"}
+ACTIONS = {"ignore", "review", "notify_sales"}
+
+# Kept short because it is resent with every call
+SYSTEM_PROMPT = """You are an AI sales analyst scoring inbound B2B leads.
+Enrichment fields: web=company website found, pricing/careers=site has those pages, ai=site mentions AI, public_email=free-mail address.
+Return ONLY valid JSON: {"score": float 0-1, "category": "Cold"|"Warm"|"Hot", "action": "ignore"|"review"|"notify_sales", "reason": "short explanation"}"""
+
+# Recorded on every lead_scores row so a prompt or model change marks older
+# rows stale (see scripts/rescore_leads.py). MODEL_NAME and SYSTEM_PROMPT
+# changes are picked up automatically; bump PROMPT_REVISION when
+# build_user_prompt or compaction changes what the model sees.
+PROMPT_REVISION = 1
+
+def scorer_version(model, system_prompt):
+    return f"{model}:r{PROMPT_REVISION}:{sha256(system_prompt.encode()).hexdigest()[:8]}"
+
+SCORER_VERSION = scorer_version(MODEL_NAME, SYSTEM_PROMPT)
+
+class ScoringError(Exception):
+    """Raised when a lead could not be scored after all retries"""
+
+    def __init__(self, message, raw_response=None, attempts=0, usage=None):
+        super().__init__(message)
+        self.raw_response = raw_response
+        self.attempts = attempts
+        self.usage = usage
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) for prompts we have not sent yet"""
+    return (len(text or "") + 3) // 4
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    prompt_price = float(os.getenv("MODEL_PRICE_PROMPT", prompt_price))
+    completion_price = float(os.getenv("MODEL_PRICE_COMPLETION", completion_price))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+def parse_score_response(content):
+    """
+    Parse and validate a scoring reply against the score/category/action/reason schema.
+    Repairs common drift (code fences, surrounding prose, 0-100 scores, casing).
+    Raises ValueError if the reply cannot be repaired.
+    """
+    if not content:
+        raise ValueError("Empty response")
+
+    match = re.search(r"\{.*\}", content, re.DOTALL)
+    if not match:
+        raise ValueError("No JSON object in response")
+
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e}")
+
+    if not isinstance(data, dict):
+        raise ValueError("Response is not a JSON object")
+
+    try:
+        score = float(data.get("score"))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid score: {data.get('score')!r}")
+    if 1 < score <= 100:
+        score = score / 100
+    if not 0 <= score <= 1:
+        raise ValueError(f"Score out of range: {score}")
+
+    category = CATEGORIES.get(str(data.get("category", "")).strip().lower())
+    if not category:
+        raise ValueError(f"Invalid category: {data.get('category')!r}")
+
+    action = str(data.get("action", "")).strip().lower()
+    if action not in ACTIONS:
+        raise ValueError(f"Invalid action: {data.get('action')!r}")
+
+    reason = data.get("reason")
+    if not isinstance(reason, str) or not reason.strip():
+        raise ValueError("Missing reason")
+
+    return {"score": score, "category": category, "action": action, "reason": reason.strip()}
+
+def _backoff(attempt):
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** (attempt - 1)))
+    time.sleep(delay * random.uniform(0.5, 1.0))
+
+def usage_values(usage):
+    """(prompt_tokens, completion_tokens, latency_ms, cost_usd) for a lead_scores row; zeros for local scorers"""
+    usage = usage or {}
+    return (
+        usage.get("prompt_tokens", 0),
+        usage.get("completion_tokens", 0),
+        usage.get("latency_ms", 0.0),
+        usage.get("cost_usd", 0.0)
     )
 
-    content = response.choices[0].message.content
+def build_user_prompt(name, email, company, message, enrichment_summary):
+    """Compact lead prompt: cleaned, budget-capped message and key=value enrichment"""
+    compacted = compact_message(message)
+    return (
+        f"Name: {name}\n"
+        f"Email: {email}\n"
+        f"Company: {company}\n"
+        f"Message: {compacted or '(empty)'}\n"
+        f"Enrichment: {compact_enrichment(enrichment_summary)}"
+    )
+
+def _finish_usage(usage, start, model):
+    usage["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    usage["cost_usd"] = estimate_cost(model, usage["prompt_tokens"], usage["completion_tokens"])
+    metrics.inc("llm_cost_usd_total", usage["cost_usd"], model=model)
+    return usage
+
+@metrics.timed("score_lead")
+def score_lead(name, email, company, message, enrichment_summary,
+               model=MODEL_NAME, system_prompt=SYSTEM_PROMPT, priority=BATCH):
+    """
+    Score a lead with the LLM; model and system_prompt are overridden by shadow scoring.
+    Each attempt waits for an LLM slot of the given priority class (utils/scheduler.py).
+    """
+    from openai import APIConnectionError, RateLimitError, InternalServerError, BadRequestError
+
+    user_prompt = build_user_prompt(name, email, company, message, enrichment_summary)
+
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+    content = None
+    last_error = None
+    # Usage across every attempt, since retries are billed too
+    usage = {"prompt_tokens": 0, "completion_tokens": 0, "latency_ms": 0.0, "cost_usd": 0.0}
+    start = time.perf_counter()
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        metrics.inc("llm_calls_total", model=model)
+        try:
+            with llm_slot(priority):
+                response = get_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0
+                )
+        except (APIConnectionError, RateLimitError, InternalServerError) as e:
+            last_error = f"{type(e).__name__}: {e}"
+            metrics.inc("llm_errors_total", error=type(e).__name__)
+            if attempt < MAX_ATTEMPTS:
+                _backoff(attempt)
+            continue
+        except BadRequestError as e:
+            # The request itself is bad for this lead (e.g. too long); retrying cannot help
+            metrics.inc("llm_failures_total")
+            raise ScoringError(f"BadRequestError: {e}", attempts=attempt,
+                               usage=_finish_usage(usage, start, model))
+
+        content = response.choices[0].message.content
+        if response.usage:
+            usage["prompt_tokens"] += response.usage.prompt_tokens
+            usage["completion_tokens"] += response.usage.completion_tokens
+            metrics.inc("llm_tokens_total", response.usage.prompt_tokens, kind="prompt")
+            metrics.inc("llm_tokens_total", response.usage.completion_tokens, kind="completion")
+
+        try:
+            result = parse_score_response(content)
+        except ValueError as e:
+            last_error = f"Malformed response: {e}"
+            metrics.inc("llm_errors_total", error="malformed_response")
+            # Show the model its reply and the problem so the retry is not a repeat
+            messages = messages[:2] + [
+                {"role": "assistant", "content": content or ""},
+                {"role": "user", "content": f"That reply was invalid ({e}). Return ONLY the JSON object."}
+            ]
+            if attempt < MAX_ATTEMPTS:
+                _backoff(attempt)
+            continue
+
+        result["usage"] = _finish_usage(usage, start, model)
+        result["scorer_version"] = scorer_version(model, system_prompt)
+        return result
 
-    return json.loads(content)
- 
\ No newline at end of file
+    metrics.inc("llm_failures_total")
+    raise ScoringError(last_error, raw_response=content, attempts=MAX_ATTEMPTS,
+                       usage=_finish_usage(usage, start, model))
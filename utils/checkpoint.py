@@ -0,0 +1,143 @@
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# A batch stage flushes its buffered writes every CHECKPOINT_ROWS leads or
+# CHECKPOINT_SECONDS, whichever comes first. Writes are buffered in memory so
+# the SQLite write lock is only held for the short flush, never across the
+# website fetches and LLM calls in between.
+CHECKPOINT_ROWS = int(os.getenv("CHECKPOINT_ROWS", "50"))
+CHECKPOINT_SECONDS = float(os.getenv("CHECKPOINT_SECONDS", "10"))
+
+# A run still marked running is only taken over once it has not checkpointed
+# for this long; until then another process may be working on it. A crashed
+# (killed) run is resumed after this delay, an interrupted one at once.
+STALE_RUN_SECONDS = float(os.getenv("STALE_RUN_SECONDS", "600"))
+
+def stale_before(seconds=STALE_RUN_SECONDS):
+    """UTC cutoff, in CURRENT_TIMESTAMP's format, for runs that stopped checkpointing"""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=seconds)
+    return cutoff.strftime("%Y-%m-%d %H:%M:%S")
+
+class BatchRun:
+    """One resumable run of a batch stage, tracked in the pipeline_runs table"""
+
+    def __init__(self, conn, stage, resume=True,
+                 every_rows=CHECKPOINT_ROWS, every_seconds=CHECKPOINT_SECONDS):
+        self.conn = conn
+        self.stage = stage
+        self.every_rows = every_rows
+        self.every_seconds = every_seconds
+        self.pending = []
+        self.pending_notices = []
+        self.pending_rows = 0
+        self.pending_lead_id = None
+        self.last_flush = time.monotonic()
+
+        cursor = conn.cursor()
+        row = None
+        if resume:
+            cutoff = stale_before()
+            cursor.execute("""
+                SELECT run_id, last_lead_id, processed
+                FROM pipeline_runs
+                WHERE stage = ?
+                  AND (status = 'interrupted' OR (status = 'running' AND updated_at < ?))
+                ORDER BY started_at DESC
+                LIMIT 1
+            """, (stage, cutoff))
+            row = cursor.fetchone()
+
+        if row:
+            # Claim it only if no other process resumed it since the SELECT
+            cursor.execute("""
+                UPDATE pipeline_runs
+                SET status = 'running', updated_at = CURRENT_TIMESTAMP
+                WHERE run_id = ?
+                  AND (status = 'interrupted' OR (status = 'running' AND updated_at < ?))
+            """, (row[0], cutoff))
+            if not cursor.rowcount:
+                row = None
+
+        if row:
+            self.run_id, self.last_lead_id, self.processed = row
+            self.resumed = True
+        else:
+            self.run_id = uuid.uuid4().hex
+            self.last_lead_id = 0
+            self.processed = 0
+            self.resumed = False
+            cursor.execute("""
+                INSERT INTO pipeline_runs (run_id, stage, status, last_lead_id, processed)
+                VALUES (?, ?, 'running', 0, 0)
+            """, (self.run_id, stage))
+
+        conn.commit()
+
+    def write(self, sql, params):
+        """Buffer a write; it runs in order at the next checkpoint"""
+        self.pending.append((sql, params))
+
+    def after_commit(self, callback, *args):
+        """Queue a side effect (e.g. a notification) to run once the writes before it are committed"""
+        self.pending_notices.append((callback, args))
+
+    def done(self, lead_id):
+        """Mark a lead as finished and checkpoint if a threshold was reached"""
+        self.pending_rows += 1
+        self.pending_lead_id = lead_id
+        if (self.pending_rows >= self.every_rows
+                or time.monotonic() - self.last_flush >= self.every_seconds):
+            self.checkpoint()
+
+    def checkpoint(self):
+        cursor = self.conn.cursor()
+        for sql, params in self.pending:
+            cursor.execute(sql, params)
+
+        if self.pending_rows:
+            self.last_lead_id = self.pending_lead_id
+            self.processed += self.pending_rows
+
+        cursor.execute("""
+            UPDATE pipeline_runs
+            SET last_lead_id = ?, processed = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE run_id = ?
+        """, (self.last_lead_id, self.processed, self.run_id))
+        self.conn.commit()
+
+        notices = self.pending_notices
+        self.pending = []
+        self.pending_notices = []
+        self.pending_rows = 0
+        self.last_flush = time.monotonic()
+
+        for callback, args in notices:
+            callback(*args)
+
+    def _close(self, status, error=None):
+        self.conn.cursor().execute("""
+            UPDATE pipeline_runs
+            SET status = ?, error = ?, updated_at = CURRENT_TIMESTAMP,
+                finished_at = CASE WHEN ? = 'completed' THEN CURRENT_TIMESTAMP END
+            WHERE run_id = ?
+        """, (status, error, status, self.run_id))
+        self.conn.commit()
+
+    def finish(self):
+        self.checkpoint()
+        self._close("completed")
+
+    def interrupt(self, error):
+        """Save finished work and leave the run resumable"""
+        self.conn.rollback()
+        try:
+            self.checkpoint()
+        except Exception:
+            # The buffered writes themselves failed; resume from the last good checkpoint
+            self.conn.rollback()
+            self.pending = []
+            self.pending_notices = []
+            self.pending_rows = 0
+        self._close("interrupted", error)
@@ -0,0 +1,108 @@
+import os
+import re
+
+# Messages are capped at this many (estimated) tokens before they reach the LLM
+MESSAGE_TOKEN_BUDGET = int(os.getenv("MESSAGE_TOKEN_BUDGET", "200"))
+CHARS_PER_TOKEN = 4
+
+# Everything from one of these lines onwards is a quoted earlier message
+QUOTE_HEADERS = re.compile(
+    r"^\s*(on .{0,200}wrote:\s*$|-{2,}\s*original message\s*-{2,}|sent from my )",
+    re.IGNORECASE
+)
+# "> ..." lines are only a quoted message as a run of at least this many at the
+# end; a single "> 50 employees" in the prospect's own text is kept
+QUOTE_LINE = re.compile(r"^\s*>")
+QUOTE_TAIL_MIN_LINES = 2
+# An Outlook-style header block: "From:" plus at least two of these right after it.
+# A lone "From: ..." line is ordinary message text.
+FROM_HEADER = re.compile(r"^\s*from:\s.+", re.IGNORECASE)
+HEADER_FIELD = re.compile(r"^\s*(sent|date|to|cc|subject):\s", re.IGNORECASE)
+HEADER_BLOCK_LINES = 4
+SIGNATURE_DELIMITER = re.compile(r"^\s*(--|__+)\s*$")
+SIGN_OFFS = re.compile(
+    r"^\s*(best|kind|warm)?\s*(regards|wishes|thanks|thank you|cheers|sincerely)[,!.]?\s*$",
+    re.IGNORECASE
+)
+# A sign-off only starts a signature if at most this many short lines follow it
+SIGNATURE_MAX_LINES = 6
+# Longer lines, or questions, after a sign-off are message content, not a name/title/phone
+SIGNATURE_LINE_WORDS = 6
+
+def _header_block(lines, i):
+    """Whether lines[i] starts a From:/Sent:/To: block of a forwarded or quoted message"""
+    if not FROM_HEADER.match(lines[i]):
+        return False
+    fields = sum(1 for line in lines[i + 1:i + 1 + HEADER_BLOCK_LINES] if HEADER_FIELD.match(line))
+    return fields >= 2
+
+def _signature_lines(lines):
+    """Whether lines (what follows a sign-off) look like a signature rather than more content"""
+    lines = [line.strip() for line in lines if line.strip()]
+    return len(lines) <= SIGNATURE_MAX_LINES and all(
+        len(line.split()) <= SIGNATURE_LINE_WORDS and not line.endswith("?") for line in lines
+    )
+
+def _quoted_tail_start(lines):
+    """Index of the run of "> " lines (blank lines allowed) that ends the message, or len(lines)"""
+    start = len(lines)
+    quoted = 0
+    for i in range(len(lines) - 1, -1, -1):
+        if QUOTE_LINE.match(lines[i]):
+            start = i
+            quoted += 1
+        elif lines[i].strip():
+            break
+    return start if quoted >= QUOTE_TAIL_MIN_LINES else len(lines)
+
+def strip_quoted_and_signature(message):
+    lines = message.splitlines()
+    lines = lines[:max(1, _quoted_tail_start(lines))]
+    kept = []
+
+    for i, line in enumerate(lines):
+        if i > 0 and (QUOTE_HEADERS.match(line) or SIGNATURE_DELIMITER.match(line)
+                      or _header_block(lines, i)):
+            break
+        kept.append(line)
+
+    # Drop a trailing "Best regards, / Name / Title" block
+    for i in range(max(0, len(kept) - SIGNATURE_MAX_LINES - 1), len(kept)):
+        if i > 0 and SIGN_OFFS.match(kept[i]) and _signature_lines(kept[i + 1:]):
+            kept = kept[:i]
+            break
+
+    return "\n".join(kept)
+
+def truncate_to_budget(text, token_budget=MESSAGE_TOKEN_BUDGET):
+    limit = token_budget * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > limit // 2 else limit].rstrip() + " …"
+
+def compact_message(message, token_budget=MESSAGE_TOKEN_BUDGET):
+    """Strip quoted replies and signatures, collapse whitespace and cap at the token budget"""
+    if not isinstance(message, str) or not message.strip():
+        return ""
+    text = strip_quoted_and_signature(message)
+    text = re.sub(r"\s+", " ", text).strip()
+    return truncate_to_budget(text, token_budget)
+
+ENRICHMENT_PATTERN = re.compile(
+    r"Website exists: (True|False), Pricing: (\d), Careers: (\d), Mentions AI: (\d)"
+)
+
+def compact_enrichment(summary):
+    """Encode the enrichment summary as short key=value fields"""
+    if not summary:
+        return "none"
+    match = ENRICHMENT_PATTERN.search(summary)
+    if match:
+        website, pricing, careers, ai = match.groups()
+        return f"web={int(website == 'True')} pricing={pricing} careers={careers} ai={ai}"
+    if summary.startswith("Public email domain"):
+        return "public_email=1"
+    if summary.startswith("Website check failed temporarily"):
+        return "web=unknown"
+    return summary
@@ -0,0 +1,132 @@
+import re
+import unicodedata
+
+from utils.enrichment import extract_domain, is_public_email
+
+# Company entity resolution. Free-text company names ("FinTechX",
+# "fintechx inc", "FinTech X") normalize to one name key, business email
+# domains are a second key, and both map to a stable companies.id through
+# company_aliases ("name:fintechx", "domain:fintechx.com"). A lead's
+# business domain is the stronger evidence; the name links leads from
+# free-mail addresses and fills in companies that have no domain yet.
+LEGAL_SUFFIXES = {
+    "inc", "incorporated", "llc", "llp", "lp", "ltd", "limited", "corp", "corporation",
+    "co", "company", "plc", "gmbh", "mbh", "ag", "sa", "sas", "sarl", "srl", "spa", "bv", "nv",
+    "oy", "ab", "as", "aps", "pty", "pvt", "private", "kk", "kg",
+}
+
+# Names that say there is no company
+NO_COMPANY = {
+    "personal", "none", "na", "nil", "null", "self", "selfemployed", "individual", "freelance",
+    "freelancer", "unknown", "test", "nocompany", "student", "home", "private",
+}
+
+# Aliases cached per resolver; cleared when it grows past this
+ALIAS_CACHE_SIZE = 100_000
+
+INSERT_LEAD_COMPANY_SQL = """
+    INSERT OR IGNORE INTO lead_companies (lead_id, company_id)
+    VALUES (?, ?)
+"""
+
+def company_key(name):
+    """Normalized company name ("FinTech X, Inc." -> "fintechx"), or None when there is no company"""
+    if not isinstance(name, str):
+        return None
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c)).lower().replace("&", " and ")
+    # Dotted abbreviations collapse first so "S.A." and "Co." are recognized as suffixes
+    tokens = re.sub(r"[^\w]+", " ", name.replace(".", "")).split()
+    while tokens and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    if tokens and tokens[0] == "the":
+        tokens.pop(0)
+    key = "".join(tokens)
+    if not key or key in NO_COMPANY:
+        return None
+    return key
+
+class CompanyResolver:
+    """Resolves leads to company ids on one cursor, caching the aliases it has seen"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.aliases = {}  # alias -> company_id, None when unknown
+        self.domains = {}  # company_id -> business domain
+
+    def _lookup(self, alias):
+        if alias not in self.aliases:
+            if len(self.aliases) >= ALIAS_CACHE_SIZE:
+                self.aliases.clear()
+                self.domains.clear()
+            self.cursor.execute("SELECT company_id FROM company_aliases WHERE alias = ?", (alias,))
+            row = self.cursor.fetchone()
+            self.aliases[alias] = row[0] if row else None
+        return self.aliases[alias]
+
+    def _domain(self, company_id):
+        if company_id not in self.domains:
+            self.cursor.execute("SELECT domain FROM companies WHERE id = ?", (company_id,))
+            row = self.cursor.fetchone()
+            self.domains[company_id] = row[0] if row else None
+        return self.domains[company_id]
+
+    def _link(self, alias, company_id):
+        if self._lookup(alias) is not None:
+            return
+        self.cursor.execute(
+            "INSERT OR IGNORE INTO company_aliases (alias, company_id) VALUES (?, ?)",
+            (alias, company_id)
+        )
+        # Another writer may have claimed the alias first; read back the winner
+        self.aliases.pop(alias)
+        self._lookup(alias)
+
+    def resolve(self, company, email):
+        """Company id for a lead's company name and email, creating the company if needed; None if neither identifies one"""
+        name_key = company_key(company)
+        domain = extract_domain(email)
+        business = None if is_public_email(domain) else domain
+
+        company_id = self._lookup(f"domain:{business}") if business else None
+        if company_id is None and name_key:
+            company_id = self._lookup(f"name:{name_key}")
+            # Same name, different business domain: a different company
+            if company_id is not None and business and self._domain(company_id) not in (None, business):
+                company_id = None
+                name_key = None
+        if company_id is None:
+            if not (business or name_key):
+                return None
+            self.cursor.execute("INSERT INTO companies (name, domain) VALUES (?, ?)",
+                                ((company or "").strip() or business, business))
+            company_id = self.cursor.lastrowid
+            self.domains[company_id] = business
+        elif business and self._domain(company_id) is None:
+            self.cursor.execute("UPDATE companies SET domain = ? WHERE id = ?", (business, company_id))
+            self.domains[company_id] = business
+
+        if business:
+            self._link(f"domain:{business}", company_id)
+        if name_key:
+            self._link(f"name:{name_key}", company_id)
+        return company_id
+
+    def link_lead(self, lead_id, company, email):
+        """Resolve a lead's company and record it in lead_companies; returns the company id or None"""
+        company_id = self.resolve(company, email)
+        if company_id is not None:
+            self.cursor.execute(INSERT_LEAD_COMPANY_SQL, (lead_id, company_id))
+        return company_id
+
+def enriched_company_lead(cursor, company_id, domain):
+    """A lead of the company whose enrichment for domain is final and can be copied, or None"""
+    cursor.execute("""
+        SELECT e.lead_id
+        FROM lead_companies c
+        JOIN lead_enrichment e ON e.lead_id = c.lead_id
+        WHERE c.company_id = ? AND e.domain = ? AND COALESCE(e.fetch_retryable, 0) = 0
+        LIMIT 1
+    """, (company_id, domain))
+    row = cursor.fetchone()
+    return row[0] if row else None
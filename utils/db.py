@@ -1,9 +1,57 @@
-import sqlite3
 import os
+import sqlite3
+import time
+
+from utils import metrics
+from utils.storage import SQLiteStorage, PostgresStorage
+from utils.paths import PROJECT_ROOT
 
-# Get the project root directory (parent of utils)
-PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(PROJECT_ROOT, "db", "database.db")
 
+# Every backend raises these, so callers do not depend on the driver
+Error = sqlite3.Error
+IntegrityError = sqlite3.IntegrityError
+OperationalError = sqlite3.OperationalError
+
+# One pool per process: a forked worker or writer must not share the parent's sockets
+_postgres = {}
+
+def get_storage():
+    """
+    Backend selected by DATABASE_URL: postgresql://... for Postgres (pooled),
+    sqlite:///path for another SQLite file, unset for SQLite at DB_PATH.
+    """
+    url = os.getenv("DATABASE_URL", "")
+    if url.startswith(("postgres://", "postgresql://")):
+        key = (os.getpid(), url)
+        if key not in _postgres:
+            _postgres[key] = PostgresStorage(url)
+        return _postgres[key]
+    if url.startswith("sqlite:///"):
+        return SQLiteStorage(url[len("sqlite:///"):])
+    return SQLiteStorage(DB_PATH)
+
 def get_connection():
-    return sqlite3.connect(DB_PATH)
+    start = time.perf_counter()
+    conn = get_storage().connect()
+    metrics.observe("db_connect_seconds", time.perf_counter() - start)
+    return conn
+
+def add_missing_columns(cursor, table, columns):
+    """Add columns (name -> SQL type) that an older table is missing"""
+    existing = set(cursor.connection.table_columns(table))
+
+    for name, column_type in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+def batched(rows, size):
+    """Group an iterable (e.g. conn.stream()) into lists of up to size rows"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,185 @@
+import random
+import re
+import struct
+from hashlib import blake2b
+
+from utils.enrichment import extract_domain
+
+# 64 MinHash permutations split into 16 LSH bands of 4 rows.
+# Band collisions start around ~50% Jaccard; candidates are then verified
+# against DUPLICATE_THRESHOLD using the stored signatures.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+MIN_SHINGLES = 8
+DUPLICATE_THRESHOLD = 0.8
+
+DUPLICATE_SCORER = "near-duplicate"
+
+# Stored signatures: NUM_PERM little-endian uint32 values, the same on every platform
+SIGNATURE_FORMAT = struct.Struct(f"<{NUM_PERM}I")
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1337)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+def normalize_message(message):
+    if not isinstance(message, str):
+        return ""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", message.lower())).strip()
+
+def shingles(message):
+    text = normalize_message(message)
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def minhash(shingle_set):
+    hashes = [
+        int.from_bytes(blake2b(s.encode(), digest_size=8).digest(), "little")
+        for s in shingle_set
+    ]
+    return tuple(
+        min((a * h + b) % _PRIME for h in hashes) & 0xFFFFFFFF
+        for a, b in _PERMUTATIONS
+    )
+
+def pack_signature(signature):
+    return SIGNATURE_FORMAT.pack(*signature)
+
+def unpack_signature(blob):
+    return SIGNATURE_FORMAT.unpack(bytes(blob))
+
+def band_keys(domain, signature):
+    """LSH bucket keys; the domain is part of the key so only same-domain leads collide"""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = blake2b(f"{domain}|{band}|{','.join(map(str, rows))}".encode(), digest_size=8)
+        keys.append((band, digest.hexdigest()))
+    return keys
+
+def similarity(sig_a, sig_b):
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+def _best_match(cursor, keys, signature, lead_id=0):
+    """Most similar indexed lead above DUPLICATE_THRESHOLD sharing an LSH bucket, as (lead_id, similarity)"""
+    placeholders = " OR ".join(["(band = ? AND bucket = ?)"] * len(keys))
+    cursor.execute(f"""
+        SELECT DISTINCT s.lead_id, s.signature
+        FROM lead_lsh_buckets b
+        JOIN lead_signatures s ON s.lead_id = b.lead_id
+        WHERE ({placeholders}) AND b.lead_id != ?
+    """, [value for key in keys for value in key] + [lead_id])
+
+    match = None
+    for candidate_id, blob in cursor.fetchall():
+        score = similarity(signature, unpack_signature(blob))
+        if score >= DUPLICATE_THRESHOLD and (match is None or score > match[1]):
+            match = (candidate_id, score)
+    return match
+
+def _root(cursor, lead_id):
+    # Always point at the root lead so chains of near-duplicates share one score
+    cursor.execute("SELECT duplicate_of FROM lead_duplicates WHERE lead_id = ?", (lead_id,))
+    root = cursor.fetchone()
+    return root[0] if root else lead_id
+
+def find_duplicate(cursor, email, message):
+    """Read-only lookup: (duplicate_of, similarity) for a lead not inserted yet, otherwise None"""
+    shingle_set = shingles(message)
+    if len(shingle_set) < MIN_SHINGLES:
+        return None
+
+    signature = minhash(shingle_set)
+    match = _best_match(cursor, band_keys(extract_domain(email), signature), signature)
+    if match:
+        return _root(cursor, match[0]), match[1]
+    return None
+
+def index_lead(cursor, lead_id, email, message):
+    """
+    Add a lead to the near-duplicate index.
+    Returns (duplicate_of, similarity) when an earlier lead from the same domain
+    has a near-identical message, otherwise None.
+    Messages too short to compare get a NULL signature, so later runs skip them.
+    """
+    domain = extract_domain(email)
+    shingle_set = shingles(message)
+    if len(shingle_set) < MIN_SHINGLES:
+        cursor.execute("""
+            INSERT OR REPLACE INTO lead_signatures (lead_id, domain, signature)
+            VALUES (?, ?, NULL)
+        """, (lead_id, domain))
+        return None
+
+    signature = minhash(shingle_set)
+    keys = band_keys(domain, signature)
+    match = _best_match(cursor, keys, signature, lead_id)
+
+    cursor.execute("""
+        INSERT OR REPLACE INTO lead_signatures (lead_id, domain, signature)
+        VALUES (?, ?, ?)
+    """, (lead_id, domain, pack_signature(signature)))
+    cursor.executemany("""
+        INSERT OR IGNORE INTO lead_lsh_buckets (band, bucket, lead_id)
+        VALUES (?, ?, ?)
+    """, [(band, bucket, lead_id) for band, bucket in keys])
+
+    if match:
+        duplicate_of = _root(cursor, match[0])
+        cursor.execute("""
+            INSERT OR REPLACE INTO lead_duplicates (lead_id, duplicate_of, similarity)
+            VALUES (?, ?, ?)
+        """, (lead_id, duplicate_of, match[1]))
+        return duplicate_of, match[1]
+
+    return None
+
+COPY_ENRICHMENT_SQL = """
+    INSERT OR REPLACE INTO lead_enrichment
+    (lead_id, domain, website_exists, has_pricing, has_careers, mentions_ai, summary,
+     fetch_failure, fetch_retryable, fetch_attempts, rescore_pending)
+    SELECT ?, domain, website_exists, has_pricing, has_careers, mentions_ai, summary,
+           fetch_failure, fetch_retryable, fetch_attempts, 0
+    FROM lead_enrichment
+    WHERE lead_id = ?
+"""
+
+def copy_enrichment(cursor, lead_id, duplicate_of):
+    """Reuse the original lead's enrichment row. Returns False if it has none yet"""
+    cursor.execute(COPY_ENRICHMENT_SQL, (lead_id, duplicate_of))
+    return cursor.rowcount > 0
+
+def has_enrichment(cursor, lead_id):
+    cursor.execute("SELECT 1 FROM lead_enrichment WHERE lead_id = ?", (lead_id,))
+    return cursor.fetchone() is not None
+
+def inherit_score(duplicate_of, original):
+    """Build a near-duplicate's score from the original lead's score_lead-shaped result"""
+    return {
+        "score": original["score"],
+        "category": original["category"],
+        "action": original["action"],
+        "reason": f"Near-duplicate of lead {duplicate_of}: {original['reason']}",
+        # Stale exactly when the original's score is
+        "scorer_version": original.get("scorer_version")
+    }
+
+def inherited_score(cursor, duplicate_of):
+    """Score of the original lead as a score_lead-shaped dict, or None if it is unscored"""
+    cursor.execute("""
+        SELECT score, category, action, reason, scorer_version
+        FROM lead_scores
+        WHERE lead_id = ?
+        ORDER BY id DESC
+        LIMIT 1
+    """, (duplicate_of,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+
+    score, category, action, reason, scorer_version = row
+    return inherit_score(duplicate_of, {
+        "score": score, "category": category, "action": action, "reason": reason,
+        "scorer_version": scorer_version
+    })
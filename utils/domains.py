@@ -0,0 +1,98 @@
+import os
+from functools import lru_cache
+
+# Domain normalization: punycode for IDNs, registrable domains from the
+# Public Suffix List (mail.acme.co.uk -> acme.co.uk) and the free-mail and
+# disposable provider sets. The lists are bundled in utils/data and parsed
+# on first use, so importing this module stays cheap.
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# Bundled copy of https://publicsuffix.org/list/public_suffix_list.dat; set this to use a fresher one
+PUBLIC_SUFFIX_LIST = os.getenv("PUBLIC_SUFFIX_LIST", os.path.join(DATA_DIR, "public_suffix_list.dat"))
+FREE_EMAIL_DOMAINS_FILE = os.path.join(DATA_DIR, "free_email_domains.txt")
+DISPOSABLE_EMAIL_DOMAINS_FILE = os.path.join(DATA_DIR, "disposable_email_domains.txt")
+
+def to_ascii(domain):
+    """Lowercase ASCII form of a hostname (IDNs as punycode), or None if it cannot be encoded"""
+    domain = domain.strip().rstrip(".").lower()
+    if not domain:
+        return None
+    if domain.isascii():
+        return domain
+    try:
+        return domain.encode("idna").decode("ascii")
+    except UnicodeError:
+        return None
+
+class PublicSuffixList:
+    """Normal, wildcard (*.ck) and exception (!www.ck) rules of the PSL format"""
+
+    def __init__(self, lines):
+        self.rules = set()
+        self.wildcards = set()
+        self.exceptions = set()
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("//"):
+                continue
+            rule = line.split()[0]
+            if rule.startswith("!"):
+                self.exceptions.add(to_ascii(rule[1:]))
+            elif rule.startswith("*."):
+                self.wildcards.add(to_ascii(rule[2:]))
+            else:
+                self.rules.add(to_ascii(rule))
+
+    def suffix_labels(self, labels):
+        """Number of trailing labels that form the public suffix (longest matching rule)"""
+        for i in range(len(labels)):
+            candidate = ".".join(labels[i:])
+            if candidate in self.exceptions:
+                return len(labels) - i - 1
+            if candidate in self.rules:
+                return len(labels) - i
+            if i + 1 < len(labels) and ".".join(labels[i + 1:]) in self.wildcards:
+                return len(labels) - i
+        # Unlisted TLDs: the implicit "*" rule
+        return 1
+
+@lru_cache(maxsize=None)
+def public_suffix_list():
+    with open(PUBLIC_SUFFIX_LIST, encoding="utf-8") as f:
+        return PublicSuffixList(f)
+
+def _load_domains(path):
+    with open(path, encoding="utf-8") as f:
+        return frozenset(
+            line.strip().lower() for line in f
+            if line.strip() and not line.startswith("#")
+        )
+
+@lru_cache(maxsize=None)
+def free_email_domains():
+    return _load_domains(FREE_EMAIL_DOMAINS_FILE)
+
+@lru_cache(maxsize=None)
+def disposable_email_domains():
+    return _load_domains(DISPOSABLE_EMAIL_DOMAINS_FILE)
+
+@lru_cache(maxsize=65536)
+def registrable_domain(domain):
+    """The domain a company registers (sub.acme.co.uk -> acme.co.uk), or None for a bare public suffix"""
+    domain = to_ascii(domain)
+    if not domain:
+        return None
+    labels = domain.split(".")
+    suffix = public_suffix_list().suffix_labels(labels)
+    if len(labels) <= suffix:
+        return None
+    return ".".join(labels[-suffix - 1:])
+
+def _listed(domain, domains):
+    return domain in domains or registrable_domain(domain) in domains
+
+def is_free_email_domain(domain):
+    return _listed(domain, free_email_domains())
+
+def is_disposable_domain(domain):
+    return _listed(domain, disposable_email_domains())
@@ -1,26 +1,220 @@
-import requests
-
-PUBLIC_EMAIL_DOMAINS = {
-    "gmail.com",
-    "yahoo.com",
-    "outlook.com",
-    "hotmail.com",
-    "icloud.com"
+import os
+import socket
+import ssl
+import time
+import threading
+from urllib.parse import urlsplit
+
+from utils.domains import registrable_domain, is_free_email_domain, is_disposable_domain
+from utils import metrics
+
+# Pre-flight timeouts (seconds). Dead domains fail here instead of in requests.get
+DNS_TIMEOUT = float(os.getenv("ENRICH_DNS_TIMEOUT", "2"))
+CONNECT_TIMEOUT = float(os.getenv("ENRICH_CONNECT_TIMEOUT", "1.5"))
+TLS_TIMEOUT = float(os.getenv("ENRICH_TLS_TIMEOUT", "2"))
+FETCH_TIMEOUT = 5
+
+# A transiently failing website is checked again on later enrich runs, up to this many times in all
+MAX_FETCH_ATTEMPTS = int(os.getenv("ENRICH_MAX_ATTEMPTS", "3"))
+
+# Where a domain's homepage lives. Staging and benchmarks point this at a local stand-in,
+# e.g. http://127.0.0.1:8081/{domain}
+WEBSITE_URL_TEMPLATE = os.getenv("ENRICH_URL_TEMPLATE", "https://{domain}")
+
+DNS_CACHE_TTL = 300
+DNS_RETRYABLE_CACHE_TTL = 30
+
+# Failure reasons stored in lead_enrichment.fetch_failure
+FAILURE_DNS_NXDOMAIN = "dns_nxdomain"
+FAILURE_DNS_TIMEOUT = "dns_timeout"
+FAILURE_DNS_ERROR = "dns_error"
+FAILURE_CONNECT_REFUSED = "connect_refused"
+FAILURE_CONNECT_TIMEOUT = "connect_timeout"
+FAILURE_TLS_HANDSHAKE = "tls_handshake"
+FAILURE_TLS_TIMEOUT = "tls_timeout"
+FAILURE_TLS_ERROR = "tls_error"
+FAILURE_HTTP_TIMEOUT = "http_timeout"
+FAILURE_HTTP_ERROR = "http_error"
+FAILURE_HTTP_STATUS = "http_status"
+FAILURE_HTTP_SERVER_ERROR = "http_5xx"
+
+RETRYABLE_FAILURES = {
+    FAILURE_DNS_TIMEOUT,
+    FAILURE_DNS_ERROR,
+    FAILURE_CONNECT_TIMEOUT,
+    FAILURE_TLS_TIMEOUT,
+    FAILURE_HTTP_TIMEOUT,
+    FAILURE_HTTP_ERROR,
+    FAILURE_HTTP_SERVER_ERROR
 }
 
+_dns_pool = None
+_dns_pool_lock = threading.Lock()
+_dns_cache = {}  # domain -> (expires_at, addresses, failure)
+_dns_pending = {}  # domain -> Future
+
 def extract_domain(email):
-    return email.split("@")[-1].lower()
+    """Registrable domain of the address (mail.acme.co.uk -> acme.co.uk), IDNs in punycode"""
+    host = email.rpartition("@")[2]
+    return registrable_domain(host) or host.strip().lower()
 
 def is_public_email(domain):
-    return domain in PUBLIC_EMAIL_DOMAINS
+    """Free-mail or disposable provider: there is no company website behind the address"""
+    return is_free_email_domain(domain) or is_disposable_domain(domain)
+
+def is_retryable(failure):
+    return failure in RETRYABLE_FAILURES
+
+def _get_dns_pool():
+    global _dns_pool
+    from concurrent.futures import ThreadPoolExecutor
+
+    with _dns_pool_lock:
+        if _dns_pool is None:
+            _dns_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="dns")
+    return _dns_pool
+
+def _lookup(domain):
+    try:
+        infos = socket.getaddrinfo(domain, 443, type=socket.SOCK_STREAM)
+        # Every address, in resolver order: the first is often IPv6, which an IPv4-only host cannot reach
+        return tuple(dict.fromkeys(info[4][0] for info in infos)), None
+    except socket.gaierror as e:
+        if e.errno == socket.EAI_AGAIN:
+            return None, FAILURE_DNS_ERROR
+        return None, FAILURE_DNS_NXDOMAIN
+    except OSError:
+        return None, FAILURE_DNS_ERROR
+
+def prefetch_dns(domains):
+    """Start resolving domains in the background so check_website hits a warm cache"""
+    now = time.monotonic()
+    for domain in domains:
+        cached = _dns_cache.get(domain)
+        if cached and cached[0] > now:
+            continue
+        if domain not in _dns_pending:
+            _dns_pending[domain] = _get_dns_pool().submit(_lookup, domain)
+
+def resolve_domain(domain):
+    """Resolve domain with a bounded wait. Returns (addresses, failure_reason)"""
+    cached = _dns_cache.get(domain)
+    if cached and cached[0] > time.monotonic():
+        metrics.inc("dns_cache_hits_total")
+        return cached[1], cached[2]
+
+    metrics.inc("dns_cache_misses_total")
+    future = _dns_pending.get(domain)
+    if future is None:
+        future = _dns_pending.setdefault(domain, _get_dns_pool().submit(_lookup, domain))
+
+    from concurrent.futures import TimeoutError as FutureTimeout
+
+    try:
+        addresses, failure = future.result(timeout=DNS_TIMEOUT)
+    except FutureTimeout:
+        # Leave the lookup running; a later call may still pick up its result
+        return None, FAILURE_DNS_TIMEOUT
+
+    _dns_pending.pop(domain, None)
+    ttl = DNS_RETRYABLE_CACHE_TTL if is_retryable(failure) else DNS_CACHE_TTL
+    _dns_cache[domain] = (time.monotonic() + ttl, addresses, failure)
+    return addresses, failure
+
+def _probe_address(address, port):
+    try:
+        with socket.create_connection((address, port), timeout=CONNECT_TIMEOUT):
+            return None
+    except socket.timeout:
+        return FAILURE_CONNECT_TIMEOUT
+    except ConnectionRefusedError:
+        return FAILURE_CONNECT_REFUSED
+    except OSError:
+        # Unreachable network/host is usually a routing blip, not a dead site
+        return FAILURE_CONNECT_TIMEOUT
+
+def probe_port(addresses, port=443):
+    """
+    Short TCP connect probe of each address in turn, as requests would try them.
+    Returns (address, None) for the first that accepts; otherwise (None, refused)
+    if every address refused, else (None, a timeout).
+    """
+    failures = set()
+    for address in addresses:
+        failure = _probe_address(address, port)
+        if failure is None:
+            return address, None
+        failures.add(failure)
+    if failures == {FAILURE_CONNECT_REFUSED}:
+        return None, FAILURE_CONNECT_REFUSED
+    return None, FAILURE_CONNECT_TIMEOUT
+
+def probe_tls(address, port, hostname, cafile=None):
+    """
+    Short TLS handshake with the address that accepted the TCP probe, verifying
+    the certificate for hostname. Returns None on success or a failure reason.
+    """
+    context = ssl.create_default_context(cafile=cafile)
+    try:
+        with socket.create_connection((address, port), timeout=TLS_TIMEOUT) as sock:
+            with context.wrap_socket(sock, server_hostname=hostname):
+                return None
+    except socket.timeout:
+        return FAILURE_TLS_TIMEOUT
+    except ssl.SSLError:
+        # Includes certificate verification failures: requests would fail the same way
+        return FAILURE_TLS_HANDSHAKE
+    except OSError:
+        return FAILURE_TLS_TIMEOUT
 
 def check_website(domain):
+    """
+    Fetch the company homepage after a DNS + TCP (+ TLS for https) pre-flight.
+    Returns (website_exists, page_text, failure_reason); failure_reason is None on success.
+    """
+    with metrics.track("check_website"):
+        result = _fetch_website(domain)
+
+    if result[2]:
+        metrics.inc("website_fetch_failures_total", reason=result[2])
+    return result
+
+def _fetch_website(domain):
+    # requests is slow to import and only needed once a fetch actually happens
+    import requests
+
+    url = WEBSITE_URL_TEMPLATE.format(domain=domain)
+    parts = urlsplit(url)
+
+    addresses, failure = resolve_domain(parts.hostname)
+    if failure:
+        return False, "", failure
+
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    address, failure = probe_port(addresses, port)
+    if failure:
+        return False, "", failure
+
+    if parts.scheme == "https":
+        # Same CA bundle requests verifies against
+        failure = probe_tls(address, port, parts.hostname, requests.certs.where())
+        if failure:
+            return False, "", failure
+
     try:
-        url = f"https://{domain}"
-        response = requests.get(url, timeout=5)
-        return response.status_code == 200, response.text.lower()
-    except:
-        return False, ""
+        response = requests.get(url, timeout=FETCH_TIMEOUT)
+    except requests.exceptions.SSLError:
+        return False, "", FAILURE_TLS_ERROR
+    except requests.exceptions.Timeout:
+        return False, "", FAILURE_HTTP_TIMEOUT
+    except requests.exceptions.RequestException:
+        return False, "", FAILURE_HTTP_ERROR
+
+    if response.status_code >= 500:
+        return False, "", FAILURE_HTTP_SERVER_ERROR
+    if response.status_code != 200:
+        return False, "", FAILURE_HTTP_STATUS
+    return True, response.text.lower(), None
 
 def extract_signals(page_text):
     return {
@@ -28,3 +222,46 @@ def extract_signals(page_text):
         "has_careers": int("careers" in page_text or "jobs" in page_text),
         "mentions_ai": int("ai" in page_text or "artificial intelligence" in page_text)
     }
+
+def build_enrichment(domain, attempt=1):
+    """
+    Run the enrichment rules for one domain and return the lead_enrichment fields.
+    attempt counts this website check among the lead's checks so far.
+    """
+    no_signals = {"has_pricing": 0, "has_careers": 0, "mentions_ai": 0}
+
+    # 🚨 Public email handling
+    if is_public_email(domain):
+        return {
+            "website_exists": False,
+            "signals": no_signals,
+            "summary": "Public email domain detected (low business confidence)",
+            "fetch_failure": None,
+            "fetch_retryable": False,
+            "fetch_attempts": attempt
+        }
+
+    website_exists, page_text, failure = check_website(domain)
+    signals = extract_signals(page_text) if website_exists else no_signals
+
+    if failure and is_retryable(failure):
+        if attempt < MAX_FETCH_ATTEMPTS:
+            summary = f"Website check failed temporarily ({failure}), will retry"
+        else:
+            summary = f"Website check failed temporarily ({failure}), gave up after {attempt} attempts"
+    else:
+        summary = (
+            f"Website exists: {website_exists}, "
+            f"Pricing: {signals['has_pricing']}, "
+            f"Careers: {signals['has_careers']}, "
+            f"Mentions AI: {signals['mentions_ai']}"
+        )
+
+    return {
+        "website_exists": website_exists,
+        "signals": signals,
+        "summary": summary,
+        "fetch_failure": failure,
+        "fetch_retryable": is_retryable(failure),
+        "fetch_attempts": attempt
+    }
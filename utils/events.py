@@ -0,0 +1,87 @@
+import json
+import os
+import time
+
+from utils.db import get_connection
+
+# Append-only lead event log. The pipeline stages and the API append an event
+# in the same transaction as the write it describes; consumers (CRM sync, the
+# dashboard) keep the id of the last event they handled and read only what
+# came after it, so following the feed costs O(new events), never a rescan.
+# The id cursor relies on events committing in id order, which SQLite's
+# single writer guarantees; on Postgres a slow concurrent transaction can
+# commit a lower id late, so a follower there may miss it.
+INGESTED = "ingested"
+ENRICHED = "enriched"
+SCORED = "scored"
+ACTIONED = "actioned"
+EVENT_TYPES = (INGESTED, ENRICHED, SCORED, ACTIONED)
+
+EVENT_PAGE_SIZE = int(os.getenv("EVENT_PAGE_SIZE", "500"))
+# How often a follower checks for new events when it has caught up
+EVENT_POLL_SECONDS = float(os.getenv("EVENT_POLL_MS", "500")) / 1000
+
+INSERT_EVENT_SQL = """
+    INSERT INTO lead_events (lead_id, event_type, payload)
+    VALUES (?, ?, ?)
+"""
+
+def event_values(lead_id, event_type, **payload):
+    """INSERT_EVENT_SQL parameters, for cursor.execute or BatchRun.write"""
+    return (lead_id, event_type, json.dumps(payload, separators=(",", ":")))
+
+def scored_event(lead_id, ai_result, scorer, run_id=None, previous=None):
+    """
+    event_values for a score_lead-shaped result. previous is the (score,
+    category) this replaces when the lead was already scored, so a consumer
+    can move the lead between categories instead of counting it twice.
+    """
+    payload = {}
+    if previous:
+        payload = {"previous_score": previous[0], "previous_category": previous[1]}
+    return event_values(
+        lead_id, SCORED, score=ai_result["score"], category=ai_result["category"],
+        action=ai_result["action"], scorer=scorer, scorer_version=ai_result.get("scorer_version"),
+        run_id=run_id, **payload
+    )
+
+def read_events(after=0, limit=EVENT_PAGE_SIZE, types=None, conn=None):
+    """Events with id > after, oldest first, as dicts"""
+    sql = "SELECT id, lead_id, event_type, payload, created_at FROM lead_events WHERE id > ?"
+    params = [after]
+    if types:
+        sql += f" AND event_type IN ({', '.join('?' * len(types))})"
+        params.extend(types)
+    sql += " ORDER BY id LIMIT ?"
+    params.append(limit)
+
+    own_conn = conn is None
+    conn = conn or get_connection()
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        if own_conn:
+            conn.close()
+
+    return [
+        {"id": event_id, "lead_id": lead_id, "type": event_type,
+         "data": json.loads(payload) if payload else {}, "created_at": str(created_at)}
+        for event_id, lead_id, event_type, payload, created_at in rows
+    ]
+
+def follow_events(after=0, types=None, poll_seconds=EVENT_POLL_SECONDS):
+    """Yield events after the cursor forever, polling while caught up"""
+    conn = get_connection()
+    try:
+        while True:
+            events = read_events(after, types=types, conn=conn)
+            for event in events:
+                yield event
+            if events:
+                after = events[-1]["id"]
+            else:
+                # Postgres: end the snapshot so the next read sees new commits
+                conn.commit()
+                time.sleep(poll_seconds)
+    finally:
+        conn.close()
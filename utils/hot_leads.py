@@ -0,0 +1,72 @@
+import os
+
+from utils.enrichment import extract_domain, is_public_email
+from utils.prescore import intent_hits
+from utils import metrics
+
+# Hot-lead fast path: a lead whose cheap signals (business email domain,
+# several buying-intent keywords in the message) predict Hot gets a
+# provisional sales alert as soon as it arrives, before the website fetch and
+# LLM call. Once the lead is scored a follow-up confirms the alert, or
+# retracts it when the lead turned out not to be Hot.
+HOT_PATH_MIN_INTENT = int(os.getenv("HOT_PATH_MIN_INTENT", "2"))
+HOT_PATH_MIN_WORDS = int(os.getenv("HOT_PATH_MIN_WORDS", "8"))
+
+PROVISIONAL = "provisional"
+CONFIRMED = "confirmed"
+RETRACTED = "retracted"
+
+INSERT_ALERT_SQL = """
+    INSERT INTO lead_alerts (lead_id, kind, score, category, reason)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+# Alerts for a submission that was never stored: no lead id, so the email says who it was
+INSERT_UNSAVED_ALERT_SQL = """
+    INSERT INTO lead_alerts (lead_id, email, kind, score, category, reason)
+    VALUES (NULL, ?, ?, ?, ?, ?)
+"""
+
+def predict_hot(email, message, min_intent=HOT_PATH_MIN_INTENT):
+    """Reason for a provisional alert from the email and message alone, or None"""
+    if min_intent <= 0 or is_public_email(extract_domain(email)):
+        return None
+    message = (message or "").strip()
+    if len(message.split()) < HOT_PATH_MIN_WORDS:
+        return None
+    intent = intent_hits(message)
+    if intent < min_intent:
+        return None
+    return f"Provisional: business domain and {intent} buying-intent keywords"
+
+def notify(kind, email, reason):
+    # In real life: the same Slack / Email / CRM channel as scripts/actions.py
+    print(f"[SALES ALERT - {kind.upper()}] {email} | Reason: {reason}")
+    metrics.inc("hot_path_alerts_total", kind=kind)
+
+def provisional_values(email, message):
+    """Alert row values (lead_id excluded) if the lead looks Hot, or None; nothing is sent"""
+    reason = predict_hot(email, message)
+    if not reason:
+        return None
+    return (PROVISIONAL, None, "Hot", reason)
+
+def provisional_alert(email, message):
+    """Send a provisional alert if the lead looks Hot; returns the alert row values (lead_id excluded) or None"""
+    alert = provisional_values(email, message)
+    if alert:
+        notify(PROVISIONAL, email, alert[3])
+    return alert
+
+def follow_up_values(ai_result):
+    """Confirmed or retracted alert row values for the lead's score; nothing is sent"""
+    hot = ai_result["category"] == "Hot"
+    kind = CONFIRMED if hot else RETRACTED
+    reason = ai_result["reason"] if hot else f"Scored {ai_result['category']}: {ai_result['reason']}"
+    return (kind, ai_result["score"], ai_result["category"], reason)
+
+def retract(email, failure):
+    """Retract a provisional alert for a lead that failed before it was scored or stored"""
+    reason = f"Not processed: {failure}"
+    notify(RETRACTED, email, reason)
+    return (RETRACTED, None, None, reason)
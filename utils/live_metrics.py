@@ -0,0 +1,148 @@
+import asyncio
+import os
+import time
+
+from utils.db import get_connection
+from utils.events import INGESTED, SCORED, EVENT_PAGE_SIZE, EVENT_POLL_SECONDS, read_events
+from utils import metrics
+
+# Dashboard metrics kept current from the lead event log. One aggregate
+# seeds the totals; after that every ingested or scored event is a delta, so
+# an API process follows the log once and every connected dashboard shares
+# the result. A periodic re-seed corrects anything the id cursor can miss
+# (see utils/events.py on Postgres commit order).
+METRICS_RESYNC_SECONDS = float(os.getenv("METRICS_RESYNC_SECONDS", "300"))
+
+CATEGORIES = ("Hot", "Warm", "Cold")
+
+# One statement, so the event cursor and the totals come from one snapshot
+METRICS_SQL = """
+    SELECT
+        (SELECT COALESCE(MAX(id), 0) FROM lead_events),
+        (SELECT COUNT(*) FROM leads),
+        COUNT(s.score),
+        COALESCE(SUM(s.score), 0),
+        COALESCE(SUM(CASE WHEN s.category = 'Hot' THEN 1 ELSE 0 END), 0),
+        COALESCE(SUM(CASE WHEN s.category = 'Warm' THEN 1 ELSE 0 END), 0),
+        COALESCE(SUM(CASE WHEN s.category = 'Cold' THEN 1 ELSE 0 END), 0)
+    FROM (SELECT lead_id, MAX(id) AS id FROM lead_scores GROUP BY lead_id) latest
+    JOIN lead_scores s ON s.id = latest.id
+"""
+
+def lead_metrics(conn=None):
+    """(event cursor, totals) from the tables; each lead counts once, by its latest score"""
+    own_conn = conn is None
+    conn = conn or get_connection()
+    try:
+        after, total_leads, scored, score_sum, *counts = conn.execute(METRICS_SQL).fetchone()
+    finally:
+        if own_conn:
+            conn.close()
+    totals = {"total_leads": total_leads, "scored": scored, "score_sum": float(score_sum)}
+    totals.update(zip(CATEGORIES, counts))
+    return after, totals
+
+def metrics_view(totals):
+    """MetricsResponse fields for a totals dict"""
+    return {
+        "total_leads": totals["total_leads"],
+        "hot_leads": totals["Hot"],
+        "warm_leads": totals["Warm"],
+        "cold_leads": totals["Cold"],
+        "avg_score": round(totals["score_sum"] / totals["scored"], 2) if totals["scored"] else 0,
+    }
+
+def _count_score(totals, score, category, sign):
+    if score is not None:
+        totals["scored"] += sign
+        totals["score_sum"] += sign * score
+    if category in CATEGORIES:
+        totals[category] += sign
+
+def apply_events(totals, events):
+    """Add ingested and scored events to the totals in place; a re-score replaces the lead's previous score"""
+    for event in events:
+        if event["type"] == INGESTED:
+            totals["total_leads"] += 1
+        elif event["type"] == SCORED:
+            data = event["data"]
+            _count_score(totals, data.get("previous_score"), data.get("previous_category"), -1)
+            _count_score(totals, data.get("score"), data.get("category"), 1)
+
+class LiveMetrics:
+    """Follows the event log while anyone is subscribed and publishes each change once"""
+
+    def __init__(self, poll_seconds=EVENT_POLL_SECONDS, resync_seconds=METRICS_RESYNC_SECONDS):
+        self.poll_seconds = poll_seconds
+        self.resync_seconds = resync_seconds
+        self.after = 0
+        self.totals = None
+        self.current = None
+        self.version = 0
+        self.subscribers = 0
+        self._changed = None
+        self._task = None
+
+    def _publish(self):
+        view = metrics_view(self.totals)
+        if view == self.current:
+            return
+        self.current = view
+        self.version += 1
+        metrics.inc("live_metrics_updates_total")
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _follow(self):
+        loop = asyncio.get_running_loop()
+        seeded_at = None
+        try:
+            while self.subscribers:
+                if seeded_at is None or (self.resync_seconds and time.monotonic() - seeded_at >= self.resync_seconds):
+                    self.after, self.totals = await loop.run_in_executor(None, lead_metrics)
+                    seeded_at = time.monotonic()
+                    self._publish()
+
+                events = await loop.run_in_executor(
+                    None, read_events, self.after, EVENT_PAGE_SIZE, (INGESTED, SCORED)
+                )
+                if events:
+                    apply_events(self.totals, events)
+                    self.after = events[-1]["id"]
+                    self._publish()
+                else:
+                    await asyncio.sleep(self.poll_seconds)
+        except Exception as e:
+            # Subscribers keep their last metrics; the next keep-alive restarts the feed
+            print(f"Live metrics stopped: {e}")
+        finally:
+            self._task = None
+
+    def _ensure_following(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._follow())
+
+    async def updates(self, timeout=None):
+        """
+        Current metrics, then each change, for one subscriber; yields None when
+        nothing changed within timeout so the caller can send a keep-alive.
+        """
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        self.subscribers += 1
+        self._ensure_following()
+        try:
+            seen = 0
+            while True:
+                if self.version != seen:
+                    seen = self.version
+                    yield self.current
+                    continue
+                changed = self._changed
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    self._ensure_following()
+                    yield None
+        finally:
+            self.subscribers -= 1
@@ -0,0 +1,132 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+# In-process counters, gauges and latency histograms.
+# Each update is a dict lookup plus a lock, cheap enough to leave on in production.
+# The API exposes them in Prometheus text format on /metrics-internal and
+# run_pipeline.py prints summarize() once all stages have run in-process.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_gauges = {}      # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [count per bucket..., count above last bucket, sum]
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def inc(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def gauge_add(name, value, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _gauges[key] = _gauges.get(key, 0) + value
+
+def observe(name, seconds, **labels):
+    key = _key(name, labels)
+    index = bisect_left(LATENCY_BUCKETS, seconds)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+        histogram[index] += 1
+        histogram[-1] += seconds
+
+@contextmanager
+def track(name, **labels):
+    """Time a block as {name}_seconds and count it in {name}_in_flight while it runs"""
+    gauge_add(f"{name}_in_flight", 1, **labels)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(f"{name}_seconds", time.perf_counter() - start, **labels)
+        gauge_add(f"{name}_in_flight", -1, **labels)
+
+def timed(name, **labels):
+    """Decorator form of track()"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with track(name, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def snapshot():
+    """JSON-serializable copy of every metric"""
+    with _lock:
+        return {
+            "counters": [[name, dict(labels), value] for (name, labels), value in _counters.items()],
+            "gauges": [[name, dict(labels), value] for (name, labels), value in _gauges.items()],
+            "histograms": [[name, dict(labels), list(h)] for (name, labels), h in _histograms.items()]
+        }
+
+def _series(name, labels, extra=None):
+    items = sorted(labels.items()) + (extra or [])
+    if not items:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+def _quantile_ms(buckets, count, q):
+    """Upper bound (ms) of the bucket holding the q-quantile; None if above the last bucket"""
+    target = q * count
+    running = 0
+    for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+        running += bucket_count
+        if running >= target:
+            return bound * 1000
+    return None
+
+def summarize(snap=None):
+    """Compact JSON summary: counter values and per-histogram count/avg/p50/p95/p99"""
+    snap = snap or snapshot()
+    summary = {"counters": {}, "latency": {}}
+
+    for name, labels, value in snap["counters"]:
+        summary["counters"][_series(name, labels)] = value
+
+    for name, labels, values in snap["histograms"]:
+        buckets, total = values[:-1], values[-1]
+        count = sum(buckets)
+        if not count:
+            continue
+        summary["latency"][_series(name, labels)] = {
+            "count": count,
+            "avg_ms": round(total / count * 1000, 2),
+            "p50_ms": _quantile_ms(buckets, count, 0.50),
+            "p95_ms": _quantile_ms(buckets, count, 0.95),
+            "p99_ms": _quantile_ms(buckets, count, 0.99)
+        }
+
+    return summary
+
+def render_prometheus(snap=None):
+    """Prometheus text exposition format"""
+    snap = snap or snapshot()
+    lines = []
+
+    for name, labels, value in sorted(snap["counters"], key=lambda m: m[0]):
+        lines.append(f"{_series(name, labels)} {value}")
+    for name, labels, value in sorted(snap["gauges"], key=lambda m: m[0]):
+        lines.append(f"{_series(name, labels)} {value}")
+
+    for name, labels, values in sorted(snap["histograms"], key=lambda m: m[0]):
+        buckets, total = values[:-1], values[-1]
+        running = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+            running += bucket_count
+            lines.append(f"{_series(name + '_bucket', labels, [('le', bound)])} {running}")
+        running += buckets[-1]
+        lines.append(f"{_series(name + '_bucket', labels, [('le', '+Inf')])} {running}")
+        lines.append(f"{_series(name + '_sum', labels)} {total}")
+        lines.append(f"{_series(name + '_count', labels)} {running}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,7 @@
+import os
+
+# Base directory for db/, data/leads.csv and .env. LEAD_HOME sets it; otherwise
+# it is the directory a command runs in, so the installed lead-* commands work
+# from any project directory instead of looking inside site-packages. A source
+# checkout run from its root resolves to the same paths as before.
+PROJECT_ROOT = os.path.abspath(os.getenv("LEAD_HOME", os.getcwd()))
@@ -0,0 +1,73 @@
+import os
+import re
+
+from utils.enrichment import extract_domain, is_public_email
+from utils.domains import is_disposable_domain
+
+# Leads at or above this confidence are scored locally and never reach the LLM
+PRESCORE_CONFIDENCE = float(os.getenv("PRESCORE_CONFIDENCE", "0.85"))
+
+PRESCORER_NAME = "prescore-v1"
+
+INTENT_KEYWORDS = re.compile(
+    r"\b(pricing|price|quote|demo|trial|buy|purchase|budget|contract|"
+    r"implement|integrat\w*|automat\w*|onboard\w*|team|rollout|enterprise)\b"
+)
+
+def intent_hits(message):
+    return len(set(INTENT_KEYWORDS.findall(message.lower())))
+
+def prescore_lead(email, message, website_exists, signals, fetch_retryable=False,
+                  threshold=PRESCORE_CONFIDENCE):
+    """
+    Score obvious leads from enrichment signals alone.
+    Returns a score_lead-shaped dict, or None when the lead is ambiguous and needs the LLM.
+    """
+    message = (message or "").strip()
+    domain = extract_domain(email)
+    public_email = is_public_email(domain)
+    # A transient fetch failure says nothing about the company, so it is not a cold signal
+    no_website = not website_exists and not fetch_retryable
+    empty_message = len(message.split()) < 3
+    intent = intent_hits(message)
+
+    # A disposable domain is also a public one; it counts as a single signal
+    cold_signals = []
+    if is_disposable_domain(domain):
+        cold_signals.append("disposable email domain")
+    elif public_email:
+        cold_signals.append("public email domain")
+    if no_website and not public_email:
+        cold_signals.append("no company website")
+    if empty_message:
+        cold_signals.append("empty message")
+
+    if cold_signals and intent == 0:
+        confidence = {1: 0.6, 2: 0.9, 3: 0.97}[len(cold_signals)]
+        if public_email and empty_message:
+            confidence = max(confidence, 0.9)
+        if confidence >= threshold:
+            return {
+                "score": 0.1,
+                "category": "Cold",
+                "action": "ignore",
+                "reason": "Pre-scored locally: " + ", ".join(cold_signals),
+                "confidence": confidence,
+                "scorer_version": PRESCORER_NAME
+            }
+        return None
+
+    if (not public_email and website_exists and signals["has_pricing"]
+            and intent >= 2):
+        confidence = 0.8 + 0.05 * min(intent - 2, 2) + 0.05 * signals["mentions_ai"]
+        if confidence >= threshold:
+            return {
+                "score": 0.85,
+                "category": "Hot",
+                "action": "notify_sales",
+                "reason": "Pre-scored locally: business domain with pricing page and clear buying intent",
+                "confidence": confidence,
+                "scorer_version": PRESCORER_NAME
+            }
+
+    return None
@@ -0,0 +1,107 @@
+from keyword import iskeyword
+
+from utils.storage import STREAM_ROWS
+
+# Compact row records for large working sets. A __slots__ record stores its
+# fields inline like a tuple (no per-row __dict__, unlike dict rows or
+# DictReader output) but still reads by name: lead.email, lead["email"] or
+# lead.get("email"). Records unpack like the tuple they replace.
+# benchmarks/memory_benchmark.py measures the bytes per row against dicts.
+#
+# Records are values: equal records hash alike, so fields are not reassigned
+# after construction.
+
+class Record:
+    __slots__ = ()
+
+    def __init__(self, *values):
+        if len(values) != len(self.__slots__):
+            raise TypeError(f"{type(self).__name__} takes {len(self.__slots__)} values, got {len(values)}")
+        for field, value in zip(self.__slots__, values):
+            setattr(self, field, value)
+
+    def __iter__(self):
+        for field in self.__slots__:
+            yield getattr(self, field)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key not in self.__slots__:
+                raise KeyError(key)
+            return getattr(self, key)
+        return getattr(self, self.__slots__[key])
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def __eq__(self, other):
+        return type(other) is type(self) and tuple(self) == tuple(other)
+
+    def __hash__(self):
+        return hash((type(self), tuple(self)))
+
+    def __repr__(self):
+        fields = ", ".join(f"{f}={getattr(self, f)!r}" for f in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def keys(self):
+        return self.__slots__
+
+    def as_dict(self):
+        return dict(zip(self.__slots__, self))
+
+class LeadRow(Record):
+    """One lead as ingested: leads table columns, in INSERT order"""
+    __slots__ = ("name", "email", "company", "message")
+
+    # Written out: one per CSV row at ingest, and about twice as fast as the setattr loop
+    def __init__(self, name, email, company, message):
+        self.name = name
+        self.email = email
+        self.company = company
+        self.message = message
+
+class ScoreRecord(Record):
+    """The parts of a score_lead-shaped result a batch run keeps for near-duplicates"""
+    __slots__ = ("score", "category", "action", "reason", "scorer_version")
+
+    @classmethod
+    def from_result(cls, ai_result):
+        return cls(ai_result["score"], ai_result["category"], ai_result["action"],
+                   ai_result["reason"], ai_result.get("scorer_version"))
+
+_record_types = {}
+
+def _field_name(column):
+    return (column.isidentifier() and not iskeyword(column) and not column.startswith("_")
+            and column != "self" and not hasattr(Record, column))
+
+def record_type(columns):
+    """Record class for a query's column names; one class per distinct column list"""
+    columns = tuple(columns)
+    cls = _record_types.get(columns)
+    if cls is None:
+        cls = _record_types[columns] = type("Row", (Record,), {"__slots__": columns})
+    return cls
+
+def iter_records(cursor, size=STREAM_ROWS):
+    """Yield an executed cursor's rows as records named after its columns, size rows at a time"""
+    columns = [d[0] for d in cursor.description]
+    if all(_field_name(c) for c in columns) and len(set(columns)) == len(columns):
+        make = record_type(columns)
+    else:
+        # Unaliased expressions such as COUNT(*), or names like get or self, cannot be fields
+        def make(*row):
+            return dict(zip(columns, row))
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        for row in rows:
+            yield make(*row)
@@ -0,0 +1,230 @@
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from utils import metrics
+
+# Every LLM call takes a slot from one scheduler, tagged with its priority
+# class. Interactive API calls always go first and may use every slot and
+# the whole rate. A lower class's share caps that class and every class
+# below it together (batch + backfill <= batch share, backfill <= backfill
+# share), so some slots and rate are always left for live leads; within the
+# caps, batch scoring and backfill (rescore, shadow) soak up whatever
+# interactive traffic leaves idle.
+#
+# A scheduler only coordinates the threads of one process. To share one
+# budget between the API and the batch scripts, run lead-scheduler and point
+# every process at it with LLM_SCHEDULER_ADDRESS / LLM_SCHEDULER_AUTHKEY.
+INTERACTIVE = "interactive"
+BATCH = "batch"
+BACKFILL = "backfill"
+PRIORITIES = (INTERACTIVE, BATCH, BACKFILL)
+
+LLM_SLOTS = int(os.getenv("LLM_SLOTS", "8"))
+# Total LLM calls per second across every class; 0 means no rate limit
+LLM_RATE = float(os.getenv("LLM_RATE", "0"))
+SHARES = {
+    INTERACTIVE: 1.0,
+    BATCH: float(os.getenv("LLM_BATCH_SHARE", "0.75")),
+    BACKFILL: float(os.getenv("LLM_BACKFILL_SHARE", "0.5")),
+}
+
+class _Bucket:
+    """Token bucket refilled by the scheduler under its lock"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+
+    def refill(self, elapsed):
+        if self.rate > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+
+    def ready(self):
+        return self.rate <= 0 or self.tokens >= 1
+
+    def wait_time(self):
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        if self.rate > 0:
+            self.tokens -= 1
+
+class Scheduler:
+    """Priority slots and rate shares for the threads of one process"""
+
+    def __init__(self, slots=LLM_SLOTS, rate=LLM_RATE, shares=None):
+        shares = shares or SHARES
+        self.slots = slots
+        self.caps = {p: max(1, math.ceil(slots * shares[p])) for p in PRIORITIES}
+        self.rate = _Bucket(rate)
+        self.class_rates = {p: _Bucket(rate * shares[p]) for p in PRIORITIES}
+        self.active = {p: 0 for p in PRIORITIES}
+        self.waiting = []  # [priority rank, ticket, granted]
+        self.tickets = 0
+        self.updated = time.monotonic()
+        self.cond = threading.Condition()
+
+    def _dispatch(self):
+        """Grant slots to waiters in priority order; returns seconds until a token is due"""
+        now = time.monotonic()
+        elapsed, self.updated = now - self.updated, now
+        self.rate.refill(elapsed)
+        for bucket in self.class_rates.values():
+            bucket.refill(elapsed)
+
+        wake = None
+        for entry in sorted(self.waiting):
+            rank = entry[0]
+            priority = PRIORITIES[rank]
+            # Out of shared capacity: nothing below this waiter may jump ahead of it
+            if sum(self.active.values()) >= self.slots:
+                break
+            if not self.rate.ready():
+                wake = self.rate.wait_time()
+                break
+            # Shares that cover this class: its own and those of the classes above
+            # it, except interactive's (everything); each caps its class and below
+            shares = PRIORITIES[1:rank + 1]
+            if any(sum(self.active[p] for p in PRIORITIES[PRIORITIES.index(s):]) >= self.caps[s]
+                   for s in shares):
+                continue
+            blocked = [self.class_rates[s] for s in shares if not self.class_rates[s].ready()]
+            if blocked:
+                due = min(bucket.wait_time() for bucket in blocked)
+                wake = due if wake is None else min(wake, due)
+                continue
+
+            self.rate.take()
+            for s in shares:
+                self.class_rates[s].take()
+            self.active[priority] += 1
+            entry[2] = True
+            self.waiting.remove(entry)
+        self.cond.notify_all()
+        return wake
+
+    def acquire(self, priority):
+        start = time.monotonic()
+        with self.cond:
+            self.tickets += 1
+            entry = [PRIORITIES.index(priority), self.tickets, False]
+            self.waiting.append(entry)
+            try:
+                while True:
+                    wake = self._dispatch()
+                    if entry[2]:
+                        break
+                    self.cond.wait(wake)
+            except BaseException:
+                if entry[2]:
+                    self.active[priority] -= 1
+                else:
+                    self.waiting.remove(entry)
+                self._dispatch()
+                raise
+        metrics.observe("llm_slot_wait_seconds", time.monotonic() - start, priority=priority)
+
+    def release(self, priority):
+        with self.cond:
+            self.active[priority] -= 1
+            self._dispatch()
+
+class RemoteScheduler:
+    """Client of a SchedulerServer; one socket per thread"""
+
+    def __init__(self, address, authkey):
+        self.address = address
+        self.authkey = authkey
+        self.local = threading.local()
+
+    def _call(self, op, priority):
+        from multiprocessing import AuthenticationError
+        from multiprocessing.connection import Client
+        client = getattr(self.local, "client", None)
+        try:
+            if client is None:
+                client = self.local.client = Client(self.address, authkey=self.authkey)
+            client.send((op, priority))
+            return client.recv()
+        except (EOFError, OSError, AuthenticationError):
+            # Scoring must not stop because the scheduler is down or rejects our key; run unscheduled
+            self.local.client = None
+            metrics.inc("llm_scheduler_unavailable_total")
+            return None
+
+    def acquire(self, priority):
+        start = time.monotonic()
+        self.local.granted = self._call("acquire", priority) == "ok"
+        metrics.observe("llm_slot_wait_seconds", time.monotonic() - start, priority=priority)
+
+    def release(self, priority):
+        if self.local.granted:
+            self._call("release", priority)
+
+class SchedulerServer:
+    """Shares one Scheduler between processes; a client's slots are freed if it disconnects"""
+
+    def __init__(self, address, authkey, scheduler=None):
+        self.address = address
+        self.authkey = authkey
+        self.scheduler = scheduler or Scheduler()
+
+    def serve_forever(self):
+        from multiprocessing.connection import Listener
+
+        with Listener(self.address, authkey=self.authkey) as listener:
+            while True:
+                client = listener.accept()
+                threading.Thread(target=self._handle_client, args=(client,), daemon=True).start()
+
+    def _handle_client(self, client):
+        held = []
+        try:
+            while True:
+                op, priority = client.recv()
+                if op == "acquire":
+                    self.scheduler.acquire(priority)
+                    held.append(priority)
+                elif op == "release" and priority in held:
+                    held.remove(priority)
+                    self.scheduler.release(priority)
+                client.send("ok")
+        except (EOFError, OSError):
+            pass
+        finally:
+            for priority in held:
+                self.scheduler.release(priority)
+            client.close()
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            address = os.getenv("LLM_SCHEDULER_ADDRESS")
+            if address:
+                # A missing key fails the handshake, and calls then run unscheduled
+                _scheduler = RemoteScheduler(address, os.getenv("LLM_SCHEDULER_AUTHKEY", "").encode())
+            else:
+                _scheduler = Scheduler()
+    return _scheduler
+
+@contextmanager
+def llm_slot(priority=BATCH):
+    """Hold one LLM slot of the given priority class for the duration of a call"""
+    scheduler = get_scheduler()
+    scheduler.acquire(priority)
+    try:
+        yield
+    finally:
+        scheduler.release(priority)
+
+def serve(address, authkey):
+    """Process entry point for a shared scheduler"""
+    SchedulerServer(address, authkey).serve_forever()
@@ -0,0 +1,123 @@
+from utils.db import get_connection, batched
+from utils.storage import STREAM_ROWS
+
+# Score distribution analytics for calibration. One streaming pass over the
+# latest score of every lead fills three NumPy arrays (score, category code,
+# domain code); histograms, quantiles and per-group stats are then
+# whole-array operations instead of one SQL query per bucket or domain.
+# numpy is imported lazily so the API does not pay for it at startup.
+
+QUANTILES = (0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99)
+GROUP_QUANTILES = (0.5, 0.9)
+
+SCORES_SQL = """
+    SELECT s.score, s.category, e.domain
+    FROM (SELECT lead_id, MAX(id) AS id FROM lead_scores GROUP BY lead_id) latest
+    JOIN lead_scores s ON s.id = latest.id
+    LEFT JOIN lead_enrichment e ON e.lead_id = latest.lead_id
+    WHERE s.score IS NOT NULL
+"""
+
+class ScoreArrays:
+    """Columns of the latest score per lead; categories/domains are integer codes into the label lists"""
+
+    def __init__(self, scores, category_codes, categories, domain_codes, domains):
+        self.scores = scores
+        self.category_codes = category_codes
+        self.categories = categories
+        self.domain_codes = domain_codes
+        self.domains = domains
+
+def load_scores(conn=None):
+    """Read every lead's latest score into NumPy arrays in one streaming pass"""
+    import numpy as np
+
+    own_conn = conn is None
+    conn = conn or get_connection()
+    categories, domains = {}, {}
+    chunks = []
+    try:
+        for rows in batched(conn.stream(SCORES_SQL), STREAM_ROWS):
+            n = len(rows)
+            chunks.append((
+                np.fromiter((r[0] for r in rows), dtype=np.float64, count=n),
+                np.fromiter((categories.setdefault(r[1], len(categories)) for r in rows), dtype=np.int32, count=n),
+                np.fromiter((domains.setdefault(r[2], len(domains)) for r in rows), dtype=np.int32, count=n),
+            ))
+    finally:
+        if own_conn:
+            conn.close()
+
+    if chunks:
+        scores, category_codes, domain_codes = (np.concatenate(column) for column in zip(*chunks))
+    else:
+        scores = np.empty(0, dtype=np.float64)
+        category_codes = domain_codes = np.empty(0, dtype=np.int32)
+    return ScoreArrays(scores, category_codes, list(categories), domain_codes, list(domains))
+
+def histogram(scores, bins=10):
+    import numpy as np
+    counts, edges = np.histogram(scores, bins=bins, range=(0.0, 1.0))
+    return [
+        {"lower": round(float(lo), 4), "upper": round(float(hi), 4), "count": int(c)}
+        for lo, hi, c in zip(edges[:-1], edges[1:], counts)
+    ]
+
+def quantiles(scores, qs=QUANTILES):
+    import numpy as np
+    if not len(scores):
+        return {}
+    values = np.quantile(scores, qs)
+    return {f"p{round(q * 100)}": round(float(v), 4) for q, v in zip(qs, values)}
+
+def group_stats(scores, codes, labels, limit=None):
+    """
+    Count, mean and GROUP_QUANTILES of scores per group code, largest groups first.
+    Quantiles come from one sort by (code, score): each group is a contiguous
+    slice, so a group's quantile is an interpolated index into its slice.
+    """
+    import numpy as np
+
+    if not len(scores):
+        return []
+    n_groups = len(labels)
+    counts = np.bincount(codes, minlength=n_groups)
+    means = np.bincount(codes, weights=scores, minlength=n_groups) / np.maximum(counts, 1)
+
+    ordered = scores[np.lexsort((scores, codes))]
+    starts = np.cumsum(counts) - counts
+    group_quantiles = {}
+    for q in GROUP_QUANTILES:
+        position = starts + q * np.maximum(counts - 1, 0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        fraction = position - lower
+        group_quantiles[f"p{round(q * 100)}"] = ordered[lower] * (1 - fraction) + ordered[upper] * fraction
+
+    # Largest first; ties by label so the order is stable across runs
+    order = sorted(range(n_groups), key=lambda g: (-counts[g], str(labels[g])))
+    if limit is not None:
+        order = order[:limit]
+    return [
+        {
+            "key": labels[g],
+            "count": int(counts[g]),
+            "mean": round(float(means[g]), 4),
+            **{name: round(float(values[g]), 4) for name, values in group_quantiles.items()},
+        }
+        for g in order
+    ]
+
+def score_distribution(bins=10, top_domains=20, conn=None):
+    """Histogram, quantiles and per-category / per-domain breakdown of the latest scores"""
+    data = load_scores(conn)
+    scores = data.scores
+    return {
+        "total": int(len(scores)),
+        "mean": round(float(scores.mean()), 4) if len(scores) else 0.0,
+        "std": round(float(scores.std()), 4) if len(scores) else 0.0,
+        "histogram": histogram(scores, bins),
+        "quantiles": quantiles(scores),
+        "by_category": group_stats(scores, data.category_codes, data.categories),
+        "by_domain": group_stats(scores, data.domain_codes, data.domains, limit=top_domains),
+    }
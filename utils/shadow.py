@@ -0,0 +1,182 @@
+import os
+import queue
+import threading
+from zlib import crc32
+
+from utils.ai import score_lead, ScoringError, MODEL_NAME, SYSTEM_PROMPT, scorer_version, usage_values
+from utils.db import get_connection
+from utils.throttle import RateLimiter
+from utils.scheduler import BACKFILL
+from utils.writer import write_task, get_writer
+from utils import metrics
+
+# Shadow scoring: a sample of the leads the primary LLM scorer handles is
+# also scored by a candidate (another model and/or system prompt) on a
+# background thread, after the primary result has been returned. Results go
+# to lead_shadow_scores next to the primary result, for shadow_report().
+#
+# The request path only pays for a queue put_nowait(). Extra cost is bounded
+# by the sample rate, the queue size (leads beyond it are dropped, not
+# delayed) and SHADOW_RATE candidate calls per second.
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "0"))
+SHADOW_MODEL = os.getenv("SHADOW_MODEL", MODEL_NAME)
+SHADOW_PROMPT_FILE = os.getenv("SHADOW_PROMPT_FILE")
+SHADOW_QUEUE_SIZE = int(os.getenv("SHADOW_QUEUE_SIZE", "100"))
+SHADOW_RATE = float(os.getenv("SHADOW_RATE", "1"))
+
+INSERT_SHADOW_SQL = """
+    INSERT INTO lead_shadow_scores
+    (lead_id, scorer, scorer_version, score, category, action, reason, error,
+     prompt_tokens, completion_tokens, latency_ms, cost_usd,
+     primary_scorer_version, primary_score, primary_category, primary_latency_ms)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+@write_task
+def save_shadow_score(cursor, row):
+    cursor.execute(INSERT_SHADOW_SQL, row)
+
+def sampled(email, rate=None):
+    """Deterministic per email, so a lead is either always or never shadowed"""
+    rate = SHADOW_SAMPLE_RATE if rate is None else rate
+    return rate > 0 and crc32(email.lower().encode()) % 10000 < rate * 10000
+
+def candidate_prompt():
+    if not SHADOW_PROMPT_FILE:
+        return SYSTEM_PROMPT
+    with open(SHADOW_PROMPT_FILE) as f:
+        return f.read().strip()
+
+class ShadowScorer:
+    """Scores queued leads with the candidate on one daemon thread"""
+
+    def __init__(self, model, system_prompt, queue_size=SHADOW_QUEUE_SIZE, rate=SHADOW_RATE):
+        self.model = model
+        self.system_prompt = system_prompt
+        self.version = scorer_version(model, system_prompt)
+        self.pending = queue.Queue(maxsize=queue_size)
+        self.limiter = RateLimiter(rate)
+        threading.Thread(target=self._run, name="shadow-scorer", daemon=True).start()
+
+    def submit(self, lead_id, lead, primary):
+        """Queue a lead; never blocks, and drops the lead when the queue is full"""
+        try:
+            self.pending.put_nowait((lead_id, lead, primary))
+        except queue.Full:
+            metrics.inc("shadow_dropped_total")
+            return False
+        return True
+
+    def drain(self):
+        """Wait until every queued lead has been scored and saved"""
+        self.pending.join()
+
+    def _run(self):
+        while True:
+            lead_id, lead, primary = self.pending.get()
+            try:
+                self._score(lead_id, lead, primary)
+            except Exception as e:
+                # A broken write must not kill the thread for every later lead
+                print(f"Shadow scoring of lead {lead_id} failed: {e}")
+            finally:
+                self.pending.task_done()
+
+    def _score(self, lead_id, lead, primary):
+        self.limiter.acquire()
+        name, email, company, message, enrichment_summary = lead
+        result, error = {}, None
+        try:
+            result = score_lead(name, email, company, message,
+                                enrichment_summary or "No enrichment data available",
+                                model=self.model, system_prompt=self.system_prompt,
+                                priority=BACKFILL)
+            usage = result.get("usage")
+        except ScoringError as e:
+            error, usage = str(e), e.usage
+        metrics.inc("shadow_scores_total", outcome="error" if error else "ok")
+
+        get_writer().submit("save_shadow_score", (
+            lead_id, self.model, self.version, result.get("score"), result.get("category"),
+            result.get("action"), result.get("reason"), error, *usage_values(usage),
+            primary.get("scorer_version"), primary["score"], primary["category"],
+            (primary.get("usage") or {}).get("latency_ms")
+        ))
+
+_shadow = None
+_shadow_lock = threading.Lock()
+
+def maybe_shadow(lead_id, lead, primary):
+    """
+    Send a sampled lead the primary LLM scored to the candidate in the background.
+    lead is (name, email, company, message, enrichment_summary); primary is score_lead's result.
+    """
+    global _shadow
+    if not sampled(lead[1]):
+        return False
+    with _shadow_lock:
+        if _shadow is None:
+            _shadow = ShadowScorer(SHADOW_MODEL, candidate_prompt())
+    return _shadow.submit(lead_id, lead, primary)
+
+def drain():
+    if _shadow is not None:
+        _shadow.drain()
+
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def shadow_report(conn=None):
+    """Agreement, score drift, latency and cost of each candidate version against the primary scorer"""
+    own_conn = conn is None
+    conn = conn or get_connection()
+    versions = {}
+    try:
+        for row in conn.stream("""
+            SELECT scorer_version, primary_scorer_version, category, primary_category,
+                   score, primary_score, latency_ms, primary_latency_ms, cost_usd, error
+            FROM lead_shadow_scores
+        """):
+            (version, primary_version, category, primary_category, score, primary_score,
+             latency, primary_latency, cost, error) = row
+            v = versions.setdefault(version, {
+                "primary_versions": set(), "compared": 0, "errors": 0, "agree": 0,
+                "confusion": {}, "score_diffs": [], "latency": [], "primary_latency": [], "cost_usd": 0.0
+            })
+            v["primary_versions"].add(primary_version)
+            v["cost_usd"] += cost or 0.0
+            if error:
+                v["errors"] += 1
+                continue
+            v["compared"] += 1
+            v["agree"] += category == primary_category
+            key = f"{primary_category}->{category}"
+            v["confusion"][key] = v["confusion"].get(key, 0) + 1
+            v["score_diffs"].append(score - primary_score)
+            v["latency"].append(latency)
+            if primary_latency is not None:
+                v["primary_latency"].append(primary_latency)
+    finally:
+        if own_conn:
+            conn.close()
+
+    report = {}
+    for version, v in versions.items():
+        diffs = v["score_diffs"]
+        report[version] = {
+            "primary_versions": sorted(p or "(unversioned)" for p in v["primary_versions"]),
+            "compared": v["compared"],
+            "errors": v["errors"],
+            "category_agreement": round(v["agree"] / v["compared"], 4) if v["compared"] else None,
+            "confusion": dict(sorted(v["confusion"].items())),
+            "mean_score_shift": round(sum(diffs) / len(diffs), 4) if diffs else None,
+            "mean_abs_score_diff": round(sum(abs(d) for d in diffs) / len(diffs), 4) if diffs else None,
+            "latency_ms": {"p50": _percentile(v["latency"], 0.5), "p95": _percentile(v["latency"], 0.95)},
+            "primary_latency_ms": {"p50": _percentile(v["primary_latency"], 0.5),
+                                   "p95": _percentile(v["primary_latency"], 0.95)},
+            "cost_usd": round(v["cost_usd"], 6),
+        }
+    return report
@@ -0,0 +1,157 @@
+import json
+import os
+import shutil
+from datetime import date, datetime, timedelta
+
+from utils.db import PROJECT_ROOT, get_connection
+
+# Columnar copy of the joined lead view for reporting. Reports read Parquet
+# files instead of joining leads, lead_enrichment and lead_scores on the OLTP
+# database. Files are partitioned by the lead's created date
+# (created_date=YYYY-MM-DD/part-0.parquet), so a report over a date range
+# only opens the partitions it needs.
+#
+# Export is incremental: the max ids of the source tables are kept in
+# _state.json and only dates with new leads, enrichments or scores since the
+# last export are rewritten. pyarrow is optional (pip install .[analytics])
+# and only imported here.
+SNAPSHOT_DIR = os.getenv("LEAD_SNAPSHOT_DIR", os.path.join(PROJECT_ROOT, "db", "snapshot"))
+STATE_FILE = "_state.json"
+PARTITION_FILE = "part-0.parquet"
+
+SOURCE_TABLES = ("leads", "lead_enrichment", "lead_scores")
+
+# One day's leads, one row each with its latest score. Message, summary and
+# reason are left out: they are large, free text and not what reports aggregate on.
+LEAD_VIEW_SQL = """
+    SELECT l.id, l.company, l.created_at,
+           e.domain, e.website_exists, e.has_pricing, e.has_careers, e.mentions_ai,
+           s.score, s.category, s.action, s.scorer, s.created_at
+    FROM leads l
+    LEFT JOIN lead_enrichment e ON e.lead_id = l.id
+    LEFT JOIN lead_scores s ON s.id = (SELECT MAX(id) FROM lead_scores WHERE lead_id = l.id)
+    WHERE l.created_at >= ? AND l.created_at < ?
+    ORDER BY l.created_at, l.id
+"""
+
+CHANGED_DATES_SQL = """
+    SELECT DATE(created_at) FROM leads WHERE id > ?
+    UNION
+    SELECT DATE(l.created_at) FROM lead_enrichment e JOIN leads l ON l.id = e.lead_id WHERE e.id > ?
+    UNION
+    SELECT DATE(l.created_at) FROM lead_scores s JOIN leads l ON l.id = s.lead_id WHERE s.id > ?
+"""
+
+def lead_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("lead_id", pa.int64()),
+        ("company", pa.string()),
+        ("created_at", pa.timestamp("us")),
+        ("domain", pa.string()),
+        ("website_exists", pa.bool_()),
+        ("has_pricing", pa.bool_()),
+        ("has_careers", pa.bool_()),
+        ("mentions_ai", pa.bool_()),
+        ("score", pa.float64()),
+        ("category", pa.string()),
+        ("action", pa.string()),
+        ("scorer", pa.string()),
+        ("scored_at", pa.timestamp("us")),
+    ])
+
+def _timestamp(value):
+    # SQLite returns TIMESTAMP columns as text, Postgres as datetime
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+def _flag(value):
+    return None if value is None else bool(value)
+
+def _to_record(row):
+    (lead_id, company, created_at, domain, website_exists, has_pricing, has_careers,
+     mentions_ai, score, category, action, scorer, scored_at) = row
+    return (lead_id, company, _timestamp(created_at), domain, _flag(website_exists),
+            _flag(has_pricing), _flag(has_careers), _flag(mentions_ai), score,
+            category, action, scorer, _timestamp(scored_at))
+
+def load_state(snapshot_dir=SNAPSHOT_DIR):
+    path = os.path.join(snapshot_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {table: 0 for table in SOURCE_TABLES}
+    with open(path) as f:
+        return json.load(f)
+
+def _save_state(snapshot_dir, state):
+    path = os.path.join(snapshot_dir, STATE_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+def _write_partition(snapshot_dir, day, records):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = lead_schema()
+    table = pa.Table.from_pylist([dict(zip(schema.names, r)) for r in records], schema=schema)
+    partition = os.path.join(snapshot_dir, f"created_date={day}")
+    os.makedirs(partition, exist_ok=True)
+    # Readers never see a half-written partition (dot files are not read)
+    tmp_path = os.path.join(partition, "." + PARTITION_FILE)
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, os.path.join(partition, PARTITION_FILE))
+
+def export_snapshot(snapshot_dir=SNAPSHOT_DIR, full=False):
+    """Rewrite the date partitions that changed since the last export"""
+    import pyarrow  # noqa: F401  fail before touching the snapshot if it is missing
+
+    if full and os.path.isdir(snapshot_dir):
+        shutil.rmtree(snapshot_dir)
+    os.makedirs(snapshot_dir, exist_ok=True)
+    state = load_state(snapshot_dir)
+
+    conn = get_connection()
+    try:
+        # Taken before reading: rows written during the export are picked up next time
+        new_state = {
+            table: conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+            for table in SOURCE_TABLES
+        }
+        changed = sorted(
+            str(day) for (day,) in conn.execute(
+                CHANGED_DATES_SQL, tuple(state[table] for table in SOURCE_TABLES)
+            ).fetchall()
+            if day is not None
+        )
+
+        # Each changed date is read on its own (idx_leads_created_at), so an old
+        # date with a late score does not rescan every lead since then
+        partitions = rows = 0
+        for day in changed:
+            next_day = (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+            records = [_to_record(row) for row in conn.stream(LEAD_VIEW_SQL, (day, next_day))]
+            if records:
+                _write_partition(snapshot_dir, day, records)
+                partitions += 1
+                rows += len(records)
+    finally:
+        conn.close()
+
+    _save_state(snapshot_dir, new_state)
+    return {"partitions": partitions, "rows": rows}
+
+def read_snapshot(columns=None, since=None, snapshot_dir=SNAPSHOT_DIR):
+    """Load the snapshot as a pyarrow Table, pruning partitions older than since"""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    partitioning = ds.partitioning(pa.schema([("created_date", pa.string())]), flavor="hive")
+    dataset = ds.dataset(snapshot_dir, format="parquet", partitioning=partitioning,
+                         ignore_prefixes=["_", "."])
+    where = None
+    if since is not None:
+        if isinstance(since, int):
+            since = date.today() - timedelta(days=since)
+        where = ds.field("created_date") >= str(since)
+    return dataset.to_table(columns=columns, filter=where)
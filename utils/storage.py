@@ -0,0 +1,342 @@
+import itertools
+import os
+import re
+import sqlite3
+import time
+import zlib
+from functools import lru_cache
+
+from utils import metrics
+
+# Storage backends behind utils.db.get_connection().
+#
+# Queries across the project are written once, in SQLite's dialect with "?"
+# placeholders. SQLiteStorage runs them as-is; PostgresStorage translates them
+# (placeholders, INSERT OR IGNORE/REPLACE, DDL types, LIKE) and maps driver errors
+# onto the sqlite3 exception classes, so callers catch one set of errors.
+#
+# The operations whose efficient form really differs per backend are methods
+# on the connection: bulk_insert() (COPY on Postgres), stream() (server-side
+# cursor on Postgres) and table_columns().
+
+# Rows fetched per round trip by stream()
+STREAM_ROWS = int(os.getenv("DB_STREAM_ROWS", "1000"))
+
+def _statement_type(sql):
+    words = sql.split(None, 1)
+    return words[0].lower() if words else ""
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that records db_query_seconds per statement type"""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            metrics.observe("db_query_seconds", time.perf_counter() - start, op=_statement_type(sql))
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            metrics.observe("db_query_seconds", time.perf_counter() - start, op=_statement_type(sql))
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def stream(self, sql, parameters=(), size=STREAM_ROWS):
+        """Iterate over a large result without loading it all at once"""
+        cursor = self.cursor()
+        cursor.execute(sql, parameters)
+        while True:
+            rows = cursor.fetchmany(size)
+            if not rows:
+                return
+            yield from rows
+
+    def bulk_insert(self, table, columns, rows):
+        """Insert rows, skipping unique-constraint conflicts; returns [(id, row)] for inserted rows"""
+        sql = (f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+               f"VALUES ({', '.join('?' * len(columns))})")
+        cursor = self.cursor()
+        inserted = []
+        for row in rows:
+            cursor.execute(sql, row)
+            if cursor.rowcount:
+                inserted.append((cursor.lastrowid, tuple(row)))
+        return inserted
+
+    def table_columns(self, table):
+        return [row[1] for row in self.execute(f"PRAGMA table_info({table})").fetchall()]
+
+class SQLiteStorage:
+    name = "sqlite"
+
+    # How long a connection waits on another writer's lock before raising
+    busy_timeout = 30
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, factory=TimedConnection)
+        # WAL lets readers keep going while a batch stage checkpoints its writes
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+# --- Postgres ---------------------------------------------------------------
+
+# Conflict target for INSERT OR REPLACE (SQLite resolves it from any unique index)
+UPSERT_KEYS = {
+    "lead_enrichment": ("lead_id",),
+    "lead_signatures": ("lead_id",),
+    "lead_duplicates": ("lead_id",),
+}
+
+# Tables with a serial id; inserts into them get RETURNING id for cursor.lastrowid
+ID_TABLES = {"leads", "lead_enrichment", "lead_scores", "lead_scoring_failures", "daily_metrics", "companies"}
+
+INSERT_TABLE = re.compile(r"^\s*INSERT\s+(?:OR\s+\w+\s+)?INTO\s+(\w+)\s*(?:\(([^)]*)\))?", re.IGNORECASE)
+
+# String literals and quoted identifiers, with their doubled-quote escapes
+QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+
+def _outside_quotes(sql, rewrite):
+    """Apply rewrite to the parts of sql that are not inside quotes"""
+    parts = QUOTED.split(sql)
+    parts[::2] = [rewrite(part) for part in parts[::2]]
+    return "".join(parts)
+
+def _rewrite_unquoted(sql, has_params):
+    if has_params:
+        sql = sql.replace("?", "%s")
+    # SQLite's LIKE ignores case
+    return re.sub(r"\bLIKE\b", "ILIKE", sql)
+
+@lru_cache(maxsize=512)
+def translate_sql(sql, has_params=True):
+    """Rewrite a SQLite-dialect statement for Postgres"""
+    if has_params:
+        # psycopg reads % anywhere in the statement, literals included
+        sql = sql.replace("%", "%%")
+    sql = _outside_quotes(sql, lambda part: _rewrite_unquoted(part, has_params))
+    sql = re.sub(r"\bINTEGER PRIMARY KEY AUTOINCREMENT\b", "BIGSERIAL PRIMARY KEY", sql, flags=re.IGNORECASE)
+    if re.match(r"\s*(CREATE|ALTER)\s+TABLE", sql, re.IGNORECASE):
+        sql = re.sub(r"\bBLOB\b", "BYTEA", sql)
+        sql = re.sub(r"\bREAL\b", "DOUBLE PRECISION", sql)
+    sql = re.sub(r"DATE\('now',\s*'-(\d+) days?'\)", r"(CURRENT_DATE - \1)", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"DATE\('now'\)", "CURRENT_DATE", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"^\s*BEGIN\s+IMMEDIATE\b", "BEGIN", sql, flags=re.IGNORECASE)
+
+    insert = INSERT_TABLE.match(sql)
+    if not insert:
+        return sql
+
+    table, columns = insert.groups()
+    suffix = ""
+    if re.match(r"\s*INSERT\s+OR\s+IGNORE\b", sql, re.IGNORECASE):
+        suffix = " ON CONFLICT DO NOTHING"
+    elif re.match(r"\s*INSERT\s+OR\s+REPLACE\b", sql, re.IGNORECASE):
+        keys = UPSERT_KEYS[table]
+        updates = [c.strip() for c in columns.split(",") if c.strip() not in keys]
+        suffix = (f" ON CONFLICT ({', '.join(keys)}) DO UPDATE SET "
+                  + ", ".join(f"{c} = EXCLUDED.{c}" for c in updates))
+    if table in ID_TABLES and not re.search(r"\bRETURNING\b", sql, re.IGNORECASE):
+        suffix += " RETURNING id"
+
+    sql = re.sub(r"^\s*INSERT\s+OR\s+\w+\s+INTO", "INSERT INTO", sql, flags=re.IGNORECASE)
+    return sql.rstrip().rstrip(";") + suffix
+
+def _reraise(e):
+    """Raise a psycopg error as the matching sqlite3 exception"""
+    import psycopg
+    if isinstance(e, psycopg.IntegrityError):
+        raise sqlite3.IntegrityError(str(e)) from e
+    if isinstance(e, psycopg.OperationalError):
+        raise sqlite3.OperationalError(str(e)) from e
+    raise sqlite3.DatabaseError(str(e)) from e
+
+class PostgresCursor:
+    """DB-API cursor over psycopg that accepts SQLite-dialect statements"""
+
+    def __init__(self, connection, cursor):
+        self.connection = connection
+        self.cursor = cursor
+        self.lastrowid = None
+
+    def execute(self, sql, parameters=()):
+        import psycopg
+        start = time.perf_counter()
+        translated = translate_sql(sql, bool(parameters))
+        try:
+            self.cursor.execute(translated, parameters or None)
+        except psycopg.Error as e:
+            _reraise(e)
+        finally:
+            metrics.observe("db_query_seconds", time.perf_counter() - start, op=_statement_type(sql))
+
+        self.lastrowid = None
+        if translated.endswith(" RETURNING id"):
+            row = self.cursor.fetchone()
+            self.lastrowid = row[0] if row else None
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        import psycopg
+        start = time.perf_counter()
+        translated = translate_sql(sql).replace(" RETURNING id", "")
+        try:
+            self.cursor.executemany(translated, seq_of_parameters)
+        except psycopg.Error as e:
+            _reraise(e)
+        finally:
+            metrics.observe("db_query_seconds", time.perf_counter() - start, op=_statement_type(sql))
+        return self
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+    @property
+    def description(self):
+        return self.cursor.description
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchmany(self, size=STREAM_ROWS):
+        return self.cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def close(self):
+        self.cursor.close()
+
+class PostgresConnection:
+    """Pooled psycopg connection with the sqlite3.Connection surface the project uses"""
+
+    _names = itertools.count()
+
+    def __init__(self, pool, raw):
+        self.pool = pool
+        self.raw = raw
+        self.streams = []
+
+    def cursor(self):
+        return PostgresCursor(self, self.raw.cursor())
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    @property
+    def in_transaction(self):
+        from psycopg.pq import TransactionStatus
+        return self.raw.info.transaction_status != TransactionStatus.IDLE
+
+    @property
+    def isolation_level(self):
+        return None if self.raw.autocommit else ""
+
+    @isolation_level.setter
+    def isolation_level(self, value):
+        # None means "I issue BEGIN/COMMIT myself", as with sqlite3
+        self.raw.autocommit = value is None
+
+    def close(self):
+        """Return the connection to the pool"""
+        if self.raw is None:
+            return
+        # A held cursor outlives the transaction, so close any the caller did not finish
+        for cursor in self.streams:
+            if not cursor.closed:
+                cursor.close()
+        if self.in_transaction:
+            self.raw.rollback()
+        self.raw.autocommit = False
+        self.pool.putconn(self.raw)
+        self.raw = None
+
+    def stream(self, sql, parameters=(), size=STREAM_ROWS):
+        """Iterate over a large result through a server-side cursor"""
+        # WITH HOLD keeps the cursor open across the commits a batch stage makes while reading
+        cursor = self.raw.cursor(name=f"stream_{next(self._names)}", withhold=True)
+        self.streams.append(cursor)
+        try:
+            cursor.itersize = size
+            cursor.execute(translate_sql(sql, bool(parameters)), parameters or None)
+            yield from cursor
+        finally:
+            if not cursor.closed and self.raw is not None:
+                cursor.close()
+            self.streams.remove(cursor)
+
+    def bulk_insert(self, table, columns, rows):
+        """COPY rows into a temp table, then insert the ones that do not conflict"""
+        column_list = ", ".join(columns)
+        staging = f"bulk_{table}_{zlib.crc32(column_list.encode()):08x}"
+        cursor = self.raw.cursor()
+        cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {staging} AS
+            SELECT 0::bigint AS bulk_seq, {column_list} FROM {table} WITH NO DATA
+        """)
+        cursor.execute(f"TRUNCATE {staging}")
+
+        with cursor.copy(f"COPY {staging} (bulk_seq, {column_list}) FROM STDIN") as copy:
+            for seq, row in enumerate(rows):
+                copy.write_row((seq, *row))
+
+        cursor.execute(f"""
+            INSERT INTO {table} ({column_list})
+            SELECT {column_list} FROM {staging} ORDER BY bulk_seq
+            ON CONFLICT DO NOTHING
+            RETURNING id, {column_list}
+        """)
+        inserted = [(row[0], tuple(row[1:])) for row in cursor.fetchall()]
+        inserted.sort(key=lambda item: item[0])
+        return inserted
+
+    def table_columns(self, table):
+        cursor = self.raw.cursor()
+        cursor.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s
+            ORDER BY ordinal_position
+        """, (table,))
+        return [row[0] for row in cursor.fetchall()]
+
+class PostgresStorage:
+    name = "postgres"
+
+    def __init__(self, url, min_size=None, max_size=None):
+        from psycopg_pool import ConnectionPool
+        self.pool = ConnectionPool(
+            url,
+            min_size=min_size or int(os.getenv("DB_POOL_MIN", "1")),
+            max_size=max_size or int(os.getenv("DB_POOL_MAX", "10")),
+            open=True
+        )
+
+    def connect(self):
+        return PostgresConnection(self.pool, self.pool.getconn())
@@ -1,5 +1,64 @@
 import re
+from functools import lru_cache
+
+from utils.domains import to_ascii, registrable_domain, is_free_email_domain, is_disposable_domain
+from utils.records import Record
+
+# RFC 5322 dot-atom local part (plus-addressing included) and a hostname of
+# letter/digit labels ending in an alphabetic or punycode TLD. \w also
+# admits Unicode letters, so IDN addresses validate; their domain must still
+# encode to punycode.
+_ATOM = r"[\w!#$%&'*+/=?^`{|}~-]+"
+_LABEL = r"[^\W_](?:[\w-]{0,61}[^\W_])?"
+EMAIL_PATTERN = re.compile(
+    rf"{_ATOM}(?:\.{_ATOM})*@(?:{_LABEL}\.)+(?:[^\W\d_]{{2,63}}|xn--[a-z0-9-]{{1,59}})",
+    re.IGNORECASE
+)
+MAX_EMAIL_LENGTH = 254
+
+# Providers that ignore dots in the local part
+DOTLESS_DOMAINS = {"gmail.com": "gmail.com", "googlemail.com": "gmail.com"}
+
+class NormalizedEmail(Record):
+    """Canonical address and domain facts for one email"""
+    __slots__ = ("email", "domain", "registrable_domain", "free_mail", "disposable")
 
 def is_valid_email(email: str) -> bool:
-    pattern = r"^[\w\.-]+@[\w\.-]+\.\w+$"
-    return re.match(pattern, email) is not None
+    return (len(email) <= MAX_EMAIL_LENGTH and EMAIL_PATTERN.fullmatch(email) is not None
+            and (email.isascii() or to_ascii(email.rpartition("@")[2]) is not None))
+
+def validate_many(emails):
+    """is_valid_email for a batch, e.g. an ingest chunk; returns a list of bools"""
+    return [is_valid_email(email) for email in emails]
+
+@lru_cache(maxsize=65536)
+def _domain_facts(domain):
+    """(ascii domain, registrable domain, free mail, disposable) for an email domain"""
+    domain = to_ascii(domain)
+    registrable = registrable_domain(domain)
+    if registrable in DOTLESS_DOMAINS:
+        domain = registrable = DOTLESS_DOMAINS[registrable]
+    return domain, registrable, is_free_email_domain(domain), is_disposable_domain(domain)
+
+def normalize_email(email):
+    """
+    Lowercased address without its +tag (and without dots for Gmail), IDN domain in punycode.
+    Returns a NormalizedEmail, or None for an invalid address.
+    """
+    email = email.strip()
+    if not is_valid_email(email):
+        return None
+    local, _, domain = email.rpartition("@")
+    domain, registrable, free_mail, disposable = _domain_facts(domain)
+
+    local = local.lower()
+    if "+" in local[1:]:
+        local = local[:local.index("+", 1)]
+    if registrable in DOTLESS_DOMAINS.values():
+        local = local.replace(".", "")
+
+    return NormalizedEmail(f"{local}@{domain}", domain, registrable, free_mail, disposable)
+
+def normalize_many(emails):
+    """normalize_email for a batch; a domain's PSL and provider lookups run once per process"""
+    return [normalize_email(email) for email in emails]
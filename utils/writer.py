@@ -0,0 +1,266 @@
+import os
+import queue
+import threading
+import time
+
+from utils.db import get_connection, IntegrityError, OperationalError
+from utils import metrics
+
+# With several API workers, every write goes through one writer process so
+# SQLite only ever sees a single writer. Workers send a registered write task
+# over a local socket; the writer groups whatever has queued up into one
+# transaction (one fsync) and replies to each worker. Reads stay in the
+# workers on their own WAL connections.
+#
+# Without WRITER_ADDRESS (a single API process, scripts) tasks run inline on
+# a short-lived connection instead.
+WRITER_BATCH_SIZE = int(os.getenv("WRITER_BATCH_SIZE", "64"))
+WRITER_BATCH_SECONDS = float(os.getenv("WRITER_BATCH_MS", "2")) / 1000
+# A worker gives up on a reply after this long (the writer is then presumed stuck)
+WRITER_TIMEOUT_SECONDS = float(os.getenv("WRITER_TIMEOUT_SECONDS", "30"))
+# How often the API's supervisor pings the writer, and how long a ping may take
+WRITER_HEALTH_SECONDS = float(os.getenv("WRITER_HEALTH_SECONDS", "5"))
+
+WRITE_TASKS = {}
+
+def write_task(fn):
+    """Register fn(cursor, *args) so it can run in the writer process"""
+    WRITE_TASKS[fn.__name__] = fn
+    return fn
+
+@write_task
+def ping(cursor):
+    """Health check; answered by the write loop, so a stuck loop fails it"""
+    return True
+
+# A failed task is sent back as (code, message): driver exceptions do not
+# always pickle, and the code lets workers re-raise e.g. IntegrityError so a
+# duplicate email stays a 400 rather than a 500
+ERROR_TYPES = {"integrity": IntegrityError, "operational": OperationalError}
+
+class WriteError(Exception):
+    """A write task failed in the writer process with an error that has no code of its own"""
+
+    def __init__(self, code, message):
+        super().__init__(code, message)
+        self.code = code
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+def error_reply(e):
+    """(code, message) for a task's exception"""
+    for code, error_type in ERROR_TYPES.items():
+        if isinstance(e, error_type):
+            return code, str(e)
+    return "error", f"{type(e).__name__}: {e}"
+
+def reply_error(code, message):
+    """The exception a worker raises for an error_reply()"""
+    error_type = ERROR_TYPES.get(code)
+    return error_type(message) if error_type else WriteError(code, message)
+
+class LocalWriter:
+    """Run each task in its own transaction on this process's connection"""
+
+    def submit(self, task, *args):
+        with metrics.track("db_write", mode="local"):
+            conn = get_connection()
+            try:
+                result = WRITE_TASKS[task](conn.cursor(), *args)
+                conn.commit()
+                return result
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+class RemoteWriter:
+    """Send tasks to the writer process; one socket per worker thread"""
+
+    def __init__(self, address, authkey, timeout=WRITER_TIMEOUT_SECONDS):
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def _client(self):
+        client = getattr(self.local, "client", None)
+        if client is None:
+            from multiprocessing.connection import Client
+            client = self.local.client = Client(self.address, authkey=self.authkey)
+        return client
+
+    def submit(self, task, *args):
+        with metrics.track("db_write", mode="remote"):
+            client = self._client()
+            try:
+                client.send((task, args))
+                if not client.poll(self.timeout):
+                    raise TimeoutError(f"writer did not answer {task} within {self.timeout}s")
+                status, value = client.recv()
+            except (EOFError, OSError):
+                # Writer restarted, stuck or the socket broke (a late reply would
+                # answer the wrong call); reconnect on the next call
+                client.close()
+                self.local.client = None
+                raise
+        if status == "error":
+            raise reply_error(*value)
+        return value
+
+_writer = None
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        address = os.getenv("WRITER_ADDRESS")
+        if address:
+            _writer = RemoteWriter(address, os.getenv("WRITER_AUTHKEY", "").encode())
+        else:
+            _writer = LocalWriter()
+    return _writer
+
+class WriterServer:
+    """Single SQLite writer that commits queued tasks in batches"""
+
+    def __init__(self, address, authkey,
+                 batch_size=WRITER_BATCH_SIZE, batch_seconds=WRITER_BATCH_SECONDS):
+        self.address = address
+        self.authkey = authkey
+        self.batch_size = batch_size
+        self.batch_seconds = batch_seconds
+        self.pending = queue.Queue()
+
+    def serve_forever(self):
+        from multiprocessing.connection import Listener
+
+        threading.Thread(target=self._write_loop, daemon=True).start()
+        with Listener(self.address, authkey=self.authkey) as listener:
+            while True:
+                client = listener.accept()
+                threading.Thread(target=self._handle_client, args=(client,), daemon=True).start()
+
+    def _handle_client(self, client):
+        reply = queue.Queue(maxsize=1)
+        try:
+            while True:
+                task, args = client.recv()
+                self.pending.put((task, args, reply))
+                status, value = reply.get()
+                if status == "error":
+                    value = error_reply(value)
+                try:
+                    client.send((status, value))
+                except Exception as e:
+                    # The task's result could not be pickled
+                    client.send(("error", error_reply(e)))
+        except (EOFError, OSError):
+            pass
+        finally:
+            client.close()
+
+    def _next_batch(self):
+        batch = [self.pending.get()]
+        deadline = time.monotonic() + self.batch_seconds
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.pending.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_loop(self):
+        conn = get_connection()
+        # Transactions are managed explicitly so each task can get its own savepoint
+        conn.isolation_level = None
+
+        while True:
+            self._write_batch(conn, self._next_batch())
+
+    def _write_batch(self, conn, batch):
+        """Run a batch in one transaction, each task in its own savepoint, and reply to each"""
+        cursor = conn.cursor()
+        results = []
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for task, args, reply in batch:
+                # A failing task (e.g. duplicate email) only undoes its own writes
+                cursor.execute("SAVEPOINT task")
+                try:
+                    results.append(("ok", WRITE_TASKS[task](cursor, *args)))
+                    cursor.execute("RELEASE task")
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO task")
+                    cursor.execute("RELEASE task")
+                    results.append(("error", e))
+            cursor.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            results = [("error", e)] * len(batch)
+
+        for (task, args, reply), result in zip(batch, results):
+            reply.put(result)
+
+def serve(address, authkey):
+    """Process entry point for the writer"""
+    WriterServer(address, authkey).serve_forever()
+
+class WriterProcess:
+    """Run the writer in a child process and restart it when it dies or stops answering"""
+
+    def __init__(self, address, authkey, interval=WRITER_HEALTH_SECONDS):
+        self.address = address
+        self.authkey = authkey
+        self.interval = interval
+        self.process = None
+        self.stopped = threading.Event()
+
+    def start(self):
+        import multiprocessing
+
+        if os.path.exists(self.address):
+            os.remove(self.address)
+        self.process = multiprocessing.Process(
+            target=serve, args=(self.address, self.authkey), name="lead-writer", daemon=True
+        )
+        self.process.start()
+        while not os.path.exists(self.address) and self.process.is_alive():
+            time.sleep(0.05)
+
+    def healthy(self):
+        if not self.process.is_alive():
+            return False
+        try:
+            return RemoteWriter(self.address, self.authkey, timeout=self.interval).submit("ping")
+        except Exception:
+            return False
+
+    def check(self):
+        """Restart the writer if it fails a health check. Returns whether it was restarted"""
+        if self.healthy():
+            return False
+        print(f"Writer process {self.process.pid} is not answering; restarting it")
+        metrics.inc("writer_restarts_total")
+        self.process.terminate()
+        self.process.join(self.interval)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.start()
+        return True
+
+    def watch(self):
+        """Check the writer every interval in a background thread until stop()"""
+        def loop():
+            while not self.stopped.wait(self.interval):
+                self.check()
+        threading.Thread(target=loop, name="lead-writer-watch", daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.process is not None:
+            self.process.terminate()